@@ -0,0 +1,385 @@
+"""
+anki.py - Anki .apkg import and export for Chinese Learning App
+An .apkg is a zip holding an SQLite collection. Importing copies just the
+collection out of the zip to a temporary file in chunks, then streams the
+notes in batches through a field mapping (Simplified/Pinyin/Meaning...
+-> hanzi/pinyin/english/spanish) straight into a JSON deck file, and
+optionally replays the review history into the learner's review log.
+Exporting writes the deck and the learner's reviews into a new collection
+(the legacy schema every Anki version imports) and zips it up; reviewed
+words become Anki review cards with the interval, ease and due date the
+app's SM-2 scheduler gives them. The collection is never held in memory.
+
+Usage:
+    python anki.py import teacher.apkg decks/teacher.json --map hanzi=Simplified
+    python main_simplified.py --deck decks/teacher.json
+    python anki.py export progress.apkg --deck decks/teacher.json
+"""
+
+import argparse
+import hashlib
+import html
+import json
+import os
+import re
+import shutil
+import sqlite3
+import tempfile
+import time
+import zipfile
+
+from pinyin import normalize
+from review_log import read_events, record_reviews
+
+BATCH_SIZE = 1000
+COPY_BUFFER = 1 << 20
+FIELD_SEPARATOR = "\x1f"
+SCHEMA_FIELDS = ["hanzi", "pinyin", "english", "spanish"]
+EXPORT_FIELDS = ["Hanzi", "Pinyin", "English", "Spanish"]
+# Lower-cased Anki field names recognised for each deck field, best first
+FIELD_ALIASES = {
+    "hanzi": ["hanzi", "simplified", "chinese", "characters", "character", "word", "expression", "front"],
+    "pinyin": ["pinyin", "reading", "pronunciation", "pinyin.1"],
+    "english": ["english", "meaning", "definition", "translation", "glossary", "back"],
+    "spanish": ["spanish", "español", "espanol", "significado"],
+}
+COLLECTION_NAMES = ["collection.anki21", "collection.anki2"]
+# Anki 2.1.50+ packages: a zstd collection, with only an "update Anki" placeholder in collection.anki2
+MODERN_NAMES = ["collection.anki21b", "meta"]
+LEGACY_EXPORT_HINT = "export it from Anki with \"Support older Anki versions\" ticked"
+ANKI_NEW, ANKI_REVIEW = 0, 2    # Card type and queue
+ANKI_EASE_MANUAL = 0     # Revlog rows written by rescheduling a card by hand, not by answering it
+ANKI_EASE_AGAIN = 1
+ANKI_EASE_GOOD = 3
+REVIEW_SOURCE = "anki"
+
+TAGS = re.compile(r"<[^>]*>")
+SOUND = re.compile(r"\[sound:[^\]]*\]")
+LINE_BREAKS = re.compile(r"<br\s*/?>|<div>", re.IGNORECASE)
+SPACES = re.compile(r"\s+")
+
+def clean_field(text):
+    """Anki field HTML -> plain text"""
+    text = LINE_BREAKS.sub(" ", text)
+    text = html.unescape(TAGS.sub("", SOUND.sub("", text)))
+    return SPACES.sub(" ", text).strip()
+
+def parse_field_map(pairs):
+    """["hanzi=Simplified", ...] -> {"hanzi": "simplified"}"""
+    field_map = {}
+    for pair in pairs or ():
+        key, _, name = pair.partition("=")
+        if key not in SCHEMA_FIELDS or not name:
+            raise ValueError(f"Bad field mapping {pair!r}: use e.g. hanzi=Simplified")
+        field_map[key] = name.strip().lower()
+    return field_map
+
+def map_fields(field_names, field_map=None):
+    """Deck field -> field position for one note type (None if hanzi cannot be found)"""
+    positions = {name.strip().lower(): position for position, name in enumerate(field_names)}
+    mapping = {}
+    for key in SCHEMA_FIELDS:
+        wanted = [field_map[key]] if field_map and key in field_map else FIELD_ALIASES[key]
+        mapping[key] = next((positions[name] for name in wanted if name in positions), None)
+    if mapping["hanzi"] is None:
+        return None
+    return mapping
+
+def note_to_word(fields, mapping):
+    """One note's fields -> a deck word (None without hanzi)"""
+    word = {}
+    for key in SCHEMA_FIELDS:
+        position = mapping[key]
+        word[key] = clean_field(fields[position]) if position is not None and position < len(fields) else ""
+    if not word["hanzi"]:
+        return None
+    if word["pinyin"]:
+        word["pinyin"] = normalize(word["pinyin"]) or word["pinyin"]
+    return word
+
+class AnkiPackage:
+    """The collection inside an .apkg, copied out to a temporary file"""
+
+    def __init__(self, path):
+        self.path = path
+        self.temp_dir = tempfile.TemporaryDirectory(prefix="apkg-")
+        collection_path = os.path.join(self.temp_dir.name, "collection.sqlite")
+        with zipfile.ZipFile(path) as package:
+            names = set(package.namelist())
+            if "collection.anki21" not in names and any(name in names for name in MODERN_NAMES):
+                raise ValueError(f"{path} uses the newer Anki package format; {LEGACY_EXPORT_HINT}")
+            member = next((name for name in COLLECTION_NAMES if name in names), None)
+            if member is None:
+                raise ValueError(f"{path} has no collection.anki21/anki2; {LEGACY_EXPORT_HINT}")
+            # Chunked copy: the collection is never held in memory
+            with package.open(member) as source, open(collection_path, "wb") as target:
+                shutil.copyfileobj(source, target, COPY_BUFFER)
+        self.connection = sqlite3.connect(collection_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Close the collection and delete the temporary copy"""
+        self.connection.close()
+        self.temp_dir.cleanup()
+
+    def note_types(self):
+        """Note type id -> field names in order"""
+        tables = {row[0] for row in self.connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        if "fields" in tables:
+            # Newer collections keep note types in their own tables
+            note_types = {}
+            for type_id, name in self.connection.execute("SELECT ntid, name FROM fields ORDER BY ntid, ord"):
+                note_types.setdefault(type_id, []).append(name)
+            return note_types
+        models = json.loads(self.connection.execute("SELECT models FROM col").fetchone()[0])
+        return {int(type_id): [field["name"] for field in sorted(model["flds"], key=lambda field: field["ord"])]
+                for type_id, model in models.items()}
+
+    def iter_notes(self):
+        """Yield (note id, note type id, fields) in batches from the database"""
+        cursor = self.connection.execute("SELECT id, mid, flds FROM notes ORDER BY id")
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                return
+            for note_id, type_id, fields in rows:
+                yield note_id, type_id, fields.split(FIELD_SEPARATOR)
+
+    def iter_reviews(self):
+        """Yield (revlog id, note id, ease) oldest first"""
+        cursor = self.connection.execute(
+            "SELECT revlog.id, cards.nid, revlog.ease FROM revlog "
+            "JOIN cards ON cards.id = revlog.cid ORDER BY revlog.id")
+        while True:
+            rows = cursor.fetchmany(BATCH_SIZE)
+            if not rows:
+                return
+            yield from rows
+
+def import_apkg(path, output_path, field_map=None, reviews=True, learner_id=None):
+    """Import an .apkg into a JSON deck file and (optionally) the review log
+
+    Returns (words imported, notes skipped, reviews imported).
+    """
+    with AnkiPackage(path) as package:
+        mappings = {type_id: map_fields(names, field_map) for type_id, names in package.note_types().items()}
+        note_words = {}      # Note id -> hanzi, only needed to attach reviews
+        seen = set()
+        imported = skipped = 0
+
+        temp_path = output_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as deck_file:
+            deck_file.write("[")
+            for note_id, type_id, fields in package.iter_notes():
+                mapping = mappings.get(type_id)
+                word = note_to_word(fields, mapping) if mapping else None
+                if word is None or word["hanzi"] in seen:
+                    skipped += 1
+                    continue
+                seen.add(word["hanzi"])
+                if reviews:
+                    note_words[note_id] = word["hanzi"]
+                deck_file.write(("\n" if not imported else ",\n") + json.dumps(word, ensure_ascii=False))
+                imported += 1
+            deck_file.write("\n]\n")
+        os.replace(temp_path, output_path)
+
+        review_count = 0
+        if reviews:
+            # Revlog ids already imported are skipped, so importing twice is harmless
+            known = {event.get("anki_id") for event in read_events(learner_id, "review")
+                     if event.get("source") == REVIEW_SOURCE}
+            review_count = record_reviews(
+                ((note_words[note_id], ease != ANKI_EASE_AGAIN, review_id / 1000.0,
+                  {"source": REVIEW_SOURCE, "anki_id": review_id})
+                 for review_id, note_id, ease in package.iter_reviews()
+                 if note_id in note_words and review_id not in known and ease != ANKI_EASE_MANUAL),
+                learner_id)
+    return imported, skipped, review_count
+
+# Legacy (schema 11) collection: note types, decks and options live as JSON in col
+SCHEMA = """
+CREATE TABLE col (id integer primary key, crt integer not null, mod integer not null, scm integer not null,
+    ver integer not null, dty integer not null, usn integer not null, ls integer not null, conf text not null,
+    models text not null, decks text not null, dconf text not null, tags text not null);
+CREATE TABLE notes (id integer primary key, guid text not null, mid integer not null, mod integer not null,
+    usn integer not null, tags text not null, flds text not null, sfld text not null, csum integer not null,
+    flags integer not null, data text not null);
+CREATE TABLE cards (id integer primary key, nid integer not null, did integer not null, ord integer not null,
+    mod integer not null, usn integer not null, type integer not null, queue integer not null,
+    due integer not null, ivl integer not null, factor integer not null, reps integer not null,
+    lapses integer not null, left integer not null, odue integer not null, odid integer not null,
+    flags integer not null, data text not null);
+CREATE TABLE revlog (id integer primary key, cid integer not null, usn integer not null, ease integer not null,
+    ivl integer not null, lastIvl integer not null, factor integer not null, time integer not null,
+    type integer not null);
+CREATE TABLE graves (usn integer not null, oid integer not null, type integer not null);
+CREATE INDEX ix_notes_csum on notes (csum);
+CREATE INDEX ix_cards_nid on cards (nid);
+CREATE INDEX ix_revlog_cid on revlog (cid);
+"""
+
+def _collection_json(deck_name, model_id, deck_id, now):
+    """The col row's models, decks and dconf JSON for one note type and one deck"""
+    fields = [{"name": name, "ord": position, "sticky": False, "rtl": False, "font": "Arial",
+               "size": 20, "media": []} for position, name in enumerate(EXPORT_FIELDS)]
+    model = {"id": model_id, "name": "Chinese Learning App", "type": 0, "mod": now, "usn": -1,
+             "sortf": 0, "did": deck_id, "tags": [], "vers": [], "flds": fields,
+             "tmpls": [{"name": "Recognition", "ord": 0, "qfmt": "<div class=hanzi>{{Hanzi}}</div>",
+                        "afmt": "{{FrontSide}}<hr id=answer>{{Pinyin}}<br>{{English}}<br>{{Spanish}}",
+                        "did": None, "bqfmt": "", "bafmt": ""}],
+             "css": ".card { font-family: arial; font-size: 20px; text-align: center; }\n"
+                    ".hanzi { font-size: 48px; }",
+             "latexPre": "", "latexPost": "", "req": [[0, "any", [0]]]}
+    deck_defaults = {"mod": now, "usn": -1, "collapsed": False, "desc": "", "dyn": 0, "conf": 1,
+                     "extendNew": 10, "extendRev": 50, "newToday": [0, 0], "revToday": [0, 0],
+                     "lrnToday": [0, 0], "timeToday": [0, 0]}
+    decks = {"1": dict(deck_defaults, id=1, name="Default"),
+             str(deck_id): dict(deck_defaults, id=deck_id, name=deck_name)}
+    options = {"1": {"id": 1, "name": "Default", "mod": 0, "usn": 0, "maxTaken": 60, "autoplay": True,
+                     "timer": 0, "replayq": True, "dyn": False,
+                     "new": {"delays": [1, 10], "ints": [1, 4, 7], "initialFactor": 2500, "order": 1,
+                             "perDay": 20, "bury": True, "separate": True},
+                     "rev": {"perDay": 200, "ease4": 1.3, "fuzz": 0.05, "ivlFct": 1, "maxIvl": 36500,
+                             "bury": True, "minSpace": 1},
+                     "lapse": {"delays": [10], "mult": 0, "minInt": 1, "leechFails": 8, "leechAction": 0}}}
+    return json.dumps({str(model_id): model}), json.dumps(decks), json.dumps(options)
+
+def _checksum(text):
+    """Anki's duplicate-check sum: first 8 hex digits of the field's SHA-1"""
+    return int(hashlib.sha1(text.encode("utf-8")).hexdigest()[:8], 16)
+
+def card_progress(learner_id=None):
+    """hanzi -> (interval days, ease factor, reviews, lapses, due day) from the learner's SM-2 schedule"""
+    import numpy as np  # Deferred: only exports with reviews need the scheduler
+
+    from review_log import load_reviews
+    from scheduler import ReviewSchedule, load_parameters
+
+    words, days, correct = load_reviews(learner_id)
+    if not words.size:
+        return {}
+    schedule = ReviewSchedule("sm2", load_parameters("sm2", learner_id))
+    schedule.replay(words, days, correct)
+    counts = dict(zip(*np.unique(words, return_counts=True)))
+    progress = {}
+    for hanzi, (state, _, due_day) in schedule.cards.items():
+        progress[hanzi] = (int(state["interval"][0]), int(round(state["ease"][0] * 1000)),
+                           int(counts[hanzi]), int(state["lapses"][0]), int(due_day))
+    return progress
+
+def export_apkg(vocabulary, path, deck_name="Chinese Learning App", reviews=True, learner_id=None):
+    """Write the deck (and the learner's review history and progress) as an .apkg
+
+    Returns (notes written, reviews written).
+    """
+    now = int(time.time())
+    base_id = now * 1000
+    model_id, deck_id = base_id, base_id + 1
+    card_ids = []       # One card per note, same id
+    word_cards = {}     # hanzi -> card the reviews go to (the first note when hanzi repeat)
+    progress = card_progress(learner_id) if reviews else {}
+    # Review cards are due on a day counted from the collection's creation
+    first_day = min((due_day for *_, due_day in progress.values()), default=now // 86400)
+    created = min(first_day * 86400, now)
+
+    with tempfile.TemporaryDirectory(prefix="apkg-") as temp_dir:
+        collection_path = os.path.join(temp_dir, "collection.anki2")
+        connection = sqlite3.connect(collection_path)
+        connection.executescript(SCHEMA)
+        models, decks, options = _collection_json(deck_name, model_id, deck_id, now)
+        connection.execute("INSERT INTO col VALUES (1, ?, ?, ?, 11, 0, 0, 0, '{}', ?, ?, ?, '{}')",
+                           (created, base_id, base_id, models, decks, options))
+
+        def note_rows():
+            occurrences = {}
+            for position, word in enumerate(vocabulary):
+                note_id = base_id + position
+                card_ids.append((note_id, word["hanzi"]))
+                word_cards.setdefault(word["hanzi"], note_id)
+                fields = [word.get(key, "") or "" for key in SCHEMA_FIELDS]
+                # Stable across exports so Anki updates notes in place; a repeated hanzi
+                # gets its own guid, or importing would merge the two notes
+                occurrence = occurrences.get(word["hanzi"], 0)
+                occurrences[word["hanzi"]] = occurrence + 1
+                guid_key = word["hanzi"] + (f"{FIELD_SEPARATOR}{occurrence}" if occurrence else "")
+                guid = hashlib.sha1(guid_key.encode("utf-8")).hexdigest()[:10]
+                yield (note_id, guid, model_id, now, -1, "", FIELD_SEPARATOR.join(fields), fields[0],
+                       _checksum(fields[0]), 0, "")
+
+        connection.executemany("INSERT INTO notes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", note_rows())
+
+        def card_rows():
+            for position, (card_id, hanzi) in enumerate(card_ids):
+                if card_id == word_cards[hanzi] and hanzi in progress:
+                    interval, factor, reps, lapses, due_day = progress[hanzi]
+                    yield (card_id, card_id, deck_id, now, ANKI_REVIEW, ANKI_REVIEW, due_day - first_day,
+                           interval, factor, reps, lapses)
+                else:
+                    yield card_id, card_id, deck_id, now, ANKI_NEW, ANKI_NEW, position, 0, 0, 0, 0
+
+        connection.executemany(
+            "INSERT INTO cards VALUES (?, ?, ?, 0, ?, -1, ?, ?, ?, ?, ?, ?, ?, 0, 0, 0, 0, '')", card_rows())
+
+        review_count = 0
+        if reviews:
+            def review_rows():
+                nonlocal review_count
+                last_id = 0
+                for event in read_events(learner_id, "review"):
+                    card_id = word_cards.get(event["word"])
+                    if card_id is None:
+                        continue
+                    review_id = max(int(event["ts"] * 1000), last_id + 1)   # revlog ids must be unique
+                    last_id = review_id
+                    review_count += 1
+                    yield (review_id, card_id, -1, ANKI_EASE_GOOD if event["correct"] else ANKI_EASE_AGAIN,
+                           0, 0, 0, 0, 1)
+            connection.executemany("INSERT INTO revlog VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", review_rows())
+        connection.commit()
+        connection.close()
+
+        with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as package:
+            package.write(collection_path, "collection.anki2")
+            package.writestr("media", "{}")
+    return len(card_ids), review_count
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Import or export Anki .apkg decks")
+    commands = parser.add_subparsers(dest="command", required=True)
+    import_parser = commands.add_parser("import", help="read an .apkg into a JSON deck")
+    import_parser.add_argument("apkg")
+    import_parser.add_argument("output", help="JSON deck to write (load it with --deck)")
+    import_parser.add_argument("--map", action="append", metavar="FIELD=NAME",
+                               help="Anki field for a deck field, e.g. hanzi=Simplified (repeatable)")
+    import_parser.add_argument("--no-reviews", action="store_true", help="skip the review history")
+    export_parser = commands.add_parser("export", help="write the deck and your reviews to an .apkg")
+    export_parser.add_argument("apkg")
+    export_parser.add_argument("--deck", help="vocabulary module or JSON deck (default: the app's deck)")
+    export_parser.add_argument("--name", default="Chinese Learning App", help="Anki deck name")
+    export_parser.add_argument("--no-reviews", action="store_true", help="leave out the review history")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        if args.command == "import":
+            words, skipped, reviews = import_apkg(args.apkg, args.output, parse_field_map(args.map),
+                                                  not args.no_reviews)
+            print(f"📥 {words:,} words ({skipped:,} notes skipped), {reviews:,} reviews "
+                  f"in {time.perf_counter() - start:.1f}s → {args.output}")
+        else:
+            from vocabulary import load_vocabulary
+
+            notes, reviews = export_apkg(load_vocabulary(args.deck), args.apkg, args.name, not args.no_reviews)
+            print(f"📤 {notes:,} notes, {reviews:,} reviews in {time.perf_counter() - start:.1f}s → {args.apkg}")
+    except (OSError, ValueError, zipfile.BadZipFile, sqlite3.DatabaseError) as error:
+        parser.error(str(error))
+
+if __name__ == "__main__":
+    main()
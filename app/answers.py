@@ -0,0 +1,171 @@
+"""
+answers.py - Typed-answer grading for Chinese Learning App
+Grades what the learner types against a flashcard's answer. Hanzi answers
+also accept the word's pinyin with tone marks, tone numbers or no tones,
+unless the question already shows that pinyin (pinyin → hanzi): then only
+the characters count, and typed pinyin just feeds the IME candidate bar;
+English/Spanish answers accept any of the comma- or slash-separated glosses
+("to see/watch"). Typos are measured with a bit-parallel (Myers/Hyyrö) edit
+distance whose pattern tables are built once per card, so grading is cheap
+enough to run on every keystroke. Near misses are reported by kind: a wrong
+tone, a wrong syllable or a small typo.
+"""
+
+import re
+import unicodedata
+
+from pinyin import NO_TONE, TONE_BITS, decode, encode, strip_tones, syllable_of, tone_of, toneless
+from vocabulary import contains_hanzi, get_question_answer
+
+CORRECT = "correct"
+TYPO = "typo"                 # Accepted, but not spelled exactly
+WRONG_TONE = "wrong_tone"
+WRONG_SYLLABLE = "wrong_syllable"
+INCORRECT = "incorrect"
+EMPTY = "empty"
+ACCEPTED = {CORRECT, TYPO}
+
+GLOSS_SEPARATORS = re.compile(r"[,/;]")
+SPACES = re.compile(r"\s+")
+
+class BitPattern:
+    """Precomputed match masks of a pattern for Myers' bit-parallel edit distance"""
+
+    __slots__ = ("text", "peq", "mask", "high")
+
+    def __init__(self, text):
+        self.text = text
+        self.peq = {}
+        for position, char in enumerate(text):
+            self.peq[char] = self.peq.get(char, 0) | (1 << position)
+        self.mask = (1 << len(text)) - 1
+        self.high = 1 << (len(text) - 1) if text else 0
+
+    def distance(self, other):
+        """Levenshtein distance between the pattern and another string"""
+        if not self.text:
+            return len(other)
+        peq, mask, high = self.peq, self.mask, self.high
+        positive, negative = mask, 0
+        score = len(self.text)
+        for char in other:
+            eq = peq.get(char, 0)
+            xv = eq | negative
+            xh = (((eq & positive) + positive) ^ positive) | eq
+            horizontal_positive = negative | ~(xh | positive)
+            horizontal_negative = positive & xh
+            if horizontal_positive & high:
+                score += 1
+            elif horizontal_negative & high:
+                score -= 1
+            horizontal_positive = (horizontal_positive << 1) | 1
+            horizontal_negative <<= 1
+            positive = (horizontal_negative | ~(xv | horizontal_positive)) & mask
+            negative = horizontal_positive & xv & mask
+        return score
+
+def edit_distance(a, b):
+    """Levenshtein distance between two strings"""
+    return BitPattern(a).distance(b)
+
+def normalize_gloss(text):
+    """Lower-case, accent-free, single-spaced gloss without a leading "to " """
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    text = "".join(char for char in decomposed if not unicodedata.combining(char))
+    text = SPACES.sub(" ", text).strip(" .!?¡¿")
+    return text[3:] if text.startswith("to ") else text
+
+def split_glosses(answer):
+    """Every accepted gloss of an answer such as "to see/watch" """
+    glosses = [normalize_gloss(part) for part in GLOSS_SEPARATORS.split(answer)]
+    return [gloss for gloss in glosses if gloss]
+
+def typo_allowance(text):
+    """Edits tolerated as a typo: one per five characters, at least one"""
+    return max(1, len(text) // 5)
+
+class AnswerKey:
+    """Everything needed to grade one card, prepared ahead of time"""
+
+    def __init__(self, word, mode):
+        question, answer = get_question_answer(word, mode)
+        self.answer = answer
+        self.is_hanzi = contains_hanzi(answer)
+        if self.is_hanzi:
+            self.hanzi = answer
+            # Typing back pinyin the card shows proves nothing
+            pinyin = word.get("pinyin", "")
+            self.accepts_pinyin = not (pinyin and pinyin in question)
+            self.codes = encode(word["pinyin"]) or ()
+            self.toneless = toneless(self.codes)
+            plain = decode(self.codes, "plain", "")
+            self.patterns = [BitPattern(plain)] if plain else []
+        else:
+            self.patterns = [BitPattern(gloss) for gloss in split_glosses(answer)]
+
+    def grade(self, typed):
+        """Grade typed text: returns (verdict, message)"""
+        typed = typed.strip()
+        if not typed:
+            return EMPTY, ""
+        if self.is_hanzi:
+            return self._grade_hanzi(typed)
+        return self._grade_gloss(typed)
+
+    def check(self, typed):
+        """Grade typed text: returns (accepted, verdict, message)"""
+        verdict, message = self.grade(typed)
+        if verdict == INCORRECT and not message:
+            message = "✗ Not quite"
+        return verdict in ACCEPTED, verdict, message
+
+    def _grade_gloss(self, typed):
+        """Closest accepted gloss decides"""
+        typed = normalize_gloss(typed)
+        best = min(self.patterns, key=lambda pattern: pattern.distance(typed), default=None)
+        if best is None:
+            return INCORRECT, ""
+        distance = best.distance(typed)
+        if distance == 0:
+            return CORRECT, "✓ Correct"
+        if distance <= typo_allowance(best.text):
+            return TYPO, f"✓ Accepted (typo: \"{best.text}\")"
+        return INCORRECT, ""
+
+    def _grade_hanzi(self, typed):
+        """Typed characters must match; typed pinyin is compared syllable by syllable"""
+        if contains_hanzi(typed):
+            if typed == self.hanzi:
+                return CORRECT, "✓ Correct"
+            if edit_distance(self.hanzi, typed) == 1 and len(self.hanzi) > 1:
+                return INCORRECT, "≈ One character off"
+            return INCORRECT, ""
+        if not self.accepts_pinyin:
+            return INCORRECT, "✗ Pick the characters for this pinyin"
+
+        # Syllable codes compare as integers; untyped tones (NO_TONE) are not held against the learner
+        typed_codes = encode(typed, default_tone=None)
+        expected = self.codes
+        if typed_codes is not None and toneless(typed_codes) == self.toneless:
+            wrong = [decode((code,), "numbers") for typed_code, code in zip(typed_codes, expected)
+                     if tone_of(typed_code) not in (NO_TONE, tone_of(code))]
+            if wrong:
+                return WRONG_TONE, f"≈ Right syllables, wrong tone (should be {', '.join(wrong)})"
+            return CORRECT, "✓ Correct"
+
+        if not self.patterns:
+            return INCORRECT, ""
+        plain, _ = strip_tones(typed.lower().replace("v", "ü"))
+        typed_plain = "".join(char for char in plain if char.isalpha())
+        distance = self.patterns[0].distance(typed_plain)
+        if distance <= typo_allowance(self.patterns[0].text):
+            if typed_codes is not None and len(typed_codes) == len(expected):
+                wrong = [syllable_of(code) for code, typed_code in zip(expected, typed_codes)
+                         if (code ^ typed_code) >> TONE_BITS]
+                return WRONG_SYLLABLE, f"≈ Close, check {', '.join(wrong)}"
+            return WRONG_SYLLABLE, "≈ Close"
+        return INCORRECT, ""
+
+def prefetch_step(word, mode, content):
+    """Prefetcher step: build the card's answer key ahead of time"""
+    content["answer_key"] = AnswerKey(word, mode)
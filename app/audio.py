@@ -0,0 +1,269 @@
+"""
+audio.py - Offline pronunciation audio packs for Chinese Learning App
+An audio pack is one file holding a PCM clip per hanzi word or per toned
+pinyin syllable ("ni3") plus an index, so the whole pack is memory-mapped
+and clips are sliced out without reading the file. Word audio from a
+syllable pack is assembled from its syllables, so ~1,300 clips cover any
+vocabulary. Clips land in a byte-bounded LRU cache and are played on a
+background thread so the Tk loop never waits for the sound device.
+
+Pack layout: header (magic, index offset, index length), raw PCM clips,
+then a JSON index {"kind", "format", "clips": {key: [offset, length]}}.
+
+Usage:
+    python audio.py build wav_dir/ syllables.pack --kind syllable
+    python audio.py say syllables.pack "nǐ hǎo"
+"""
+
+import argparse
+import io
+import json
+import mmap
+import os
+import queue
+import shutil
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import wave
+from collections import OrderedDict
+
+from pinyin import NEUTRAL_TONE, split_syllables
+from storage import get_data_dir
+
+PACK_MAGIC = b"CLAPACK1"
+HEADER = struct.Struct("<8sQQ")
+PACK_KINDS = ["hanzi", "syllable"]
+DEFAULT_CACHE_BYTES = 32 * 1024 * 1024
+SYLLABLE_GAP_MS = 40
+
+def get_default_pack_path():
+    """Where the app looks for an audio pack unless told otherwise"""
+    return os.environ.get("CHINESE_APP_AUDIO") or os.path.join(get_data_dir("audio"), "pronunciation.pack")
+
+class AudioPack:
+    """Memory-mapped audio pack with an LRU cache of clips and assembled words"""
+
+    def __init__(self, path, cache_bytes=DEFAULT_CACHE_BYTES):
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = HEADER.unpack_from(self.data, 0)
+        if magic != PACK_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not an audio pack")
+        index = json.loads(self.data[index_offset:index_offset + index_length].decode("utf-8"))
+        self.kind = index["kind"]
+        self.format = index["format"]   # sample_rate, channels, sample_width
+        self.clips = {key: tuple(location) for key, location in index["clips"].items()}
+        self.cache = OrderedDict()
+        self.cache_bytes = cache_bytes
+        self.cached_bytes = 0
+        self.lock = threading.Lock()    # Shared by the prefetch thread and the Tk thread
+
+    def close(self):
+        """Release the memory map"""
+        self.data.close()
+        self.file.close()
+
+    def _cached(self, key, build):
+        """LRU lookup; build() produces the PCM bytes on a miss"""
+        with self.lock:
+            pcm = self.cache.get(key)
+            if pcm is not None:
+                self.cache.move_to_end(key)
+                return pcm
+        pcm = build()
+        if pcm is None:
+            return None
+        with self.lock:
+            if key not in self.cache:
+                self.cache[key] = pcm
+                self.cached_bytes += len(pcm)
+            while self.cached_bytes > self.cache_bytes and len(self.cache) > 1:
+                _, evicted = self.cache.popitem(last=False)
+                self.cached_bytes -= len(evicted)
+        return pcm
+
+    def clip(self, key):
+        """PCM bytes of one clip, or None if the pack has no such clip"""
+        location = self.clips.get(key)
+        if location is None:
+            return None
+        offset, length = location
+        return self._cached(key, lambda: self.data[offset:offset + length])
+
+    def syllable_clip(self, syllable, tone):
+        """Clip for a toned syllable, falling back to the neutral tone, then any tone"""
+        for fallback in (tone, NEUTRAL_TONE, 1, 2, 3, 4):
+            clip = self.clip(f"{syllable}{fallback}")
+            if clip is not None:
+                return clip
+        return None
+
+    def word_audio(self, word):
+        """PCM bytes for a vocabulary entry, or None if the pack cannot say it"""
+        if self.kind == "hanzi":
+            return self.clip(word["hanzi"])
+        return self._cached("word:" + word["pinyin"], lambda: self._assemble(word["pinyin"]))
+
+    def _assemble(self, pinyin):
+        """Join syllable clips with a short silence between them"""
+        syllables = split_syllables(pinyin)
+        if not syllables:
+            return None
+        clips = [self.syllable_clip(syllable, tone) for syllable, tone in syllables]
+        if any(clip is None for clip in clips):
+            return None
+        frame_bytes = self.format["channels"] * self.format["sample_width"]
+        gap = b"\0" * (self.format["sample_rate"] * SYLLABLE_GAP_MS // 1000 * frame_bytes)
+        return gap.join(clips)
+
+    def to_wav(self, pcm):
+        """Wrap PCM bytes from this pack in a WAV container"""
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav_file:
+            wav_file.setnchannels(self.format["channels"])
+            wav_file.setsampwidth(self.format["sample_width"])
+            wav_file.setframerate(self.format["sample_rate"])
+            wav_file.writeframes(pcm)
+        return buffer.getvalue()
+
+    def prefetch_step(self, word, mode, content):
+        """Prefetcher step: have the card's audio ready to play as WAV bytes"""
+        pcm = self.word_audio(word)
+        content["audio"] = self.to_wav(pcm) if pcm is not None else None
+
+def open_audio_pack(path=None):
+    """Open the audio pack at path (or the default location), or None if there is none"""
+    path = path or get_default_pack_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        return AudioPack(path)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"⚠️ Could not open audio pack {path}: {error}")
+        return None
+
+def build_audio_pack(source_dir, output_path, kind="syllable"):
+    """Pack every WAV file of a directory; the file name (without .wav) is the key
+
+    Syllable packs use toned syllables as names (ni3.wav, lü4.wav); hanzi
+    packs use the word itself (你好.wav). All clips must share one format.
+    """
+    if kind not in PACK_KINDS:
+        raise ValueError(f"Unknown pack kind {kind!r}")
+    names = sorted(name for name in os.listdir(source_dir) if name.lower().endswith(".wav"))
+    clips = {}
+    audio_format = None
+    temp_path = output_path + ".tmp"
+    with open(temp_path, "wb") as pack_file:
+        pack_file.write(HEADER.pack(PACK_MAGIC, 0, 0))
+        for name in names:
+            with wave.open(os.path.join(source_dir, name), "rb") as wav_file:
+                clip_format = {
+                    "sample_rate": wav_file.getframerate(),
+                    "channels": wav_file.getnchannels(),
+                    "sample_width": wav_file.getsampwidth(),
+                }
+                pcm = wav_file.readframes(wav_file.getnframes())
+            if audio_format is None:
+                audio_format = clip_format
+            elif clip_format != audio_format:
+                raise ValueError(f"{name} is {clip_format}, expected {audio_format}")
+            key = name[:-4].lower() if kind == "syllable" else name[:-4]
+            clips[key] = [pack_file.tell(), len(pcm)]
+            pack_file.write(pcm)
+
+        index = json.dumps({"kind": kind, "format": audio_format, "clips": clips},
+                           ensure_ascii=False).encode("utf-8")
+        index_offset = pack_file.tell()
+        pack_file.write(index)
+        pack_file.seek(0)
+        pack_file.write(HEADER.pack(PACK_MAGIC, index_offset, len(index)))
+    os.replace(temp_path, output_path)
+    return len(clips)
+
+def find_player_command():
+    """A command line player available on this system, or None"""
+    for command in (["afplay"], ["aplay", "-q"], ["paplay"]):
+        if shutil.which(command[0]):
+            return command
+    return None
+
+class AudioPlayer:
+    """Plays WAV bytes on a background thread; a new sound replaces the current one"""
+
+    def __init__(self):
+        self.requests = queue.Queue()
+        self.process = None
+        self.command = find_player_command()
+        self.worker = None
+
+    def play(self, wav_bytes):
+        """Queue a sound without blocking the caller"""
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._work, name="audio-player", daemon=True)
+            self.worker.start()
+        process = self.process
+        if process and process.poll() is None:
+            process.terminate()
+        self.requests.put(wav_bytes)
+
+    def _work(self):
+        """Worker thread: play the most recent request"""
+        while True:
+            wav_bytes = self.requests.get()
+            while not self.requests.empty():
+                wav_bytes = self.requests.get_nowait()
+            try:
+                self._play_now(wav_bytes)
+            except Exception as error:
+                print(f"⚠️ Audio playback failed: {error}")
+
+    def _play_now(self, wav_bytes):
+        """Play one sound, blocking this worker thread until it ends"""
+        if sys.platform == "win32":
+            import winsound
+            winsound.PlaySound(wav_bytes, winsound.SND_MEMORY)
+            return
+        if self.command is None:
+            return
+        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as wav_file:
+            wav_file.write(wav_bytes)
+        try:
+            self.process = subprocess.Popen(self.command + [wav_file.name],
+                                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            self.process.wait()
+        finally:
+            os.unlink(wav_file.name)
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Build and test pronunciation audio packs")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build", help="pack a directory of WAV clips")
+    build.add_argument("source_dir")
+    build.add_argument("output")
+    build.add_argument("--kind", choices=PACK_KINDS, default="syllable")
+    say = commands.add_parser("say", help="play a word from a pack")
+    say.add_argument("pack")
+    say.add_argument("text", help="pinyin for syllable packs, hanzi for hanzi packs")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        count = build_audio_pack(args.source_dir, args.output, args.kind)
+        print(f"📦 Packed {count} clips into {args.output}")
+        return
+
+    pack = AudioPack(args.pack)
+    pcm = pack.word_audio({"hanzi": args.text, "pinyin": args.text})
+    if pcm is None:
+        sys.exit(f"❌ No audio for {args.text!r} in {args.pack}")
+    player = AudioPlayer()
+    player._play_now(pack.to_wav(pcm))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,335 @@
+"""
+browser.py - Vocabulary browser screen for Chinese Learning App
+Lists the whole deck with sorting on any column and filtering on any field.
+The list is virtualized: it only creates widgets for the rows that fit on
+screen and relabels them as the view scrolls, so the screen costs the same
+for 15 words or 100k. Filtering runs over the deck in slices between Tk
+events, so typing never freezes the window, and each column's sort keys are
+computed once.
+"""
+
+import tkinter as tk
+
+from pinyin import PLAIN_TABLE
+from utils import bind_mousewheel, clear_frame
+from tracing import traced
+
+FIELDS = ["hanzi", "pinyin", "english", "spanish"]
+COLUMN_TITLES = {"hanzi": "Hanzi", "pinyin": "Pinyin", "english": "English", "spanish": "Spanish"}
+COLUMN_WEIGHTS = {"hanzi": 2, "pinyin": 3, "english": 4, "spanish": 4}
+ROW_HEIGHT = 34
+FILTER_DELAY_MS = 120     # Wait for a pause in typing before filtering
+FILTER_SLICE = 20000      # Words checked per Tk event while filtering
+ROW_COLORS = ('#1e293b', '#172033')
+
+def search_text(word, field):
+    """What a filter matches against: case-folded, and tone-free for pinyin"""
+    text = word.get(field) or ""
+    if field == "pinyin":
+        return text.lower().translate(PLAIN_TABLE).replace(" ", "")
+    return text.casefold()
+
+class VirtualList(tk.Frame):
+    """Rows of deck words, drawn with a fixed pool of recycled row widgets"""
+
+    def __init__(self, parent, vocabulary, **kwargs):
+        super().__init__(parent, bg='#0f172a', **kwargs)
+        self.vocabulary = vocabulary
+        self.view = range(len(vocabulary))   # Word indices in display order
+        self.top = 0                         # First visible position in view
+        self.rows = []                       # [(frame, labels, shown word index)]
+
+        self.body = tk.Frame(self, bg='#0f172a')
+        self.body.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar = tk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.body.bind("<Configure>", lambda event: self.resize(event.height))
+
+    def visible_rows(self):
+        """How many rows fit in the body"""
+        return max(1, self.body.winfo_height() // ROW_HEIGHT)
+
+    def resize(self, height):
+        """Grow the row pool to fill the body; spare rows are just hidden"""
+        needed = height // ROW_HEIGHT + 1
+        while len(self.rows) < needed:
+            row_frame = tk.Frame(self.body, height=ROW_HEIGHT)
+            labels = []
+            for column, field in enumerate(FIELDS):
+                row_frame.columnconfigure(column, weight=COLUMN_WEIGHTS[field], uniform="browser")
+                label = tk.Label(row_frame,
+                                anchor=tk.W,
+                                font=('Segoe UI', 16 if field == "hanzi" else 12),
+                                fg='#f8fafc' if field == "hanzi" else '#cbd5e1',
+                                padx=12)
+                label.grid(row=0, column=column, sticky="nsew")
+                labels.append(label)
+            row_frame.grid_propagate(False)
+            row_frame.rowconfigure(0, weight=1)
+            self.rows.append([row_frame, labels, None])
+        self.render()
+
+    def set_view(self, view):
+        """Show these word indices, from the top"""
+        self.view = view
+        self.top = 0
+        for row in self.rows:
+            row[2] = None     # Force a relabel: the same position may now hold another word
+        self.render()
+
+    def render(self):
+        """Relabel the pooled rows for the current scroll position"""
+        view = self.view
+        for offset, row in enumerate(self.rows):
+            row_frame, labels, shown = row
+            position = self.top + offset
+            if position >= len(view):
+                if shown is not None:
+                    row_frame.place_forget()
+                    row[2] = None
+                continue
+            index = view[position]
+            if shown is None:
+                row_frame.place(x=0, y=offset * ROW_HEIGHT, relwidth=1, height=ROW_HEIGHT)
+            if index != shown:
+                word = self.vocabulary[index]
+                color = ROW_COLORS[position % 2]
+                row_frame.configure(bg=color)
+                for label, field in zip(labels, FIELDS):
+                    label.configure(text=word.get(field, ""), bg=color)
+                row[2] = index
+            elif shown is not None:
+                # Same word, but its stripe follows its position
+                color = ROW_COLORS[position % 2]
+                if row_frame.cget("bg") != color:
+                    row_frame.configure(bg=color)
+                    for label in labels:
+                        label.configure(bg=color)
+        self.update_scrollbar()
+
+    def update_scrollbar(self):
+        total = max(1, len(self.view))
+        first = self.top / total
+        last = min(1.0, (self.top + self.visible_rows()) / total)
+        self.scrollbar.set(first, last)
+
+    def scroll_to(self, top):
+        """Move the first visible row, clamped to the view"""
+        top = max(0, min(int(top), len(self.view) - self.visible_rows()))
+        if top != self.top:
+            self.top = top
+            self.render()
+
+    def yview(self, *args):
+        """Scrollbar command: ("moveto", fraction) or ("scroll", n, "units"/"pages")"""
+        if args[0] == "moveto":
+            self.scroll_to(float(args[1]) * len(self.view))
+        elif args[0] == "scroll":
+            self.yview_scroll(int(args[1]), args[2])
+
+    def yview_scroll(self, number, what):
+        """Scroll by rows or pages (also used by the shared mouse wheel handler)"""
+        step = self.visible_rows() if what == "pages" else 3
+        self.scroll_to(self.top + number * step)
+
+class VocabularyBrowser:
+    """Sort and filter state behind the browser screen"""
+
+    def __init__(self, root, vocabulary, virtual_list, count_label):
+        self.root = root
+        self.vocabulary = vocabulary
+        self.list = virtual_list
+        self.count_label = count_label
+        self.sort_field = None
+        self.descending = False
+        self.sort_keys = {}      # Field -> key per word index, computed on first use
+        self.matches = None      # Word indices passing the filter (None: no filter)
+        self.filter_job = None
+        self.query = ("", "all")
+        self.update_count()
+
+    def update_count(self, scanning=False):
+        shown = len(self.list.view)
+        text = f"{shown:,} of {len(self.vocabulary):,} words"
+        self.count_label.configure(text=text + (" …" if scanning else ""))
+
+    def sort_by(self, field):
+        """Sort by a column; clicking the same column again reverses it"""
+        self.descending = not self.descending if field == self.sort_field else False
+        self.sort_field = field
+        self.apply()
+
+    def _sort_key(self, field):
+        if field not in self.sort_keys:
+            keys = [search_text(word, field) for word in self.vocabulary]
+            if field == "pinyin":
+                # Toneless first so "ma" forms sit together, then by tone
+                keys = [(key, word.get("pinyin", "")) for key, word in zip(keys, self.vocabulary)]
+            self.sort_keys[field] = keys
+        return self.sort_keys[field]
+
+    def apply(self):
+        """Show the current matches in the current order"""
+        indices = self.matches if self.matches is not None else range(len(self.vocabulary))
+        if self.sort_field:
+            keys = self._sort_key(self.sort_field)
+            indices = sorted(indices, key=keys.__getitem__, reverse=self.descending)
+        self.list.set_view(indices)
+        self.update_count()
+
+    def set_filter(self, text, field):
+        """Filter after a short pause in typing"""
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+        self.filter_job = self.root.after(FILTER_DELAY_MS, self._start_filter, text, field)
+
+    def cancel(self):
+        """Stop a pending or running filter (the screen is going away)"""
+        if self.filter_job is not None:
+            self.root.after_cancel(self.filter_job)
+            self.filter_job = None
+        self.query = None
+
+    def _start_filter(self, text, field):
+        self.filter_job = None
+        query = text.strip().casefold()
+        if not query:
+            self.matches = None
+            self.query = ("", field)
+            self.apply()
+            return
+        self.query = (query, field)
+        fields = FIELDS if field == "all" else [field]
+        plain_query = query.translate(PLAIN_TABLE).replace(" ", "")
+        queries = [plain_query if name == "pinyin" else query for name in fields]
+        self.matches = []
+        self._filter_slice(0, self.query, list(zip(fields, queries)))
+
+    @traced()
+    def _filter_slice(self, start, query, checks):
+        """Scan one slice of the deck, then yield to Tk before the next"""
+        if query != self.query:
+            return      # A newer filter replaced this one
+        vocabulary = self.vocabulary
+        end = min(start + FILTER_SLICE, len(vocabulary))
+        for index in range(start, end):
+            word = vocabulary[index]
+            if any(text in search_text(word, name) for name, text in checks):
+                self.matches.append(index)
+        if end < len(vocabulary):
+            if start == 0:
+                self.list.set_view(self.matches)     # Show the first hits straight away
+            self.update_count(scanning=True)
+            self.filter_job = self.root.after(1, self._filter_slice, end, query, checks)
+        else:
+            self.filter_job = None
+            self.apply()
+
+@traced()
+def create_browser_screen(main_frame, vocabulary, back_callback):
+    """Create the vocabulary browser: a sortable, filterable list of the whole deck"""
+    clear_frame(main_frame)
+
+    container = tk.Frame(main_frame, bg='#0f172a')
+    container.pack(fill=tk.BOTH, expand=True, padx=20, pady=10)
+
+    # Header with title, word count and back button
+    header_frame = tk.Frame(container, bg='#1e293b')
+    header_frame.pack(fill=tk.X, pady=(0, 10))
+
+    title_label = tk.Label(header_frame,
+                          text="📖 Vocabulary",
+                          font=('Segoe UI', 22, 'bold'),
+                          bg='#1e293b',
+                          fg='#f8fafc')
+    title_label.pack(side=tk.LEFT, padx=20, pady=12)
+
+    back_btn = tk.Button(header_frame,
+                        text="⬅️ Back",
+                        command=back_callback,
+                        font=('Segoe UI', 12, 'bold'),
+                        bg='#334155',
+                        fg='white',
+                        activebackground='#475569',
+                        activeforeground='white',
+                        relief=tk.FLAT,
+                        bd=0,
+                        padx=20,
+                        pady=8,
+                        cursor='hand2')
+    back_btn.pack(side=tk.RIGHT, padx=20)
+
+    count_label = tk.Label(header_frame,
+                          font=('Segoe UI', 12),
+                          bg='#1e293b',
+                          fg='#94a3b8')
+    count_label.pack(side=tk.RIGHT, padx=10)
+
+    # Filter bar: text plus the field it applies to
+    filter_frame = tk.Frame(container, bg='#0f172a')
+    filter_frame.pack(fill=tk.X, pady=(0, 10))
+
+    filter_label = tk.Label(filter_frame,
+                           text="🔎 Filter",
+                           font=('Segoe UI', 12),
+                           bg='#0f172a',
+                           fg='#cbd5e1')
+    filter_label.pack(side=tk.LEFT, padx=(0, 8))
+
+    filter_entry = tk.Entry(filter_frame,
+                           font=('Segoe UI', 14),
+                           bg='#334155',
+                           fg='#f8fafc',
+                           insertbackground='#f8fafc',
+                           relief=tk.FLAT)
+    filter_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, ipady=6)
+
+    field_var = tk.StringVar(value="all")
+    field_menu = tk.OptionMenu(filter_frame, field_var, "all", *FIELDS)
+    field_menu.configure(font=('Segoe UI', 11), bg='#334155', fg='#f8fafc', activebackground='#475569',
+                         activeforeground='white', relief=tk.FLAT, bd=0, highlightthickness=0)
+    field_menu.pack(side=tk.LEFT, padx=(8, 0))
+
+    # Column headers sort the list
+    header_row = tk.Frame(container, bg='#334155')
+    header_row.pack(fill=tk.X, padx=(0, 16))
+
+    virtual_list = VirtualList(container, vocabulary)
+    virtual_list.pack(fill=tk.BOTH, expand=True)
+    browser = VocabularyBrowser(main_frame.winfo_toplevel(), vocabulary, virtual_list, count_label)
+
+    header_buttons = {}
+
+    def on_sort(field):
+        browser.sort_by(field)
+        for name, button in header_buttons.items():
+            arrow = (" ▼" if browser.descending else " ▲") if name == browser.sort_field else ""
+            button.configure(text=COLUMN_TITLES[name] + arrow)
+
+    for column, field in enumerate(FIELDS):
+        header_row.columnconfigure(column, weight=COLUMN_WEIGHTS[field], uniform="browser")
+        header_btn = tk.Button(header_row,
+                              text=COLUMN_TITLES[field],
+                              command=lambda field=field: on_sort(field),
+                              anchor=tk.W,
+                              font=('Segoe UI', 12, 'bold'),
+                              bg='#334155',
+                              fg='#f8fafc',
+                              activebackground='#475569',
+                              activeforeground='white',
+                              relief=tk.FLAT,
+                              bd=0,
+                              padx=12,
+                              pady=8,
+                              cursor='hand2')
+        header_btn.grid(row=0, column=column, sticky="ew")
+        header_buttons[field] = header_btn
+
+    filter_entry.bind('<KeyRelease>', lambda event: browser.set_filter(filter_entry.get(), field_var.get()))
+    field_var.trace_add("write", lambda *args: browser.set_filter(filter_entry.get(), field_var.get()))
+    filter_entry.focus_set()
+    # A filter still scanning would otherwise touch the destroyed list
+    container.bind('<Destroy>', lambda event: browser.cancel())
+
+    bind_mousewheel(virtual_list)
+    return browser
@@ -0,0 +1,264 @@
+"""
+bundle.py - Compressed deck bundles for Chinese Learning App
+A bundle holds a deck as independently compressed chunks of entries (zlib
+or lzma) plus an index, so opening one only inflates the index and a
+session only inflates the chunks its words live in. The index keeps the
+hanzi and pinyin of every word, which is all the start-up indexes
+(word lookup, segmenter, pinyin input) need; glosses, sentences, tags and
+any other fields stay compressed until a word is shown.
+
+Bundle layout: header (magic, index offset, index length), compressed
+chunks (each a JSON list of entries), then the compressed JSON index
+{"codec", "count", "chunks": [[offset, length, first entry], ...],
+"hanzi": [...], "pinyin": [...]}.
+
+Usage:
+    python bundle.py pack data/sample_vocabulary.py deck.bundle --codec lzma
+    python bundle.py info deck.bundle
+    python bundle.py unpack deck.bundle deck.json
+"""
+
+import argparse
+import bisect
+import json
+import lzma
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from collections.abc import Mapping, Sequence
+
+BUNDLE_MAGIC = b"CLDECK01"
+HEADER = struct.Struct("<8sQQ")
+BUNDLE_EXTENSION = ".bundle"
+DEFAULT_CHUNK_SIZE = 256      # Entries per chunk: small enough that a card inflates little
+DEFAULT_CACHE_CHUNKS = 32
+CODECS = {
+    "zlib": (zlib.compress, zlib.decompress),      # Level 9 is ~10x slower on the index for <1% smaller
+    "lzma": (lambda data: lzma.compress(data, preset=6), lzma.decompress),
+}
+
+def _encode(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+def compress_chunk(entries, codec):
+    """One chunk as stored in a bundle: (compressed JSON list, hanzi column, pinyin column)"""
+    return (CODECS[codec][0](_encode(entries)), [word["hanzi"] for word in entries],
+            [word.get("pinyin", "") for word in entries])
+
+def write_bundle(vocabulary, path, codec="zlib", chunk_size=DEFAULT_CHUNK_SIZE):
+    """Write a deck (any iterable of entries) as a bundle; returns (entries, chunks)"""
+    if codec not in CODECS:
+        raise ValueError(f"unknown codec {codec!r} (choose from {', '.join(CODECS)})")
+
+    def chunks():
+        pending = []
+        for word in vocabulary:
+            pending.append(word)
+            if len(pending) == chunk_size:
+                yield compress_chunk(pending, codec)
+                pending = []
+        if pending:
+            yield compress_chunk(pending, codec)
+
+    return write_bundle_chunks(chunks(), path, codec)
+
+def write_bundle_chunks(chunks, path, codec):
+    """Write a bundle from already compressed chunks (see compress_chunk); returns (entries, chunks)"""
+    locations, hanzi, pinyin = [], [], []
+    temp_path = path + ".tmp"
+    try:
+        with open(temp_path, "wb") as bundle_file:
+            bundle_file.write(HEADER.pack(BUNDLE_MAGIC, 0, 0))
+            for data, chunk_hanzi, chunk_pinyin in chunks:
+                locations.append([bundle_file.tell(), len(data), len(hanzi)])
+                bundle_file.write(data)
+                hanzi.extend(chunk_hanzi)
+                pinyin.extend(chunk_pinyin)
+            index = CODECS[codec][0](_encode({"codec": codec, "count": len(hanzi), "chunks": locations,
+                                               "hanzi": hanzi, "pinyin": pinyin}))
+            index_offset = bundle_file.tell()
+            bundle_file.write(index)
+            bundle_file.seek(0)
+            bundle_file.write(HEADER.pack(BUNDLE_MAGIC, index_offset, len(index)))
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+    return len(hanzi), len(locations)
+
+class DeckBundle(Sequence):
+    """Memory-mapped bundle that reads like a list of entries, inflating chunks on demand"""
+
+    def __init__(self, path, cache_chunks=DEFAULT_CACHE_CHUNKS):
+        self.path = path
+        self.file = open(path, "rb")
+        self.data = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, index_offset, index_length = HEADER.unpack_from(self.data, 0)
+        if magic != BUNDLE_MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a deck bundle")
+        codec = self._codec_of(self.data[index_offset:index_offset + index_length])
+        self.decompress = CODECS[codec][1]
+        index = json.loads(self.decompress(self.data[index_offset:index_offset + index_length]))
+        self.codec = index["codec"]
+        self.count = index["count"]
+        self.chunks = index["chunks"]
+        self.firsts = [first for _, _, first in self.chunks]
+        self.hanzi = index["hanzi"]
+        self.pinyin = index["pinyin"]
+        self.positions = None     # hanzi -> position, built on first lookup
+        self.cache = OrderedDict()
+        self.cache_chunks = cache_chunks
+        self.inflated = 0         # Chunks decompressed so far
+        self.lock = threading.Lock()    # Shared by the loader, prefetch and Tk threads
+
+    @staticmethod
+    def _codec_of(data):
+        """Tell zlib and xz streams apart by their first bytes"""
+        return "lzma" if data[:6] == b"\xfd7zXZ\x00" else "zlib"
+
+    def close(self):
+        """Release the memory map"""
+        self.data.close()
+        self.file.close()
+
+    def __len__(self):
+        return self.count
+
+    def _inflate(self, number):
+        offset, length, _ = self.chunks[number]
+        self.inflated += 1
+        return json.loads(self.decompress(self.data[offset:offset + length]))
+
+    def chunk(self, number):
+        """Entries of one chunk, through the LRU cache"""
+        with self.lock:
+            entries = self.cache.get(number)
+            if entries is not None:
+                self.cache.move_to_end(number)
+                return entries
+            entries = self._inflate(number)
+            self.cache[number] = entries
+            if len(self.cache) > self.cache_chunks:
+                self.cache.popitem(last=False)
+        return entries
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(self.count))]
+        if position < 0:
+            position += self.count
+        if not 0 <= position < self.count:
+            raise IndexError("bundle index out of range")
+        number = bisect.bisect_right(self.firsts, position) - 1
+        return self.chunk(number)[position - self.firsts[number]]
+
+    def __iter__(self):
+        """Stream every entry, a chunk at a time, without filling the cache"""
+        for number in range(len(self.chunks)):
+            with self.lock:
+                entries = self.cache.get(number)
+                if entries is None:
+                    entries = self._inflate(number)
+            yield from entries
+
+    def position(self, hanzi):
+        """Position of a word in the deck, or None (the last entry wins, as in the word index)"""
+        if self.positions is None:
+            self.positions = {word: position for position, word in enumerate(self.hanzi)}
+        return self.positions.get(hanzi)
+
+    def get(self, hanzi, default=None):
+        """Entry for a hanzi, inflating only its chunk"""
+        position = self.position(hanzi)
+        return self[position] if position is not None else default
+
+    def stubs(self):
+        """{"hanzi", "pinyin"} per entry, from the index alone: enough to build the segmenter and IME"""
+        return [{"hanzi": hanzi, "pinyin": pinyin} for hanzi, pinyin in zip(self.hanzi, self.pinyin)]
+
+    def word_index(self):
+        """hanzi -> entry mapping that inflates entries only when they are looked up"""
+        return BundleWordIndex(self)
+
+class BundleWordIndex(Mapping):
+    """The app's word index for a bundle deck"""
+
+    def __init__(self, bundle):
+        self.bundle = bundle
+        bundle.position("")       # Build the hanzi -> position table up front, on the loader thread
+
+    def __getitem__(self, hanzi):
+        position = self.bundle.position(hanzi)
+        if position is None:
+            raise KeyError(hanzi)
+        return self.bundle[position]
+
+    def __contains__(self, hanzi):
+        return self.bundle.position(hanzi) is not None
+
+    def __iter__(self):
+        return iter(self.bundle.positions)
+
+    def __len__(self):
+        return len(self.bundle.positions)
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Pack decks into compressed, chunked bundles")
+    commands = parser.add_subparsers(dest="command", required=True)
+    pack_parser = commands.add_parser("pack", help="write a deck as a bundle")
+    pack_parser.add_argument("deck", nargs="?", help="vocabulary module or JSON deck (default: the app's deck)")
+    pack_parser.add_argument("bundle", help="bundle to write")
+    pack_parser.add_argument("--codec", choices=sorted(CODECS), default="zlib")
+    pack_parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="entries per chunk")
+    info_parser = commands.add_parser("info", help="show a bundle's size and timing of typical reads")
+    info_parser.add_argument("bundle")
+    unpack_parser = commands.add_parser("unpack", help="write a bundle back out as a JSON deck")
+    unpack_parser.add_argument("bundle")
+    unpack_parser.add_argument("output")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        if args.command == "pack":
+            from vocabulary import load_vocabulary
+
+            if args.chunk_size < 1:
+                parser.error("--chunk-size must be positive")
+            entries, chunks = write_bundle(load_vocabulary(args.deck), args.bundle, args.codec, args.chunk_size)
+            print(f"📦 {entries:,} words in {chunks:,} {args.codec} chunks, "
+                  f"{os.path.getsize(args.bundle):,} bytes in {time.perf_counter() - start:.1f}s → {args.bundle}")
+        elif args.command == "info":
+            import random
+
+            bundle = DeckBundle(args.bundle)
+            opened = time.perf_counter() - start
+            sample = random.sample(range(len(bundle)), min(15, len(bundle)))
+            start = time.perf_counter()
+            for position in sample:
+                bundle[position]
+            session = time.perf_counter() - start
+            print(f"📦 {len(bundle):,} words in {len(bundle.chunks):,} {bundle.codec} chunks, "
+                  f"{os.path.getsize(args.bundle):,} bytes")
+            print(f"⏱️ open {opened * 1000:.1f} ms; {len(sample)} random words {session * 1000:.1f} ms "
+                  f"({bundle.inflated} chunks inflated)")
+        else:
+            bundle = DeckBundle(args.bundle)
+            temp_path = args.output + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as deck_file:
+                deck_file.write("[")
+                for position, word in enumerate(bundle):
+                    deck_file.write(("\n" if not position else ",\n") + json.dumps(word, ensure_ascii=False))
+                deck_file.write("\n]\n")
+            os.replace(temp_path, args.output)
+            print(f"📤 {len(bundle):,} words in {time.perf_counter() - start:.1f}s → {args.output}")
+    except (OSError, ValueError, KeyError, zlib.error, lzma.LZMAError) as error:
+        parser.error(str(error))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+"""
+cloze.py - Cloze-deletion sentences for Chinese Learning App
+An offline pipeline streams a Tatoeba-style sentence corpus in chunks,
+segments and scores every sentence against the deck across a process pool,
+and keeps the best few sentences per word in a compact gzip cache for the
+deck. The "Cloze → Hanzi" mode only reads that cache when a session starts
+and blanks the target word out of one of its sentences.
+
+Usage:
+    python cloze.py corpus.tsv --workers 8       # build the cache for the sample deck
+"""
+
+import argparse
+import gzip
+import heapq
+import json
+import os
+import random
+import time
+
+from segmenter import HANZI_RUN, Segmenter
+from sentences import deck_digest, parse_line
+from storage import get_data_dir
+from vocabulary import deck_hanzi
+
+CLOZE_MODE = "cloze-hanzi"
+BLANK = "＿"
+CHUNK_LINES = 5000
+TOP_PER_WORD = 5
+IDEAL_LENGTH = 12
+MIN_CONTEXT = 3          # Characters of context the sentence must have besides the target
+MAX_LENGTH = 30
+
+_segmenter = None        # Per worker process, built once by _init_worker
+
+def _init_worker(words):
+    """Process pool initializer: build the deck segmenter once per worker"""
+    global _segmenter
+    _segmenter = Segmenter(words)
+
+def score_sentence(tokens, target, deck_words):
+    """How good a cloze item the sentence makes for target (None if unusable)"""
+    length = sum(len(token) for token in tokens)
+    if tokens.count(target) != 1 or length - len(target) < MIN_CONTEXT or length > MAX_LENGTH:
+        return None
+    # Sentences mostly made of deck words are ones the learner can read around the blank
+    others = [token for token in tokens if token != target and HANZI_RUN.match(token)]
+    coverage = sum(1 for token in others if token in deck_words) / len(others) if others else 0.0
+    length_penalty = abs(length - IDEAL_LENGTH) / IDEAL_LENGTH
+    return coverage - 0.5 * length_penalty
+
+def token_offset(sentence, tokens, target):
+    """Character offset of the target token in the sentence (tokens are in order, spaces dropped)"""
+    position = 0
+    for token in tokens:
+        position = sentence.index(token, position)
+        if token == target:
+            return position
+        position += len(token)
+    return None
+
+def score_chunk(lines):
+    """Worker: best sentences per deck word within one chunk of corpus lines"""
+    deck_words = _segmenter.deck_words
+    best = {}
+    for line in lines:
+        parsed = parse_line(line)
+        if parsed is None:
+            continue
+        sentence, translation = parsed
+        tokens = _segmenter.segment(sentence)
+        for target in set(tokens) & deck_words:
+            score = score_sentence(tokens, target, deck_words)
+            if score is None:
+                continue
+            candidates = best.setdefault(target, [])
+            # The offset pins the blank to the scored token, not an earlier substring match
+            item = (score, sentence, translation, token_offset(sentence, tokens, target))
+            if len(candidates) < TOP_PER_WORD:
+                heapq.heappush(candidates, item)
+            elif item > candidates[0]:
+                heapq.heapreplace(candidates, item)
+    return best
+
+def read_chunks(corpus_path, chunk_lines=CHUNK_LINES):
+    """Stream the corpus as lists of lines"""
+    with open(corpus_path, encoding="utf-8", errors="replace") as corpus_file:
+        chunk = []
+        for line in corpus_file:
+            chunk.append(line)
+            if len(chunk) >= chunk_lines:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+def get_cache_path(words):
+    """Cloze cache file for a deck"""
+    return os.path.join(get_data_dir("cloze"), f"{deck_digest(words)}.json.gz")
+
+def build_cloze_cache(corpus_path, vocabulary, workers=None, output_path=None):
+    """Score the whole corpus across a process pool and write the deck's cloze cache"""
+    from concurrent.futures import ProcessPoolExecutor  # Offline only: the app just reads the cache
+
+    words = set(deck_hanzi(vocabulary))
+    output_path = output_path or get_cache_path(words)
+    workers = workers or os.cpu_count() or 1
+    best = {}
+    chunks = 0
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(words,)) as pool:
+        # Keep a bounded number of chunks in flight so the corpus is never all in memory
+        in_flight = []
+        limit = 2 * workers
+        for chunk in read_chunks(corpus_path):
+            in_flight.append(pool.submit(score_chunk, chunk))
+            if len(in_flight) >= limit:
+                _merge(best, in_flight.pop(0).result())
+                chunks += 1
+        for future in in_flight:
+            _merge(best, future.result())
+            chunks += 1
+
+    items = {word: [[sentence, translation, offset]
+                    for _, sentence, translation, offset in sorted(candidates, reverse=True)]
+             for word, candidates in best.items()}
+    temp_path = output_path + ".tmp"
+    with gzip.open(temp_path, "wt", encoding="utf-8") as cache_file:
+        json.dump({"deck": deck_digest(words), "items": items}, cache_file,
+                  ensure_ascii=False, separators=(",", ":"))
+    os.replace(temp_path, output_path)
+    return output_path, len(items), chunks
+
+def _merge(best, chunk_best):
+    """Fold one chunk's candidates into the running top sentences per word"""
+    for word, candidates in chunk_best.items():
+        merged = best.setdefault(word, [])
+        for item in candidates:
+            if len(merged) < TOP_PER_WORD:
+                heapq.heappush(merged, item)
+            elif item > merged[0]:
+                heapq.heapreplace(merged, item)
+
+def load_cloze_items(vocabulary):
+    """word -> [[sentence, translation, offset of the word], ...] from the deck's cache ({} if not built)"""
+    path = get_cache_path(set(deck_hanzi(vocabulary)))
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as cache_file:
+            return json.load(cache_file)["items"]
+    except (OSError, ValueError, KeyError):
+        return {}
+
+def make_cloze(sentence, hanzi, offset=None):
+    """The sentence with the target word at offset blanked out"""
+    if offset is None or sentence[offset:offset + len(hanzi)] != hanzi:
+        offset = sentence.find(hanzi)     # Caches written before offsets were stored
+    return sentence[:offset] + BLANK * len(hanzi) + sentence[offset + len(hanzi):]
+
+def select_cloze_words(vocabulary, cloze_items, num_words, word_index=None):
+    """Pick words that have cloze sentences, each with one sentence attached
+
+    Candidates are chosen by hanzi; full entries are looked up (for a bundle,
+    inflated) only for the words picked.
+    """
+    candidates = [hanzi for hanzi in dict.fromkeys(deck_hanzi(vocabulary)) if hanzi in cloze_items]
+    selected = random.sample(candidates, min(num_words, len(candidates)))
+    if word_index is None:
+        word_index = (vocabulary.word_index() if hasattr(vocabulary, "word_index")
+                      else {word["hanzi"]: word for word in vocabulary})
+    cloze_words = []
+    for word in map(word_index.__getitem__, selected):
+        sentence, translation, *offset = random.choice(cloze_items[word["hanzi"]])
+        cloze = make_cloze(sentence, word["hanzi"], *offset)
+        cloze_words.append(dict(word, cloze=f"{cloze}\n{translation}" if translation else cloze))
+    return cloze_words
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Build the cloze sentence cache for a deck")
+    parser.add_argument("corpus", help="Tatoeba-style TSV file")
+    parser.add_argument("--deck", help="vocabulary module (default: the app's deck)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--output", help="cache file (default: the deck's cache in the data directory)")
+    args = parser.parse_args()
+
+    from vocabulary import load_vocabulary
+
+    vocabulary = load_vocabulary(args.deck)
+    start = time.perf_counter()
+    path, count, chunks = build_cloze_cache(args.corpus, vocabulary, args.workers, args.output)
+    print(f"🧩 Cloze sentences for {count:,}/{len(vocabulary):,} words from {chunks} chunks "
+          f"in {time.perf_counter() - start:.1f}s → {path}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+confusion.py - Learned confusion matrix for Chinese Learning App
+Every wrong pair in the matching game is a word the learner mixed up with
+another. Those mismatches are counted in a sparse, symmetric word x word
+matrix per learner and used to build "confusables" drills.
+"""
+
+import heapq
+import os
+import random
+from operator import itemgetter
+
+import numpy as np
+
+from storage import get_data_dir, get_learner_id
+from tracing import traced
+
+class ConfusionMatrix:
+    """Sparse symmetric mismatch counts between words, keyed by hanzi"""
+
+    def __init__(self, learner_id=None):
+        self.learner_id = learner_id or get_learner_id()
+        self.words = []    # matrix index -> hanzi
+        self.index = {}    # hanzi -> matrix index
+        self.counts = {}   # (low index, high index) -> mismatch count
+        self.dirty = False
+
+    def _word_index(self, hanzi):
+        """Index of a word, adding a new row/column if needed"""
+        position = self.index.get(hanzi)
+        if position is None:
+            position = len(self.words)
+            self.index[hanzi] = position
+            self.words.append(hanzi)
+        return position
+
+    def record(self, word_a, word_b):
+        """Count one mismatch between two vocabulary entries"""
+        if word_a["hanzi"] == word_b["hanzi"]:
+            return
+        i = self._word_index(word_a["hanzi"])
+        j = self._word_index(word_b["hanzi"])
+        key = (i, j) if i < j else (j, i)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.dirty = True
+
+    def count(self, word_a, word_b):
+        """How often two words have been confused"""
+        i = self.index.get(word_a["hanzi"])
+        j = self.index.get(word_b["hanzi"])
+        if i is None or j is None:
+            return 0
+        return self.counts.get((i, j) if i < j else (j, i), 0)
+
+    def top_pairs(self, k):
+        """The k most confused (hanzi, hanzi, count) pairs"""
+        best = heapq.nlargest(k, self.counts.items(), key=itemgetter(1))
+        return [(self.words[i], self.words[j], count) for (i, j), count in best]
+
+    def get_path(self):
+        """Path of this learner's stored matrix"""
+        return os.path.join(get_data_dir("confusion"), f"{self.learner_id}.npz")
+
+    def save(self):
+        """Store the non-zero entries as compact coordinate arrays"""
+        if not self.dirty:
+            return
+        keys = np.array(list(self.counts.keys()), dtype=np.int32).reshape(-1, 2)
+        path = self.get_path()
+        temp_path = path + ".tmp.npz"
+        np.savez_compressed(temp_path,
+                            words=np.array(self.words, dtype=str),
+                            rows=keys[:, 0],
+                            cols=keys[:, 1],
+                            counts=np.array(list(self.counts.values()), dtype=np.int32))
+        os.replace(temp_path, path)
+        self.dirty = False
+
+    @classmethod
+    def load(cls, learner_id=None):
+        """Load a learner's matrix, or start an empty one"""
+        matrix = cls(learner_id)
+        try:
+            with np.load(matrix.get_path()) as stored:
+                matrix.words = stored["words"].tolist()
+                matrix.counts = dict(zip(zip(stored["rows"].tolist(), stored["cols"].tolist()),
+                                         stored["counts"].tolist()))
+        except (OSError, ValueError, KeyError):
+            return matrix
+        matrix.index = {hanzi: i for i, hanzi in enumerate(matrix.words)}
+        return matrix
+
+def select_confusable_words(vocabulary, confusion, num_words, word_index=None):
+    """Pick words so the learner's most confused pairs share one board"""
+    by_hanzi = word_index if word_index is not None else {word["hanzi"]: word for word in vocabulary}
+    selected = []
+    seen = set()
+
+    for hanzi_a, hanzi_b, _ in confusion.top_pairs(num_words):
+        pair = [by_hanzi[hanzi] for hanzi in (hanzi_a, hanzi_b)
+                if hanzi in by_hanzi and hanzi not in seen]
+        # Only take a pair if both halves still fit on the board
+        if len(pair) > num_words - len(selected):
+            continue
+        for word in pair:
+            seen.add(word["hanzi"])
+            selected.append(word)
+        if len(selected) >= num_words:
+            break
+
+    # Fill the rest of the board with random words
+    remaining = [word for word in vocabulary if word["hanzi"] not in seen]
+    fill = min(num_words - len(selected), len(remaining))
+    selected.extend(random.sample(remaining, fill))
+    random.shuffle(selected)
+    return selected
+
+@traced()
+def prepare_confusable_words(vocabulary, mode_var, words_var, confusion, word_index=None):
+    """Prepare a confusables session based on user preferences"""
+    current_mode = mode_var.get()
+    selected_words = select_confusable_words(vocabulary, confusion, words_var.get(), word_index)
+    return current_mode, selected_words
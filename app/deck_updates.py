@@ -0,0 +1,263 @@
+"""
+deck_updates.py - Content-addressed deck distribution for Chinese Learning App
+A published deck is a manifest plus chunks named by the SHA-256 of their
+bytes. Chunk boundaries are chosen from the entries' hanzi rather than by
+position, so fixing a gloss changes one chunk and inserting or deleting
+words only changes the chunks they fall in; everything else keeps its name.
+A client holding version N downloads the manifest of N+1, fetches only the
+chunks it does not have and assembles a deck bundle (see bundle.py) from
+the stored chunks without recompressing anything.
+
+Server layout: manifest.json.gz {"version", "codec", "count",
+"chunks": [[digest, entries], ...]} and chunks/<digest>. Any static HTTP
+server can host it; `serve` runs a local stand-in.
+
+Usage:
+    python deck_updates.py publish data/sample_vocabulary.py site/
+    python deck_updates.py serve site/ --port 8765
+    python deck_updates.py update http://localhost:8765/ --bundle deck.bundle
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+from bundle import CODECS, compress_chunk, write_bundle_chunks
+from storage import get_data_dir
+
+MANIFEST_NAME = "manifest.json.gz"
+CHUNK_DIR = "chunks"
+MIN_CHUNK = 64            # Entries per chunk: bounds around the ~256 average
+MAX_CHUNK = 1024
+BOUNDARY_MODULUS = 192    # A chunk may end after any word whose hanzi hash is 0 modulo this
+FETCH_WORKERS = 4
+FETCH_TIMEOUT = 30
+DEFAULT_PORT = 8765
+
+def is_boundary(hanzi):
+    """Whether a chunk may end after this word (depends on the word alone)"""
+    return zlib.crc32(hanzi.encode("utf-8")) % BOUNDARY_MODULUS == 0
+
+def split_chunks(vocabulary):
+    """Group entries into chunks whose ends are set by their content"""
+    pending = []
+    for word in vocabulary:
+        pending.append(word)
+        if len(pending) >= MAX_CHUNK or (len(pending) >= MIN_CHUNK and is_boundary(word["hanzi"])):
+            yield pending
+            pending = []
+    if pending:
+        yield pending
+
+def chunk_digest(data):
+    """Name of a chunk: the SHA-256 of its stored bytes"""
+    return hashlib.sha256(data).hexdigest()
+
+def _write_atomic(path, data):
+    """Write a file so readers see the old or the new contents, never half of one"""
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as output_file:
+        output_file.write(data)
+    os.replace(temp_path, path)
+
+def _columns_path(store, digest):
+    """Where a stored chunk's hanzi and pinyin columns are kept"""
+    return os.path.join(store, CHUNK_DIR, digest + ".columns")
+
+def read_manifest(path):
+    """Manifest dict from a file, or None if there is none"""
+    try:
+        with gzip.open(path, "rt", encoding="utf-8") as manifest_file:
+            return json.load(manifest_file)
+    except FileNotFoundError:
+        return None
+
+def publish(vocabulary, site, codec="zlib"):
+    """Write a new version of a deck into a site directory; returns (manifest, new chunks)
+
+    Chunks already on the site are kept, so unchanged content is not
+    rewritten, and the manifest is replaced last so clients never see one
+    naming chunks that are not there yet.
+    """
+    chunk_dir = os.path.join(site, CHUNK_DIR)
+    os.makedirs(chunk_dir, exist_ok=True)
+    previous = read_manifest(os.path.join(site, MANIFEST_NAME))
+    chunks = []
+    written = 0
+    count = 0
+    for entries in split_chunks(vocabulary):
+        data, _, _ = compress_chunk(entries, codec)
+        digest = chunk_digest(data)
+        path = os.path.join(chunk_dir, digest)
+        if not os.path.exists(path):
+            _write_atomic(path, data)
+            written += 1
+        chunks.append([digest, len(entries)])
+        count += len(entries)
+    manifest = {"version": (previous["version"] + 1) if previous else 1, "codec": codec,
+                "count": count, "chunks": chunks}
+    _write_atomic(os.path.join(site, MANIFEST_NAME),
+                  gzip.compress(json.dumps(manifest, separators=(",", ":")).encode("utf-8"), mtime=0))
+    return manifest, written
+
+def prune_site(site, manifest):
+    """Delete chunks the manifest no longer uses; returns how many (clients on old versions will need a full update)"""
+    keep = {digest for digest, _ in manifest["chunks"]}
+    chunk_dir = os.path.join(site, CHUNK_DIR)
+    removed = 0
+    for name in os.listdir(chunk_dir):
+        if name not in keep:
+            os.remove(os.path.join(chunk_dir, name))
+            removed += 1
+    return removed
+
+class DeckUpdater:
+    """Client side: a local chunk store kept in step with a published deck"""
+
+    def __init__(self, base_url, store=None):
+        self.base_url = base_url.rstrip("/") + "/"
+        self.store = store or get_data_dir("decks", "store")
+        os.makedirs(os.path.join(self.store, CHUNK_DIR), exist_ok=True)
+        self.bytes_fetched = 0
+        self.lock = threading.Lock()    # Chunks are fetched on a small thread pool
+
+    def fetch(self, name):
+        """Bytes of a file on the server"""
+        with urllib.request.urlopen(self.base_url + name, timeout=FETCH_TIMEOUT) as response:
+            data = response.read()
+        with self.lock:
+            self.bytes_fetched += len(data)
+        return data
+
+    def local_manifest(self):
+        """Manifest of the version in the store, or None before the first update"""
+        return read_manifest(os.path.join(self.store, MANIFEST_NAME))
+
+    def has_chunk(self, digest):
+        """Whether a chunk is fully stored"""
+        return os.path.exists(_columns_path(self.store, digest))
+
+    def fetch_chunk(self, digest, codec):
+        """Download, verify and store one chunk with its hanzi/pinyin columns"""
+        data = self.fetch(f"{CHUNK_DIR}/{digest}")
+        if chunk_digest(data) != digest:
+            raise ValueError(f"chunk {digest[:12]} is corrupt (hash mismatch)")
+        entries = json.loads(CODECS[codec][1](data))
+        columns = [[word["hanzi"] for word in entries], [word.get("pinyin", "") for word in entries]]
+        _write_atomic(os.path.join(self.store, CHUNK_DIR, digest), data)
+        # Written last: a chunk counts as stored only once its columns are there
+        _write_atomic(_columns_path(self.store, digest), json.dumps(columns, ensure_ascii=False).encode("utf-8"))
+        return len(data)
+
+    def update(self, bundle_path):
+        """Bring the store and the bundle at bundle_path up to the server's version
+
+        Returns a summary: versions, chunks fetched and reused, bytes
+        transferred (manifest included) and seconds spent.
+        """
+        start = time.perf_counter()
+        self.bytes_fetched = 0
+        manifest_data = self.fetch(MANIFEST_NAME)
+        manifest = json.loads(gzip.decompress(manifest_data))
+        current = self.local_manifest()
+        codec = manifest["codec"]
+        digests = list(dict.fromkeys(digest for digest, _ in manifest["chunks"]))
+        missing = [digest for digest in digests if not self.has_chunk(digest)]
+        with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+            list(pool.map(partial(self.fetch_chunk, codec=codec), missing))
+        fetched_at = time.perf_counter()
+
+        if current != manifest or not os.path.exists(bundle_path):
+            write_bundle_chunks((self._stored_chunk(digest) for digest, _ in manifest["chunks"]),
+                                bundle_path, codec)
+            _write_atomic(os.path.join(self.store, MANIFEST_NAME), manifest_data)
+        removed = self.prune(digests)
+        return {"from_version": current["version"] if current else None, "version": manifest["version"],
+                "words": manifest["count"], "chunks": len(digests), "fetched": len(missing),
+                "removed": removed, "bytes": self.bytes_fetched, "fetch_seconds": fetched_at - start,
+                "apply_seconds": time.perf_counter() - fetched_at}
+
+    def _stored_chunk(self, digest):
+        """(compressed bytes, hanzi, pinyin) of a stored chunk, as write_bundle_chunks takes them"""
+        with open(os.path.join(self.store, CHUNK_DIR, digest), "rb") as chunk_file:
+            data = chunk_file.read()
+        with open(_columns_path(self.store, digest), encoding="utf-8") as columns_file:
+            hanzi, pinyin = json.load(columns_file)
+        return data, hanzi, pinyin
+
+    def prune(self, keep):
+        """Delete stored chunks the current version does not use"""
+        keep = set(keep)
+        chunk_dir = os.path.join(self.store, CHUNK_DIR)
+        removed = 0
+        for name in os.listdir(chunk_dir):
+            if name.split(".")[0] not in keep:
+                os.remove(os.path.join(chunk_dir, name))
+                removed += name.endswith(".columns")
+        return removed
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    """Static file handler without a log line per request"""
+
+    def log_message(self, format, *args):
+        pass
+
+def make_server(site, port=DEFAULT_PORT, host="127.0.0.1"):
+    """Local stand-in for the deck server, serving a site directory (port 0 picks a free port)"""
+    return ThreadingHTTPServer((host, port), partial(QuietHandler, directory=site))
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Publish decks as content-addressed chunks and fetch only what changed")
+    commands = parser.add_subparsers(dest="command", required=True)
+    publish_parser = commands.add_parser("publish", help="write a new deck version into a site directory")
+    publish_parser.add_argument("deck", help="vocabulary module, JSON deck or bundle")
+    publish_parser.add_argument("site", help="directory served to clients")
+    publish_parser.add_argument("--codec", choices=sorted(CODECS), default="zlib")
+    publish_parser.add_argument("--prune", action="store_true", help="delete chunks no longer used")
+    serve_parser = commands.add_parser("serve", help="serve a site directory over HTTP")
+    serve_parser.add_argument("site")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    update_parser = commands.add_parser("update", help="fetch the latest deck version from a server")
+    update_parser.add_argument("url")
+    update_parser.add_argument("--bundle", help="deck bundle to write (default: deck.bundle in the data directory)")
+    update_parser.add_argument("--store", help="local chunk store (default: in the data directory)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    try:
+        if args.command == "publish":
+            from vocabulary import load_vocabulary
+
+            manifest, written = publish(load_vocabulary(args.deck), args.site, args.codec)
+            removed = prune_site(args.site, manifest) if args.prune else 0
+            print(f"📦 Version {manifest['version']}: {manifest['count']:,} words in {len(manifest['chunks']):,} chunks, "
+                  f"{written:,} new, {removed:,} pruned in {time.perf_counter() - start:.1f}s → {args.site}")
+        elif args.command == "serve":
+            server = make_server(args.site, args.port)
+            print(f"🌐 Serving {args.site} at http://127.0.0.1:{server.server_address[1]}/ (Ctrl+C to stop)")
+            try:
+                server.serve_forever()
+            except KeyboardInterrupt:
+                server.server_close()
+        else:
+            bundle_path = args.bundle or os.path.join(get_data_dir("decks"), "deck.bundle")
+            summary = DeckUpdater(args.url, args.store).update(bundle_path)
+            print(f"⬇️ Version {summary['from_version']} → {summary['version']}: {summary['fetched']:,} of "
+                  f"{summary['chunks']:,} chunks fetched, {summary['bytes']:,} bytes, "
+                  f"applied in {summary['apply_seconds'] * 1000:.0f} ms → {bundle_path}")
+    except (OSError, ValueError, KeyError, urllib.error.URLError) as error:
+        parser.error(str(error))
+
+if __name__ == "__main__":
+    main()
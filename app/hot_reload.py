@@ -0,0 +1,243 @@
+"""
+hot_reload.py - Vocabulary file hot reload for Chinese Learning App
+Watches the deck file while the app runs. When it changes (and has stopped
+changing), the file is reread on a worker thread and compared with the deck
+in memory, keyed by hanzi - the ID the word index, review log and confusion
+matrix already use - giving the words added, removed and modified. The app
+applies that diff to its indexes on the Tk thread.
+
+Decks written one entry per line (sample_vocabulary.py, JSON decks from
+anki.py) are reparsed line by line, and lines seen on the previous read are
+not parsed again; any other layout is simply reloaded whole.
+
+Usage:
+    python hot_reload.py data/sample_vocabulary.py
+"""
+
+import argparse
+import ast
+import json
+import os
+import queue
+import re
+import threading
+import time
+
+WATCH_INTERVAL = 0.5      # Seconds between checks of the deck file
+LIST_START = re.compile(r"^(vocabulary_data\s*=\s*)?\[$")
+# What a half-saved or broken deck file can raise while being read
+READ_ERRORS = (OSError, ValueError, SyntaxError, TypeError, NameError, AttributeError)
+
+def default_deck_path():
+    """The vocabulary module load_vocabulary() reads by default, if there is one"""
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "sample_vocabulary.py")
+    return path if os.path.exists(path) else None
+
+def file_stat(path):
+    """(mtime, size) of a file, or None while it is missing (editors may replace files)"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+class DeckDiff:
+    """Words added, removed (by hanzi) and modified between two versions of a deck"""
+
+    __slots__ = ("added", "removed", "modified")
+
+    def __init__(self, added, removed, modified):
+        self.added = added
+        self.removed = removed
+        self.modified = modified
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.modified)
+
+    def __repr__(self):
+        return f"+{len(self.added)} -{len(self.removed)} ~{len(self.modified)}"
+
+def diff_decks(old_index, vocabulary):
+    """Compare a deck with the previous one's {hanzi: word}; returns (diff, new index)
+
+    As in the app's word index, the last entry wins when a hanzi repeats.
+    """
+    new_index = {}
+    for position, word in enumerate(vocabulary):
+        hanzi = word.get("hanzi") if isinstance(word, dict) else None
+        if not hanzi:
+            raise ValueError(f"entry {position} has no hanzi")
+        new_index[hanzi] = word
+    added, modified = [], []
+    for hanzi, word in new_index.items():
+        old = old_index.get(hanzi)
+        if old is None:
+            added.append(word)
+        elif old is not word and old != word:
+            modified.append(word)
+    removed = [hanzi for hanzi in old_index if hanzi not in new_index]
+    return DeckDiff(added, removed, modified), new_index
+
+class DeckReader:
+    """Reads a deck file, parsing only the entry lines that changed since the last read"""
+
+    def __init__(self, path):
+        self.path = path
+        self.parse = json.loads if path.endswith(".json") else ast.literal_eval
+        self.entries = {}         # Entry line text -> parsed entry
+        self.parsed_lines = 0     # Lines actually parsed by the last read
+
+    def read(self):
+        """The deck's entries; lines already seen reuse their parsed entry"""
+        with open(self.path, encoding="utf-8") as deck_file:
+            vocabulary = self._read_lines(deck_file)
+        if vocabulary is None:
+            # Not one entry per line: load it the usual way
+            from vocabulary import load_vocabulary_file
+
+            self.entries = {}
+            vocabulary = load_vocabulary_file(self.path)
+            self.parsed_lines = len(vocabulary)
+        return vocabulary
+
+    def _read_lines(self, lines):
+        """Entries of a one-entry-per-line deck, or None for any other layout"""
+        entries = {}
+        vocabulary = []
+        parsed = 0
+        inside = ended = False
+        for line in lines:
+            text = line.strip()
+            if not inside:
+                inside = bool(LIST_START.match(text))
+                continue
+            if not text or text.startswith("#"):
+                continue
+            if ended:
+                return None       # Code after the list could change the deck
+            if text == "]":
+                ended = True
+                continue
+            text = text[:-1] if text.endswith(",") else text
+            if not (text.startswith("{") and text.endswith("}")):
+                return None
+            entry = self.entries.get(text) or entries.get(text)
+            if entry is None:
+                try:
+                    entry = self.parse(text)
+                except (ValueError, SyntaxError):
+                    return None   # Let the full load report the error
+                if not isinstance(entry, dict):
+                    return None
+                parsed += 1
+            entries[text] = entry
+            vocabulary.append(entry)
+        if not ended:
+            return None
+        self.entries = entries
+        self.parsed_lines = parsed
+        return vocabulary
+
+class DeckWatcher:
+    """Polls a deck file on a thread and queues (vocabulary, diff, extra) for each change
+
+    prepare(vocabulary, diff), if given, runs on the watcher thread for each
+    change and its result is queued as extra; use it for work too slow for
+    the Tk thread.
+    """
+
+    def __init__(self, path, prepare=None, interval=WATCH_INTERVAL):
+        self.path = path
+        self.prepare = prepare
+        self.interval = interval
+        self.reader = DeckReader(path)
+        self.index = {}
+        self.loaded_stat = file_stat(path)   # Taken before the deck is loaded, so no edit slips by
+        self.pending_stat = None
+        self.changes = queue.Queue()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def track(self, vocabulary):
+        """Set the deck the first diff is computed against"""
+        self.index = {word["hanzi"]: word for word in vocabulary}
+
+    def check(self):
+        """Reread the deck if it changed and has settled; returns (vocabulary, diff) or None"""
+        stat = file_stat(self.path)
+        if stat is None or stat == self.loaded_stat:
+            self.pending_stat = None
+            return None
+        if stat != self.pending_stat:
+            # Still being written (or just saved): look again next time
+            self.pending_stat = stat
+            return None
+        self.loaded_stat = stat   # A broken save is not retried until the file changes again
+        vocabulary = self.reader.read()
+        diff, self.index = diff_decks(self.index, vocabulary)
+        return (vocabulary, diff) if diff else None
+
+    def start(self):
+        """Watch on a daemon thread until stop()"""
+        def run():
+            try:
+                self.reader.read()    # Prime the line cache so the first change parses only what changed
+            except READ_ERRORS:
+                pass
+            while not self.stopped.wait(self.interval):
+                try:
+                    change = self.check()
+                except READ_ERRORS as error:
+                    print(f"⚠️ Deck reload skipped, keeping the current deck: {error}")
+                    continue
+                if change:
+                    vocabulary, diff = change
+                    extra = self.prepare(vocabulary, diff) if self.prepare else None
+                    self.changes.put((vocabulary, diff, extra))
+
+        self.thread = threading.Thread(target=run, name="deck-watcher", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """Stop watching after the current check"""
+        self.stopped.set()
+
+    def poll(self):
+        """Changes queued since the last poll (for the Tk thread)"""
+        changes = []
+        while True:
+            try:
+                changes.append(self.changes.get_nowait())
+            except queue.Empty:
+                return changes
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Watch a deck file and print each change")
+    parser.add_argument("deck", nargs="?", help="vocabulary module or .json deck (default: the app's deck)")
+    args = parser.parse_args()
+
+    path = args.deck or default_deck_path()
+    if not path or not os.path.exists(path):
+        parser.error("no deck file to watch")
+    watcher = DeckWatcher(path)
+    watcher.track(watcher.reader.read())
+    print(f"👀 Watching {path} ({len(watcher.index):,} words), Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(watcher.interval)
+            start = time.perf_counter()
+            try:
+                change = watcher.check()
+            except READ_ERRORS as error:
+                print(f"⚠️ {error}")
+                continue
+            if change:
+                vocabulary, diff = change
+                print(f"🔄 {len(vocabulary):,} words, {diff!r} ({watcher.reader.parsed_lines:,} lines parsed, "
+                      f"{(time.perf_counter() - start) * 1000:.1f} ms)")
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+"""
+ime.py - Pinyin input method candidates for Chinese Learning App
+Turns typed pinyin into ranked hanzi candidates, so answers in the hanzi
+modes can be typed. The lexicon is the loaded deck plus an optional
+frequency dictionary. Entries are numbered by rank (deck words first, then
+by frequency), so every posting list is a short sorted array of entry ids.
+Two tries hold the postings: one keyed by toneless syllables ("xue", "xi")
+and one keyed by syllable initials ("x", "x"), where zh/ch/sh syllables
+are filed under both their letter and their full initial, so 中国 is found
+by "zg" and "zhg" alike. Each trie node keeps the
+best ids of its whole subtree, so a keystroke costs one walk plus merging a
+few short lists.
+
+Usage:
+    python ime.py xuexi xx --freq dict.tsv
+"""
+
+import argparse
+import array
+import heapq
+import re
+import time
+from itertools import islice, product
+
+from pinyin import SYLLABLES, split_syllables
+
+MAX_POSTINGS = 16          # Ids kept per trie node
+DEFAULT_CANDIDATES = 9
+NON_LETTERS = re.compile(r"[^a-zü']")
+SYLLABLE_PREFIXES = frozenset(syllable[:end] for syllable in SYLLABLES
+                              for end in range(1, len(syllable) + 1))
+COMPOUND_INITIALS = ("zh", "ch", "sh")
+
+def load_frequency_dictionary(path):
+    """Read `hanzi frequency` or `hanzi<TAB>pinyin<TAB>frequency` lines
+
+    Returns (frequencies by hanzi, extra lexicon entries with pinyin).
+    """
+    frequencies = {}
+    entries = []
+    with open(path, encoding="utf-8") as dictionary_file:
+        for line in dictionary_file:
+            fields = line.rstrip("\n").split("\t") if "\t" in line else line.split()
+            if len(fields) >= 3 and fields[2].strip().isdigit():
+                frequencies[fields[0]] = int(fields[2])
+                entries.append({"hanzi": fields[0], "pinyin": fields[1]})
+            elif len(fields) >= 2 and fields[1].isdigit():
+                frequencies[fields[0]] = int(fields[1])
+    return frequencies, entries
+
+class TrieNode:
+    """A trie node: children by key and the best entry ids below it"""
+    __slots__ = ("children", "postings")
+
+    def __init__(self):
+        self.children = {}
+        self.postings = []
+
+class CandidateEngine:
+    """Ranked hanzi candidates for full or abbreviated pinyin"""
+
+    def __init__(self, vocabulary, frequencies=None, extra_entries=()):
+        frequencies = frequencies or {}
+        lexicon = {}
+        for in_deck, source in ((True, vocabulary), (False, extra_entries)):
+            for word in source:
+                if word["hanzi"] in lexicon:
+                    continue
+                syllables = split_syllables(word["pinyin"])
+                if syllables:
+                    lexicon[word["hanzi"]] = (in_deck, tuple(syllable for syllable, _ in syllables))
+
+        # Entry id == rank: deck words first, then by frequency
+        ranked = sorted(lexicon.items(), key=lambda item: (not item[1][0], -frequencies.get(item[0], 0)))
+        self.hanzi = [hanzi for hanzi, _ in ranked]
+        self.lengths = array.array("B", (min(len(syllables), 255) for _, (_, syllables) in ranked))
+        self.syllable_trie = TrieNode()
+        self.initial_trie = TrieNode()
+        for entry_id, (_, (_, syllables)) in enumerate(ranked):
+            self._insert(self.syllable_trie, syllables, entry_id)
+            for initials in product(*(initial_keys(syllable) for syllable in syllables)):
+                self._insert(self.initial_trie, initials, entry_id)
+        self._freeze(self.syllable_trie)
+        self._freeze(self.initial_trie)
+
+    @classmethod
+    def from_vocabulary(cls, vocabulary, dictionary_path=None):
+        """Engine for a deck, plus an optional frequency dictionary"""
+        if not dictionary_path:
+            return cls(vocabulary)
+        frequencies, entries = load_frequency_dictionary(dictionary_path)
+        return cls(vocabulary, frequencies, entries)
+
+    def __len__(self):
+        return len(self.hanzi)
+
+    @staticmethod
+    def _insert(trie, keys, entry_id):
+        """Add an entry id to every node on its path (ids arrive in rank order)"""
+        node = trie
+        for key in keys:
+            node = node.children.get(key) or node.children.setdefault(key, TrieNode())
+            # An entry filed under several initial spellings reaches shared nodes more than once
+            if len(node.postings) < MAX_POSTINGS and (not node.postings or node.postings[-1] != entry_id):
+                node.postings.append(entry_id)
+
+    def _freeze(self, trie):
+        """Store posting lists compactly once the trie is complete"""
+        stack = [trie]
+        while stack:
+            node = stack.pop()
+            node.postings = array.array("I", node.postings)
+            stack.extend(node.children.values())
+
+    def _walk(self, trie, keys):
+        """Node reached by a key sequence, or None"""
+        node = trie
+        for key in keys:
+            node = node.children.get(key)
+            if node is None:
+                return None
+        return node
+
+    def _syllable_matches(self, letters):
+        """(ids, syllable count) for letters read as whole syllables plus a partial last one"""
+        pieces = parse_input(letters)
+        if pieces is None:
+            return [], 0
+        *complete, partial = pieces
+        node = self._walk(self.syllable_trie, complete)
+        if node is None:
+            return [], 0
+        lists = [child.postings for syllable, child in node.children.items() if syllable.startswith(partial)]
+        return list(islice(_unique(heapq.merge(*lists)), MAX_POSTINGS)), len(pieces)
+
+    def _initial_matches(self, letters):
+        """[(ids, syllable count)] for letters read as syllable initials ("xx" for xuexi, "zhg" for zhongguo)"""
+        matches = []
+        for keys in split_initials(letters):
+            node = self._walk(self.initial_trie, keys)
+            if node:
+                matches.append((list(node.postings), len(keys)))
+        return matches
+
+    def candidates(self, typed, limit=DEFAULT_CANDIDATES):
+        """Best hanzi for typed pinyin; words of exactly the typed length first"""
+        letters = NON_LETTERS.sub("", typed.lower().replace("v", "ü"))
+        if not letters.replace("'", ""):
+            return []
+        matches = [self._syllable_matches(letters)] + self._initial_matches(letters.replace("'", ""))
+
+        exact, longer = [], []
+        seen = set()
+        for ids, length in matches:
+            for entry_id in ids:
+                if entry_id in seen:
+                    continue
+                seen.add(entry_id)
+                (exact if self.lengths[entry_id] == length else longer).append(entry_id)
+        return [self.hanzi[entry_id] for entry_id in (exact + longer)[:limit]]
+
+def initial_keys(syllable):
+    """Initial-trie keys of a syllable: its first letter, and zh/ch/sh as typed in full"""
+    if syllable[:2] in COMPOUND_INITIALS:
+        return (syllable[0], syllable[:2])
+    return (syllable[0],)
+
+def split_initials(letters):
+    """Every way to read letters as initials, with zh/ch/sh taken as one key or two"""
+    if not letters:
+        return [()]
+    readings = [(letters[0],) + rest for rest in split_initials(letters[1:])]
+    if letters[:2] in COMPOUND_INITIALS:
+        readings += [(letters[:2],) + rest for rest in split_initials(letters[2:])]
+    return readings
+
+def _unique(sorted_ids):
+    """Drop repeats from a sorted id stream"""
+    previous = None
+    for entry_id in sorted_ids:
+        if entry_id != previous:
+            yield entry_id
+            previous = entry_id
+
+def parse_input(letters):
+    """Split typed letters into whole syllables plus a (possibly partial) last one
+
+    Apostrophes force a boundary. Returns None if the letters are not pinyin.
+    """
+    pieces = []
+    chunks = [chunk for chunk in letters.split("'") if chunk]
+    for position, chunk in enumerate(chunks):
+        split = _split_with_partial(chunk, last=position == len(chunks) - 1)
+        if split is None:
+            return None
+        pieces.extend(split)
+    return pieces or None
+
+def _split_with_partial(chunk, last):
+    """Longest-first split where only the final piece may be a syllable prefix"""
+    if not chunk:
+        return []
+    for end in range(min(len(chunk), 6), 0, -1):
+        head = chunk[:end]
+        rest = chunk[end:]
+        if not rest:
+            if head in SYLLABLES or (last and head in SYLLABLE_PREFIXES):
+                return [head]
+            continue
+        if head in SYLLABLES:
+            tail = _split_with_partial(rest, last)
+            if tail is not None:
+                return [head] + tail
+    return None
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Show IME candidates for typed pinyin")
+    parser.add_argument("inputs", nargs="+", help="typed pinyin, e.g. xuexi or xx")
+    parser.add_argument("--deck", help="vocabulary module (default: the app's deck)")
+    parser.add_argument("--freq", help="frequency dictionary (hanzi freq, or hanzi<TAB>pinyin<TAB>freq)")
+    args = parser.parse_args()
+
+    from vocabulary import load_vocabulary
+
+    start = time.perf_counter()
+    engine = CandidateEngine.from_vocabulary(load_vocabulary(args.deck), args.freq)
+    print(f"🔤 {len(engine):,} entries indexed in {time.perf_counter() - start:.2f}s")
+    for typed in args.inputs:
+        start = time.perf_counter()
+        candidates = engine.candidates(typed)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        print(f"   {typed:<12} → {' '.join(candidates) or '(none)'}  [{elapsed_ms:.2f} ms]")
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,9 @@ import sys
 import os
 from pathlib import Path
 
+from confusion import ConfusionMatrix
+from review_log import record_match, record_review
+
 # Try to import vocabulary from data file, fallback to sample data
 try:
     sys.path.append(os.path.join(os.path.dirname(__file__), 'data'))
@@ -53,6 +56,7 @@ class ChineseLearningApp:
         
         # App state
         self.vocabulary = vocabulary_data
+        self.confusion = ConfusionMatrix.load()
         self.selected_words = []
         self.current_mode = ""
         self.num_words = 5
@@ -134,6 +138,7 @@ class ChineseLearningApp:
     
     def show_start_screen(self):
         """Display the initial configuration screen"""
+        self.confusion.save()
         self.clear_frame()
         
         # Title
@@ -328,6 +333,7 @@ class ChineseLearningApp:
     
     def answer_flashcard(self, correct):
         """Process flashcard answer and move to next"""
+        record_review(self.selected_words[self.current_card_index], correct)
         if correct:
             self.score += 1
         self.current_card_index += 1
@@ -500,6 +506,9 @@ class ChineseLearningApp:
     def check_match(self):
         """Check if selected cards match"""
         card1, card2 = self.selected_cards
+        word1 = self.selected_words[card1.pair_info["pair_id"]]
+        word2 = self.selected_words[card2.pair_info["pair_id"]]
+        record_match(word1, word2)
         
         if card1.pair_info["pair_id"] == card2.pair_info["pair_id"]:
             # Match found!
@@ -516,7 +525,8 @@ class ChineseLearningApp:
             else:
                 self.update_score_label()
         else:
-            # No match - reset buttons
+            # No match - remember the mix-up for confusables drills, reset buttons
+            self.confusion.record(word1, word2)
             card1.configure(bg='#667eea', activebackground='#5a6fd8')
             card2.configure(bg='#667eea', activebackground='#5a6fd8')
         
@@ -524,6 +534,7 @@ class ChineseLearningApp:
     
     def show_game_results(self):
         """Show matching game results"""
+        self.confusion.save()
         self.clear_frame()
         
         # Results frame
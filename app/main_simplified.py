@@ -12,25 +12,71 @@ Usage:
     python main.py
 """
 
+import time
+_STARTUP_START = time.perf_counter()
+
+import argparse
+import os
+import queue
+import threading
 import tkinter as tk
 from tkinter import ttk
 from utils import *
+import tracing
+from tracing import instant, traced
+from stall_watchdog import DEFAULT_THRESHOLD_MS, start_watchdog
+from review_log import load_known_words, record_match, record_review
+from startup import StartupProfile
+# Everything else is imported where it is first used: the deck modules (and NumPy)
+# by the background loader, screens and session helpers when they are opened
+
+LOADER_POLL_MS = 15
+WATCH_POLL_MS = 250
+SYNC_POLL_MS = 500
+INDEX_PROGRESS_EVERY = 5000
+MATCH_CHECK_DELAY_MS = 300    # Let the second selected card show before judging the pair
+MISMATCH_RESET_MS = 800
+RESULTS_DELAY_MS = 1000
 
 class ChineseLearningApp:
-    def __init__(self, root):
+    def __init__(self, root, vocabulary=None, deck_path=None, profile=None, audio_path=None,
+                 sentences_path=None, ime_dictionary_path=None, hot_reload=True, sync_url=None):
         self.root = root
         self.root.title("🇨🇳 Chinese Learning App")
         self.root.geometry("1000x700")  # More reasonable size
         self.root.configure(bg='#0f172a')
+        self.profile = profile or StartupProfile(_STARTUP_START)
         
-        # Load vocabulary and setup ultra-enhanced styling
-        self.vocabulary = load_vocabulary()
-        setup_styles()
+        # The deck and learner data are filled in by load_deck_in_background
+        self.deck_path = deck_path
+        self.hot_reload = hot_reload
+        self.deck_watcher = None  # Set by the loader when the deck file is watched
+        self.sync_url = sync_url
+        self.sync_results = queue.Queue()
+        self.vocabulary = []
+        self.word_index = {}
+        self.segmenter = None
+        self.ime_dictionary_path = ime_dictionary_path
+        self.ime = None
+        self.cloze_items = None   # Read from the deck's cloze cache on the first cloze session
+        self.confusion = None
+        self.schedule = None      # Due days under the learner's fitted scheduler parameters
+        self.audio_path = audio_path
+        self.audio_pack = None
+        self.player = None
+        self.sentences_path = sentences_path
+        self.corpus = None
+        self.corpus_step = None   # The corpus's prefetch step, swapped when the corpus is reopened
+        self.known_words = frozenset()
+        self.loader_queue = queue.Queue()
+        self.loading_widgets = None
+        self.prefetcher = None    # Created with the first step that needs it, after first paint
         
         # App state
         self.current_mode = ""
         self.selected_words = []
         self.current_card_index = 0
+        self.correct_count = 0
         self.score = 0
         self.game_pairs = []
         self.selected_cards = []
@@ -41,10 +87,23 @@ class ChineseLearningApp:
         # UI variables
         self.mode_var = tk.StringVar(value="pinyin-hanzi")
         self.words_var = tk.IntVar(value=5)
+        self.typed_var = tk.BooleanVar(value=False)
         
         # Initialize stunning UI
         self.create_main_frame()
-        self.show_start_screen()
+        if vocabulary is not None:
+            # Deck supplied by the caller (benchmarks, notebooks): no loader needed
+            from confusion import ConfusionMatrix
+            from scheduler import ReviewSchedule
+            self.set_deck(vocabulary, ConfusionMatrix.load())
+            self.schedule = ReviewSchedule.load()
+            setup_styles()
+            self.show_start_screen()
+        else:
+            # Paint a cheap loading screen first; the deck loads off the Tk thread
+            self.loading_widgets = create_loading_screen(self.main_frame)
+            self.root.bind("<Map>", self.on_first_map, add="+")
+            self.load_deck_in_background()
         center_window(self.root)
         
         # Enhanced window properties
@@ -56,31 +115,305 @@ class ChineseLearningApp:
             self.root.attributes('-alpha', 0.98)  # Slight transparency for modern look
         except:
             pass  # Some systems don't support transparency
+        self.profile.mark("app init")
+    
+    def on_first_map(self, event):
+        """Note the first paint, then do deferred setup once the window shows"""
+        if self.profile.elapsed_ms("first paint") is not None:
+            return
+        self.root.update_idletasks()
+        self.profile.mark("first paint")
+        self.root.after_idle(setup_styles)
+    
+    def load_deck_in_background(self):
+        """Load and index the deck on a worker thread, reporting progress"""
+        deck_path = self.deck_path
+        audio_path = self.audio_path
+        sentences_path = self.sentences_path
+        ime_dictionary_path = self.ime_dictionary_path
+        hot_reload = self.hot_reload
+        progress = self.loader_queue
+        
+        def work():
+            try:
+                progress.put(("progress", "📚 Loading vocabulary...", 0.05))
+                from audio import open_audio_pack
+                from bundle import BUNDLE_EXTENSION, DeckBundle
+                from hot_reload import DeckWatcher, default_deck_path
+                from ime import CandidateEngine
+                from segmenter import Segmenter
+                from sentences import open_corpus
+                watch_path = (deck_path or default_deck_path()) if hot_reload else None
+                if watch_path and watch_path.endswith(BUNDLE_EXTENSION):
+                    watch_path = None     # Bundles are built by bundle.py, not edited in place
+                # Created before loading so an edit made during the load is still seen
+                watcher = DeckWatcher(watch_path, self.prepare_deck_change) if watch_path else None
+                vocabulary = load_vocabulary(deck_path)
+                if watcher:
+                    watcher.track(vocabulary)
+                    progress.put(("watcher", watcher))
+                if isinstance(vocabulary, DeckBundle):
+                    # The bundle's index has the hanzi and pinyin; entries stay compressed until used
+                    word_index = vocabulary.word_index()
+                    index_words = vocabulary.stubs()
+                else:
+                    word_index = {}
+                    for position, word in enumerate(vocabulary):
+                        word_index[word["hanzi"]] = word
+                        if position % INDEX_PROGRESS_EVERY == 0:
+                            progress.put(("progress", f"🔎 Indexing {position:,}/{len(vocabulary):,} words...",
+                                          0.1 + 0.7 * position / len(vocabulary)))
+                    index_words = vocabulary
+                progress.put(("segmenter", Segmenter.from_vocabulary(index_words)))
+                progress.put(("progress", "⌨️ Building pinyin input...", 0.82))
+                progress.put(("ime", CandidateEngine.from_vocabulary(index_words, ime_dictionary_path)))
+                progress.put(("progress", "🧠 Loading your progress...", 0.85))
+                from confusion import ConfusionMatrix
+                confusion = ConfusionMatrix.load()
+                from scheduler import ReviewSchedule
+                progress.put(("schedule", ReviewSchedule.load()))
+                progress.put(("audio", open_audio_pack(audio_path)))
+                progress.put(("progress", "📖 Indexing example sentences...", 0.9))
+                progress.put(("sentences", open_corpus(word_index, sentences_path), load_known_words()))
+                progress.put(("done", vocabulary, word_index, confusion))
+            except Exception as error:
+                progress.put(("error", error))
+        
+        threading.Thread(target=work, name="deck-loader", daemon=True).start()
+        self.root.after(LOADER_POLL_MS, self.poll_deck_loader)
+    
+    @traced()
+    def poll_deck_loader(self):
+        """Apply loader messages on the Tk thread"""
+        while True:
+            try:
+                message = self.loader_queue.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == "progress":
+                update_loading_screen(self.loading_widgets, message[1], message[2])
+            elif message[0] == "segmenter":
+                self.segmenter = message[1]
+            elif message[0] == "ime":
+                self.ime = message[1]
+            elif message[0] == "schedule":
+                self.schedule = message[1]
+            elif message[0] == "audio":
+                self.set_audio_pack(message[1])
+            elif message[0] == "sentences":
+                self.set_corpus(message[1], message[2])
+            elif message[0] == "watcher":
+                self.deck_watcher = message[1]
+            elif message[0] == "done":
+                self.set_deck(message[1], message[3], message[2])
+                self.profile.mark("deck ready")
+                self.show_start_screen()
+                self.profile.mark("start screen")
+                if self.deck_watcher:
+                    self.deck_watcher.start()
+                    self.root.after(WATCH_POLL_MS, self.poll_deck_watcher)
+                if self.sync_url:
+                    self.start_sync()
+                return
+            else:
+                update_loading_screen(self.loading_widgets, f"❌ Could not load vocabulary: {message[1]}", 0)
+                return
+        self.root.after(LOADER_POLL_MS, self.poll_deck_loader)
+    
+    def set_deck(self, vocabulary, confusion, word_index=None):
+        """Install a loaded deck, its segmenter, IME and the learner's confusion matrix"""
+        self.vocabulary = vocabulary
+        self.word_index = word_index if word_index is not None else {word["hanzi"]: word for word in vocabulary}
+        self.confusion = confusion
+        self.loading_widgets = None
+        from ime import CandidateEngine
+        from segmenter import Segmenter
+        
+        # The background loader builds the segmenter; otherwise build or update it here
+        if self.segmenter is None:
+            self.segmenter = Segmenter.from_vocabulary(vocabulary)
+        else:
+            self.segmenter.update_vocabulary(vocabulary)
+        if self.ime is None:
+            self.ime = CandidateEngine.from_vocabulary(vocabulary, self.ime_dictionary_path)
+    
+    def prepare_deck_change(self, vocabulary, diff):
+        """Rebuild the pinyin input, and the sentence index if words were added (runs on the watcher thread)
+
+        Returns (ime, corpus); corpus is None when the current one still covers the deck.
+        """
+        from ime import CandidateEngine
+        from sentences import open_corpus
+        
+        ime = CandidateEngine.from_vocabulary(vocabulary, self.ime_dictionary_path)
+        corpus = None
+        if diff.added and self.corpus is not None:
+            # Removed words just go unused in the old index; new ones need their sentences indexed
+            corpus = open_corpus({word["hanzi"] for word in vocabulary}, self.sentences_path)
+        return ime, corpus
+    
+    def poll_deck_watcher(self):
+        """Apply deck file changes found by the watcher on the Tk thread"""
+        for vocabulary, diff, (ime, corpus) in self.deck_watcher.poll():
+            self.apply_deck_change(vocabulary, diff, ime, corpus)
+        self.root.after(WATCH_POLL_MS, self.poll_deck_watcher)
+    
+    @traced()
+    def apply_deck_change(self, vocabulary, diff, ime, corpus=None):
+        """Switch to an edited deck, updating the indexes by its diff
+        
+        Sessions in progress keep the words they started with (the session
+        lists and prefetched cards hold their own references); the new deck
+        is used from the next session on. corpus, if given, is the sentence
+        corpus reindexed for the new deck by prepare_deck_change.
+        """
+        self.vocabulary = vocabulary
+        for hanzi in diff.removed:
+            self.word_index.pop(hanzi, None)
+        for word in diff.added + diff.modified:
+            self.word_index[word["hanzi"]] = word
+        self.segmenter.update_words([word["hanzi"] for word in diff.added], diff.removed)
+        self.ime = ime
+        if corpus is not None:
+            # The old corpus is left to the garbage collector: a prefetch may still be reading it
+            corpus.use_segmenter(self.segmenter)
+            step = corpus.prefetch_step(lambda: self.known_words)
+            self.get_prefetcher().replace_step(self.corpus_step, step)
+            self.corpus, self.corpus_step = corpus, step
+        if diff.added or diff.removed:
+            self.cloze_items = None   # The cloze cache is per word set: reread it on the next cloze session
+        print(f"🔄 Deck reloaded: {len(diff.added)} added, {len(diff.removed)} removed, "
+              f"{len(diff.modified)} changed ({len(vocabulary):,} words)")
+    
+    def start_sync(self):
+        """Sync progress with the server on a worker thread (offline is fine: events stay queued locally)"""
+        from sync import sync
+        
+        def work():
+            try:
+                result = sync(self.sync_url)
+                if result["params_updated"] or any(event["type"] == "review" for event in result["pulled"]):
+                    # Replayed here, off the Tk thread, with the new reviews and parameters
+                    from scheduler import ReviewSchedule
+                    result["schedule"] = ReviewSchedule.load()
+                self.sync_results.put(result)
+            except Exception as error:
+                self.sync_results.put(error)
+        
+        threading.Thread(target=work, name="progress-sync", daemon=True).start()
+        self.root.after(SYNC_POLL_MS, self.poll_sync)
+    
+    def poll_sync(self):
+        """Fold progress made on other devices into this session's state
+
+        sync() already saved the pulled mismatches; they are mirrored into the
+        in-memory matrix so this session's next save does not drop them.
+        """
+        try:
+            result = self.sync_results.get_nowait()
+        except queue.Empty:
+            self.root.after(SYNC_POLL_MS, self.poll_sync)
+            return
+        if isinstance(result, Exception):
+            print(f"📴 Progress sync skipped, will retry next time: {result}")
+            return
+        from sync import is_mismatch
+        
+        for event in result["pulled"]:
+            if is_mismatch(event):
+                self.confusion.record({"hanzi": event["word"]}, {"hanzi": event["other"]})
+        if "schedule" in result:
+            self.schedule = result["schedule"]
+        # Re-derived from the merged log so the latest grade wins, wherever it was given
+        self.known_words = frozenset(load_known_words())
+        print(f"🔄 Progress synced: {result['uploaded']} sent, {len(result['pulled'])} received"
+              f"{', new scheduler parameters' if result['params_updated'] else ''}")
+    
+    def set_audio_pack(self, audio_pack):
+        """Use a pronunciation audio pack for flashcards (None for no audio)"""
+        if audio_pack is None:
+            return
+        from audio import AudioPlayer
+        
+        self.audio_pack = audio_pack
+        self.player = AudioPlayer()
+        self.get_prefetcher().add_step(audio_pack.prefetch_step)
+    
+    def set_corpus(self, corpus, known_words):
+        """Show example sentences from a corpus (None for none)"""
+        self.known_words = frozenset(known_words)
+        if corpus is None:
+            return
+        self.corpus = corpus
+        if self.segmenter is not None:
+            corpus.use_segmenter(self.segmenter)
+        self.corpus_step = corpus.prefetch_step(lambda: self.known_words)
+        self.get_prefetcher().add_step(self.corpus_step)
+    
+    def get_prefetcher(self):
+        """The flashcard prefetcher, created on first use"""
+        if self.prefetcher is None:
+            import answers
+            from prefetch import FlashcardPrefetcher
+            
+            self.prefetcher = FlashcardPrefetcher(self.root, [prepare_flashcard_content, answers.prefetch_step])
+        return self.prefetcher
+    
+    def play_audio(self, wav_bytes):
+        """Play a pronunciation without blocking the UI"""
+        self.player.play(wav_bytes)
     
     def create_main_frame(self):
         """Create the main container frame with stunning styling"""
         self.main_frame = tk.Frame(self.root, bg='#0f172a', padx=0, pady=0)
         self.main_frame.pack(fill=tk.BOTH, expand=True)
     
+    @traced()
     def show_start_screen(self):
         """Display the ultra-beautiful start screen"""
+        self.confusion.save()
         create_start_screen(
             self.main_frame, 
             self.vocabulary,
             self.mode_var,
             self.words_var,
             self.start_flashcards,
-            self.start_matching_game
+            self.start_matching_game,
+            self.start_confusables_game,
+            self.typed_var,
+            self.show_browser
         )
     
+    def show_browser(self):
+        """Display the whole deck in the sortable, filterable browser"""
+        from browser import create_browser_screen
+        
+        create_browser_screen(self.main_frame, self.vocabulary, self.show_start_screen)
+    
+    def prepare_session_words(self):
+        """Pick the session's words; cloze sessions need words with cached sentences"""
+        from cloze import CLOZE_MODE, load_cloze_items, select_cloze_words
+        
+        if self.mode_var.get() == CLOZE_MODE:
+            if self.cloze_items is None:
+                self.cloze_items = load_cloze_items(self.vocabulary)
+            words = select_cloze_words(self.vocabulary, self.cloze_items, self.words_var.get(), self.word_index)
+            if words:
+                return CLOZE_MODE, words
+            print("⚠️ No cloze sentences for this deck yet; run `python cloze.py corpus.tsv` first")
+        # Words due for review come first, then new ones
+        return self.mode_var.get(), self.schedule.select_words(self.vocabulary, self.words_var.get(), self.word_index)
+    
+    @traced()
     def start_flashcards(self):
         """Initialize and start ultra-enhanced flashcard mode"""
-        self.current_mode, self.selected_words = prepare_words(
-            self.vocabulary, self.mode_var, self.words_var
-        )
+        self.current_mode, self.selected_words = self.prepare_session_words()
         self.current_card_index = 0
+        self.correct_count = 0
+        self.get_prefetcher().start_session(self.selected_words, self.current_mode)
         self.show_flashcard()
     
+    @traced()
     def show_flashcard(self):
         """Display current flashcard with massive hanzi or results if finished"""
         if self.current_card_index >= len(self.selected_words):
@@ -88,6 +421,12 @@ class ChineseLearningApp:
             return
         
         word = self.selected_words[self.current_card_index]
+        content = self.prefetcher.take(self.current_card_index)
+        self.prefetcher.advance(self.current_card_index)
+        audio = content.get("audio")
+        if audio and self.current_mode.startswith("pinyin"):
+            # Pinyin modes are about pronunciation: say the word straight away
+            self.play_audio(audio)
         create_flashcard_screen(
             self.main_frame,
             word,
@@ -96,28 +435,64 @@ class ChineseLearningApp:
             len(self.selected_words),
             show_flashcard_answer,
             self.next_flashcard,
-            self.show_start_screen
+            self.show_start_screen,
+            self.answer_flashcard,
+            content,
+            self.play_audio if audio else None,
+            self.typed_var.get(),
+            self.ime
         )
     
+    @traced()
+    def answer_flashcard(self, correct):
+        """Record the learner's self-grade and move on"""
+        word = self.selected_words[self.current_card_index]
+        record_review(word, correct)
+        self.schedule.record(word["hanzi"], correct)
+        if correct:
+            self.correct_count += 1
+            # Replaced rather than mutated: the prefetch thread may be reading it
+            self.known_words = self.known_words | {word["hanzi"]}
+        else:
+            self.known_words = self.known_words - {word["hanzi"]}
+        self.next_flashcard()
+    
+    @traced()
     def next_flashcard(self):
         """Move to next flashcard with smooth transition"""
         self.current_card_index += 1
         self.show_flashcard()
     
+    @traced()
     def show_flashcard_results(self):
         """Show spectacular flashcard completion screen"""
         create_flashcard_results(
             self.main_frame,
             len(self.selected_words),
             self.start_flashcards,
-            self.show_start_screen
+            self.show_start_screen,
+            self.correct_count
         )
     
+    @traced()
     def start_matching_game(self):
         """Initialize and start spectacular matching game"""
-        self.current_mode, self.selected_words = prepare_words(
-            self.vocabulary, self.mode_var, self.words_var
+        self.current_mode, self.selected_words = self.prepare_session_words()
+        self.start_matching_session()
+    
+    @traced()
+    def start_confusables_game(self):
+        """Start a matching game built from the learner's most confused pairs"""
+        from confusion import prepare_confusable_words
+        
+        self.current_mode, self.selected_words = prepare_confusable_words(
+            self.vocabulary, self.mode_var, self.words_var, self.confusion, self.word_index
         )
+        self.start_matching_session()
+    
+    @traced()
+    def start_matching_session(self):
+        """Reset game state for the selected words and show the board"""
         self.game_pairs = setup_matching_game(self.selected_words, self.current_mode)
         self.matched_pairs = []
         self.selected_cards = []
@@ -125,6 +500,7 @@ class ChineseLearningApp:
         self.checking_match = False
         self.show_matching_game()
     
+    @traced()
     def show_matching_game(self):
         """Display the spectacular matching game with large hanzi"""
         self.game_buttons = create_matching_game_screen(
@@ -138,6 +514,7 @@ class ChineseLearningApp:
             self.show_start_screen
         )
     
+    @traced()
     def card_clicked(self, index):
         """Handle card click with immediate beautiful feedback"""
         # Prevent actions during match checking or if card already processed
@@ -168,8 +545,10 @@ class ChineseLearningApp:
         # Check if we have 2 selected cards
         if len(self.selected_cards) == 2:
             self.checking_match = True
-            self.root.after(300, self.check_match_with_immediate_feedback)
+            instant("match_check_scheduled")
+            self.root.after(MATCH_CHECK_DELAY_MS, self.check_match_with_immediate_feedback)
     
+    @traced()
     def check_match_with_immediate_feedback(self):
         """Check match and show immediate green/red feedback"""
         if len(self.selected_cards) != 2:
@@ -183,11 +562,15 @@ class ChineseLearningApp:
         show_immediate_feedback(card1, is_match)
         show_immediate_feedback(card2, is_match)
         
+        word1 = self.selected_words[card1.pair_info["pair_id"]]
+        word2 = self.selected_words[card2.pair_info["pair_id"]]
+        record_match(word1, word2)
         if is_match:
             # Handle successful match
             self.handle_successful_match(card1, card2)
         else:
             # Handle failed match
+            self.confusion.record(word1, word2)
             self.handle_failed_match(card1, card2)
         
         # Clear selected cards
@@ -205,8 +588,9 @@ class ChineseLearningApp:
     def handle_failed_match(self, card1, card2):
         """Handle failed match with visual feedback"""
         # Cards stay red for a moment, then reset
-        self.root.after(800, lambda: self.reset_cards_after_mismatch(card1, card2))
+        self.root.after(MISMATCH_RESET_MS, lambda: self.reset_cards_after_mismatch(card1, card2))
     
+    @traced()
     def reset_cards_after_mismatch(self, card1, card2):
         """Reset cards to original appearance after showing mismatch"""
         try:
@@ -233,6 +617,7 @@ class ChineseLearningApp:
         # Re-enable matching
         self.checking_match = False
     
+    @traced()
     def on_cards_disappeared(self):
         """Callback when cards have finished disappearing"""
         # Re-enable matching
@@ -240,11 +625,12 @@ class ChineseLearningApp:
         
         # Check if game complete
         if len(self.matched_pairs) == len(self.game_pairs):
-            self.root.after(1000, self.show_game_results)
+            self.root.after(RESULTS_DELAY_MS, self.show_game_results)
         else:
             # Update the display to show new score
             self.update_score_display()
     
+    @traced()
     def update_score_display(self):
         """Update the score display after a match"""
         # Filter out matched cards when refreshing
@@ -257,8 +643,10 @@ class ChineseLearningApp:
         if remaining_pairs:
             self.show_matching_game()
     
+    @traced()
     def show_game_results(self):
         """Show spectacular game completion results"""
+        self.confusion.save()
         create_game_results(
             self.main_frame,
             self.score,
@@ -267,13 +655,44 @@ class ChineseLearningApp:
             self.show_start_screen
         )
 
+def parse_args():
+    """Parse command line options"""
+    parser = argparse.ArgumentParser(description="Chinese Learning App")
+    parser.add_argument("--trace", metavar="PATH",
+                        help="record hot-path spans and write a Chrome trace to PATH on exit")
+    parser.add_argument("--watchdog", metavar="MS", nargs="?", type=float, const=DEFAULT_THRESHOLD_MS,
+                        help="report main-thread stalls longer than MS milliseconds (default 50)")
+    parser.add_argument("--deck", metavar="PATH",
+                        help="vocabulary module, JSON deck or deck bundle to load instead of the bundled sample deck")
+    parser.add_argument("--audio", metavar="PATH",
+                        help="pronunciation audio pack (default: the audio folder in the data directory)")
+    parser.add_argument("--sentences", metavar="PATH",
+                        help="Tatoeba-style TSV of example sentences (default: sentences/sentences.tsv in the data directory)")
+    parser.add_argument("--ime-dict", metavar="PATH",
+                        help="frequency dictionary for typed hanzi (hanzi freq, or hanzi<TAB>pinyin<TAB>freq)")
+    parser.add_argument("--no-reload", action="store_true",
+                        help="do not watch the deck file for changes")
+    parser.add_argument("--sync", metavar="URL", default=os.environ.get("CHINESE_APP_SYNC"),
+                        help="school sync server to exchange progress with at start and exit (or CHINESE_APP_SYNC)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="report import, init, first-paint and deck-ready timings")
+    return parser.parse_args()
+
 def main():
     """Main function to run the ultra-enhanced application"""
+    profile = StartupProfile(_STARTUP_START)
+    profile.mark("imports")
+    profile.check_imports()
+    args = parse_args()
+    if args.trace:
+        tracing.enable(args.trace)
+    
     print("🚀 Starting Ultra-Enhanced Chinese Learning App...")
     print("✨ Loading stunning UI components...")
     
     # Create and configure the main window with beautiful styling
     root = tk.Tk()
+    profile.mark("window created")
     
     # Set window properties for maximum beauty
     try:
@@ -284,10 +703,12 @@ def main():
         pass
     
     # Initialize the ultra-enhanced app
-    app = ChineseLearningApp(root)
+    app = ChineseLearningApp(root, deck_path=args.deck, profile=profile, audio_path=args.audio,
+                             sentences_path=args.sentences, ime_dictionary_path=args.ime_dict,
+                             hot_reload=not args.no_reload, sync_url=args.sync)
+    watchdog = start_watchdog(root, args.watchdog)
     
-    vocabulary_count = len(app.vocabulary)
-    print(f"📚 Loaded {vocabulary_count} words")
+    print("📚 Loading vocabulary in the background...")
     print("🎨 Ultra-enhanced UI ready!")
     print("🌟 Massive hanzi symbols enabled!")
     print("💫 Beautiful animations activated!")
@@ -300,6 +721,23 @@ def main():
     except KeyboardInterrupt:
         print("\n👋 Thanks for using the Ultra-Enhanced Chinese Learning App!")
         root.quit()
+    
+    if app.confusion is not None:
+        app.confusion.save()      # Before the exit sync adds pulled mismatches to the stored matrix
+    if args.sync:
+        # Send this session's progress while we still can; failures wait for next time.
+        # sync() waits for a startup sync still in flight rather than racing it
+        from sync import sync
+        try:
+            summary = sync(args.sync)
+            print(f"🔄 Progress synced: {summary['uploaded']} events sent")
+        except Exception as error:
+            print(f"📴 Progress stays on this computer until the next sync: {error}")
+    
+    if watchdog:
+        print(watchdog.stop())
+    if args.profile_startup:
+        print(profile.format_report())
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
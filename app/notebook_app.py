@@ -0,0 +1,360 @@
+"""
+notebook_app.py - Jupyter frontend for Chinese Learning App
+The whole notebook UI is one stateful widget. The browser renders the start
+screen, flashcards and matching board itself and handles card selection,
+flipping and feedback locally. The kernel sends the session's cards once when
+a session starts and only hears back about grades and match results. Board
+state lives in separate traits, so a match result syncs just the new matched
+tiles and score, which the browser applies to the tiles already on screen: a
+30-card board costs a handful of small messages instead of a rebuild per click.
+
+Usage (in a notebook):
+    from notebook_app import NotebookLearningApp
+    NotebookLearningApp()
+"""
+
+import itertools
+import random
+
+import anywidget
+import traitlets
+
+from cloze import CLOZE_MODE, load_cloze_items, select_cloze_words
+from confusion import ConfusionMatrix, select_confusable_words
+from review_log import record_review
+from vocabulary import get_learning_modes, get_question_answer, load_vocabulary, setup_matching_game
+
+_ESM = r"""
+function el(tag, className, text) {
+  const node = document.createElement(tag);
+  if (className) node.className = className;
+  if (text !== undefined) node.textContent = text;
+  return node;
+}
+
+function button(label, className, onClick) {
+  const node = el("button", "cla-button " + className, label);
+  node.addEventListener("click", onClick);
+  return node;
+}
+
+function render({ model, el: host }) {
+  const root = el("div", "cla-app");
+  host.appendChild(root);
+  const settings = { mode: model.get("modes")[0][1], count: 5 };
+  let session = null;
+
+  function screen(...children) {
+    root.replaceChildren(...children);
+  }
+
+  function backButton() {
+    return button("← Back to Menu", "cla-warning", showStart);
+  }
+
+  function showStart() {
+    session = null;
+    const modeSelect = el("select", "cla-select");
+    for (const [label, value] of model.get("modes")) {
+      const option = el("option", "", label);
+      option.value = value;
+      option.selected = value === settings.mode;
+      modeSelect.appendChild(option);
+    }
+    modeSelect.addEventListener("change", () => (settings.mode = modeSelect.value));
+
+    const countLabel = el("div", "cla-subtitle", `Words: ${settings.count}`);
+    const slider = el("input", "cla-slider");
+    slider.type = "range";
+    slider.min = 3;
+    slider.max = model.get("max_words");
+    slider.value = settings.count;
+    slider.addEventListener("input", () => {
+      settings.count = Number(slider.value);
+      countLabel.textContent = `Words: ${settings.count}`;
+    });
+
+    const start = (kind) => () =>
+      model.send({ type: "start", kind, mode: settings.mode, count: settings.count });
+    screen(
+      el("h1", "cla-title", "🇨🇳 Chinese Learning App"),
+      el("h3", "cla-subtitle", "Choose Learning Mode:"),
+      modeSelect,
+      el("h3", "cla-subtitle", "Number of Words:"),
+      slider,
+      countLabel,
+      button("📚 Start Flashcards", "cla-primary", start("flashcards")),
+      button("🎮 Start Matching Game", "cla-success", start("matching")),
+      button("🧩 Confusables Drill", "cla-info", start("confusables")),
+      el("div", "cla-subtitle", `📚 ${model.get("vocabulary_size")} words available`)
+    );
+  }
+
+  function showFlashcard() {
+    const { cards } = session;
+    if (session.index >= cards.length) return showFlashcardResults();
+    const card = cards[session.index];
+
+    const progress = el("div", "cla-progress");
+    const fill = el("div", "cla-progress-fill");
+    fill.style.width = `${((session.index + 1) / cards.length) * 100}%`;
+    progress.appendChild(fill);
+
+    const answer = el("div", "cla-answer cla-hidden", card.answer);
+    const grade = (correct) => () => {
+      model.send({ type: "grade", index: session.index, correct });
+      if (correct) session.correct += 1;
+      session.index += 1;
+      showFlashcard();
+    };
+    const face = el("div", "cla-card");
+    face.append(el("div", "cla-mode", `Mode: ${session.modeText}`), el("div", "cla-question", card.question), answer);
+
+    screen(
+      el("h2", "cla-subtitle", `Flashcard ${session.index + 1} of ${cards.length}`),
+      progress,
+      face,
+      button("Show Answer", "cla-info", () => answer.classList.remove("cla-hidden")),
+      button("✓ Correct", "cla-success", grade(true)),
+      button("✗ Incorrect", "cla-danger", grade(false)),
+      backButton()
+    );
+  }
+
+  function showFlashcardResults() {
+    const total = session.cards.length;
+    const accuracy = total ? ((session.correct / total) * 100).toFixed(1) : "0.0";
+    const card = el("div", "cla-card cla-done");
+    card.append(el("div", "cla-emoji", "🎉"), el("div", "cla-question", `Score: ${session.correct}/${total}`),
+                el("div", "cla-mode", `Accuracy: ${accuracy}%`));
+    screen(
+      el("h1", "cla-title", "📊 Flashcard Results"),
+      card,
+      button("🔄 Try Again", "cla-primary", () => model.send({ type: "restart" })),
+      button("🏠 Main Menu", "cla-info", showStart)
+    );
+  }
+
+  function showMatching() {
+    const current = session;
+    const score = el("div", "cla-score");
+    const updateScore = () =>
+      (score.textContent = `Score: ${model.get("score")} | Pairs Found: ${current.matched.size / 2}/${current.total}`);
+    updateScore();
+
+    const grid = el("div", "cla-grid");
+    let selected = [];
+    let busy = false;
+    session.cards.forEach((card, index) => {
+      const tile = button(card.text, "cla-tile", () => {
+        if (busy || tile.disabled || current.matched.has(index) || selected.includes(index)) return;
+        tile.classList.add("cla-selected");
+        selected.push(index);
+        if (selected.length < 2) return;
+
+        const [a, b] = selected;
+        const matched = session.cards[a].pair_id === session.cards[b].pair_id;
+        model.send({ type: "match", a, b });
+        const tiles = [grid.children[a], grid.children[b]];
+        busy = true;
+        for (const t of tiles) {
+          t.classList.remove("cla-selected");
+          t.classList.add(matched ? "cla-matched" : "cla-mismatch");
+        }
+        setTimeout(() => {
+          busy = false;
+          selected = [];
+          for (const t of tiles) t.classList.remove("cla-mismatch");
+        }, matched ? 600 : 800);
+      });
+      grid.appendChild(tile);
+    });
+
+    // Apply the kernel's board diff: only tiles that became matched change
+    current.applyBoard = () => {
+      const fresh = model.get("matched").filter((index) => !current.matched.has(index));
+      for (const index of fresh) {
+        current.matched.add(index);
+        grid.children[index].classList.add("cla-matched");
+      }
+      updateScore();
+      setTimeout(() => {
+        if (session !== current) return;
+        for (const index of fresh) grid.children[index].disabled = true;
+        if (current.matched.size === current.cards.length) showMatchingResults();
+      }, 600);
+    };
+
+    screen(
+      el("h2", "cla-subtitle", "🎮 Matching Game"),
+      score,
+      el("div", "cla-mode", `Click two cards to match ${session.modeText}`),
+      grid,
+      backButton()
+    );
+  }
+
+  function showMatchingResults() {
+    const card = el("div", "cla-card cla-done");
+    card.append(el("div", "cla-emoji", "🏆"), el("div", "cla-question", `Final Score: ${model.get("score")}`),
+                el("div", "cla-mode", `All ${session.total} pairs matched!`));
+    screen(
+      el("h1", "cla-title", "🎉 Game Complete!"),
+      card,
+      button("🎮 Play Again", "cla-primary", () => model.send({ type: "restart" })),
+      button("🏠 Main Menu", "cla-info", showStart)
+    );
+  }
+
+  model.on("change:session_id", () => {
+    const cards = model.get("cards");
+    if (!cards.length) return showStart();
+    const kind = model.get("kind");
+    const mode = model.get("mode");
+    session = { kind, cards, index: 0, correct: 0, matched: new Set(model.get("matched")),
+                total: kind === "flashcards" ? cards.length : cards.length / 2 };
+    session.modeText = mode.replace("-", " → ").replace("+", " + ");
+    if (kind === "flashcards") showFlashcard();
+    else showMatching();
+  });
+  const applyBoard = () => session && session.applyBoard && session.applyBoard();
+  model.on("change:matched", applyBoard);    // The score always changes along with it
+
+  showStart();
+}
+
+export default { render };
+"""
+
+_CSS = """
+.cla-app { font-family: 'Segoe UI', Arial, sans-serif; max-width: 860px; margin: 0 auto; padding: 20px;
+           display: flex; flex-direction: column; align-items: center; gap: 8px; }
+.cla-title { font-size: 2.2em; color: #2c3e50; margin: 0 0 16px; }
+.cla-subtitle { color: #2c3e50; margin: 4px 0; }
+.cla-select, .cla-slider { width: 300px; }
+.cla-button { border: none; border-radius: 20px; padding: 10px 24px; margin: 4px; color: white;
+              font-size: 1em; font-weight: bold; cursor: pointer; }
+.cla-primary { background: #5b21b6; } .cla-success { background: #0d9488; } .cla-info { background: #1d4ed8; }
+.cla-danger { background: #dc2626; } .cla-warning { background: #64748b; }
+.cla-progress { width: 100%; height: 10px; background: #ecf0f1; border-radius: 5px; overflow: hidden; }
+.cla-progress-fill { height: 100%; background: linear-gradient(90deg, #667eea, #764ba2); transition: width 0.3s ease; }
+.cla-card { width: 100%; box-sizing: border-box; text-align: center; color: white; border-radius: 15px; padding: 30px;
+            background: linear-gradient(135deg, #667eea 0%, #764ba2 100%); }
+.cla-done { background: linear-gradient(135deg, #43e97b 0%, #38f9d7 100%); }
+.cla-mode { font-size: 1.1em; opacity: 0.85; }
+.cla-question { font-size: 2.5em; margin: 20px 0; }
+.cla-answer { font-size: 1.8em; padding-top: 20px; border-top: 2px solid rgba(255,255,255,0.3); }
+.cla-hidden { display: none; }
+.cla-emoji { font-size: 3em; }
+.cla-score { font-size: 1.4em; font-weight: bold; color: #27ae60; }
+.cla-grid { display: grid; grid-template-columns: repeat(4, 180px); gap: 10px; margin: 16px 0; }
+.cla-tile { height: 80px; border: none; border-radius: 10px; color: white; font-size: 1.1em; cursor: pointer;
+            background: linear-gradient(135deg, #f093fb 0%, #f5576c 100%); transition: all 0.2s ease; }
+.cla-tile.cla-selected { background: linear-gradient(135deg, #4facfe 0%, #00f2fe 100%); transform: scale(1.05); }
+.cla-tile.cla-matched { background: linear-gradient(135deg, #43e97b 0%, #38f9d7 100%); }
+.cla-tile.cla-matched:disabled { opacity: 0.2; cursor: default; }
+.cla-tile.cla-mismatch { background: #ef4444; }
+"""
+
+class NotebookLearningApp(anywidget.AnyWidget):
+    """Single-widget notebook UI; the browser owns the screens, the kernel owns the data"""
+
+    _esm = _ESM
+    _css = _CSS
+
+    modes = traitlets.List().tag(sync=True)
+    max_words = traitlets.Int(15).tag(sync=True)
+    vocabulary_size = traitlets.Int(0).tag(sync=True)
+    # One trait per piece of session state, so each change syncs only what changed
+    session_id = traitlets.Int(0).tag(sync=True)
+    kind = traitlets.Unicode("").tag(sync=True)
+    mode = traitlets.Unicode("").tag(sync=True)
+    cards = traitlets.List().tag(sync=True)
+    matched = traitlets.List().tag(sync=True)     # Tiles of the pairs found so far
+    score = traitlets.Int(0).tag(sync=True)
+
+    def __init__(self, vocabulary=None, **kwargs):
+        vocabulary = vocabulary or load_vocabulary()
+        super().__init__(modes=[list(mode) for mode in get_learning_modes()],
+                         max_words=min(20, len(vocabulary)),
+                         vocabulary_size=len(vocabulary), **kwargs)
+        self.vocabulary = vocabulary
+        self.confusion = ConfusionMatrix.load()
+        self.cloze_items = None
+        self.session_ids = itertools.count(1)
+        self.last_start = None
+        self.selected_words = []
+        self.on_msg(self._handle_message)
+
+    def _handle_message(self, widget, content, buffers):
+        """Dispatch a message from the browser"""
+        handlers = {
+            "start": self.start_session,
+            "restart": self.restart_session,
+            "grade": self.grade_flashcard,
+            "match": self.match_result,
+        }
+        handler = handlers.get(content.pop("type", None))
+        if handler:
+            handler(**content)
+
+    def start_session(self, kind, mode, count):
+        """Pick words and send the new session to the browser in one sync"""
+        self.confusion.save()
+        self.last_start = (kind, mode, count)
+        count = max(1, min(int(count), len(self.vocabulary)))
+        if kind == "confusables":
+            self.selected_words = select_confusable_words(self.vocabulary, self.confusion, count)
+        elif mode == CLOZE_MODE and self._cloze_items():
+            self.selected_words = select_cloze_words(self.vocabulary, self.cloze_items, count)
+        else:
+            self.selected_words = random.sample(self.vocabulary, count)
+
+        if kind == "flashcards":
+            cards = []
+            for word in self.selected_words:
+                question, answer = get_question_answer(word, mode)
+                cards.append({"question": question, "answer": answer})
+        else:
+            cards = setup_matching_game(self.selected_words, mode)
+
+        with self.hold_sync():
+            self.kind = "flashcards" if kind == "flashcards" else "matching"
+            self.mode = mode
+            self.cards = cards
+            self.matched = []
+            self.score = 0
+            self.session_id = next(self.session_ids)
+
+    def _cloze_items(self):
+        """The deck's cloze sentences, read from the cache on first use"""
+        if self.cloze_items is None:
+            self.cloze_items = load_cloze_items(self.vocabulary)
+        return self.cloze_items
+
+    def restart_session(self):
+        """Start another session with the same settings"""
+        if self.last_start:
+            self.start_session(*self.last_start)
+
+    def grade_flashcard(self, index, correct):
+        """Record a self-graded flashcard"""
+        if 0 <= index < len(self.selected_words):
+            record_review(self.selected_words[index], correct)
+
+    def match_result(self, a, b):
+        """Score a pair the learner tried to match and learn from mismatches"""
+        cards = self.cards
+        if not (0 <= a < len(cards) and 0 <= b < len(cards)) or a == b:
+            return
+        if a in self.matched or b in self.matched:
+            return
+        pair_a, pair_b = cards[a]["pair_id"], cards[b]["pair_id"]
+        if pair_a == pair_b:
+            with self.hold_sync():
+                self.matched = self.matched + [a, b]
+                self.score += 10
+            if len(self.matched) == len(cards):
+                self.confusion.save()
+        else:
+            self.confusion.record(self.selected_words[pair_a], self.selected_words[pair_b])
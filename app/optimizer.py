@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+optimizer.py - Nightly scheduler parameter fitting for Chinese Learning App
+Fits each learner's FSRS and SM-2 parameters to their own recorded
+Correct/Incorrect history and writes them back for the scheduler.
+
+A learner's reviews are laid out as a cards x reviews matrix so the memory
+model is replayed for all cards at once, and every candidate parameter set of
+a search step is evaluated in the same pass by broadcasting the parameters
+along an extra axis. Learners are fitted in parallel across a process pool.
+
+Usage:
+    python optimizer.py --workers 8
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from review_log import load_reviews
+from scheduler import (SM2_DEFAULT_PARAMS, build_review_matrix, default_parameters, get_scheduler,
+                       save_parameters)
+from storage import list_learners
+
+MIN_REVIEWS = 20
+MAX_REVIEWS_PER_CARD = 64
+MAX_ITERATIONS = 60
+PRIOR_STRENGTH = 10.0
+EPSILON = 1e-6
+
+FSRS_BOUNDS = np.array([
+    (0.1, 100), (0.1, 100), (0.1, 100), (0.1, 100), (1, 10), (0.1, 5), (0.1, 5), (0, 0.5),
+    (0, 3), (0, 0.8), (0.01, 2.5), (0.5, 5), (0.01, 0.2), (0.01, 0.9), (0.01, 2), (0, 1), (1, 6)
+])
+
+SM2_FIT_KEYS = ["initial_ease", "ease_bonus", "ease_penalty", "first_interval", "second_interval"]
+SM2_BOUNDS = np.array([(1.3, 4), (0, 0.5), (0, 0.8), (1, 4), (2, 15)])
+
+def to_model_params(algorithm, vectors):
+    """Turn a (sets x params) array into parameters the scheduler broadcasts over"""
+    columns = vectors.T[:, :, np.newaxis]
+    if algorithm == "fsrs":
+        return columns
+    params = {key: columns[i] for i, key in enumerate(SM2_FIT_KEYS)}
+    params["min_ease"] = SM2_DEFAULT_PARAMS["min_ease"]
+    return params
+
+def log_loss(algorithm, vectors, times, grades, valid):
+    """Mean log-loss of each candidate parameter set over all reviews"""
+    init_state, review, predict_recall = get_scheduler(algorithm)
+    params = to_model_params(algorithm, vectors)
+    n_cards, n_reviews = times.shape
+
+    state = init_state(n_cards)
+    total = np.zeros(len(vectors))
+    for k in range(n_reviews):
+        is_valid = valid[:, k]
+        correct = grades[:, k]
+        if k == 0:
+            elapsed = np.zeros(n_cards)
+        else:
+            elapsed = np.maximum(times[:, k] - times[:, k - 1], 0)
+            recall = np.clip(predict_recall(state, elapsed, params), EPSILON, 1 - EPSILON)
+            likelihood = np.where(correct, np.log(recall), np.log(1 - recall))
+            total -= np.where(is_valid, likelihood, 0).sum(axis=-1)
+
+        new_state, _ = review(state, elapsed, correct, params)
+        state = {key: np.where(is_valid, new_state[key], state[key]) for key in new_state}
+
+    # The first review of a card has nothing to predict
+    predicted = max(int(valid[:, 1:].sum()), 1)
+    return total / predicted
+
+def get_initial_vector(algorithm):
+    """Default parameters as a flat vector with their bounds"""
+    if algorithm == "fsrs":
+        return default_parameters("fsrs"), FSRS_BOUNDS
+    defaults = default_parameters("sm2")
+    return np.array([defaults[key] for key in SM2_FIT_KEYS], dtype=float), SM2_BOUNDS
+
+def fit_parameters(algorithm, times, grades, valid, max_iterations=MAX_ITERATIONS):
+    """Batched compass search: try +/- one step on every parameter per pass"""
+    start, bounds = get_initial_vector(algorithm)
+    lower, upper = bounds[:, 0], bounds[:, 1]
+    span = upper - lower
+    prior = PRIOR_STRENGTH / max(int(valid.sum()), 1)
+
+    def objective(vectors):
+        penalty = prior * (((vectors - start) / span) ** 2).sum(axis=1)
+        return log_loss(algorithm, vectors, times, grades, valid) + penalty
+
+    best = start.copy()
+    best_loss = objective(best[np.newaxis])[0]
+    initial_loss = best_loss
+    step = 0.1 * span
+    for _ in range(max_iterations):
+        offsets = np.concatenate((np.diag(step), -np.diag(step)))
+        candidates = np.clip(best + offsets, lower, upper)
+        losses = objective(candidates)
+        winner = int(np.argmin(losses))
+        if losses[winner] < best_loss - 1e-9:
+            best, best_loss = candidates[winner], losses[winner]
+        else:
+            step = step / 2
+            if np.all(step < 1e-3 * span):
+                break
+
+    if algorithm == "sm2":
+        params = dict(default_parameters("sm2"))
+        params.update({key: float(best[i]) for i, key in enumerate(SM2_FIT_KEYS)})
+    else:
+        params = best
+    return params, float(initial_loss), float(best_loss)
+
+def fit_learner(learner_id, algorithms=("fsrs", "sm2"), min_reviews=MIN_REVIEWS):
+    """Fit and store every algorithm's parameters for one learner"""
+    words, days, correct = load_reviews(learner_id)
+    summary = {"learner": learner_id, "reviews": int(words.size), "fitted": {}}
+    if words.size < min_reviews:
+        return summary
+
+    times, grades, valid = build_review_matrix(words, days, correct, MAX_REVIEWS_PER_CARD)
+    for algorithm in algorithms:
+        params, loss_before, loss_after = fit_parameters(algorithm, times, grades, valid)
+        save_parameters(algorithm, params, learner_id, reviews=summary["reviews"],
+                        log_loss=loss_after, default_log_loss=loss_before)
+        summary["fitted"][algorithm] = (loss_before, loss_after)
+    return summary
+
+def optimize_learners(learner_ids=None, algorithms=("fsrs", "sm2"), workers=None,
+                      min_reviews=MIN_REVIEWS):
+    """Fit every learner in parallel and return their summaries"""
+    learner_ids = list(learner_ids or list_learners("reviews"))
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(learner_ids) // (workers * 8))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        jobs = executor.map(fit_learner, learner_ids, [tuple(algorithms)] * len(learner_ids),
+                            [min_reviews] * len(learner_ids), chunksize=chunksize)
+        return list(jobs)
+
+def main():
+    """Command line entry point for the nightly batch"""
+    parser = argparse.ArgumentParser(description="Fit scheduler parameters to recorded reviews")
+    parser.add_argument("--learners", nargs="*", help="learner ids (default: all with reviews)")
+    parser.add_argument("--algorithms", nargs="+", choices=["fsrs", "sm2"], default=["fsrs", "sm2"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--min-reviews", type=int, default=MIN_REVIEWS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    summaries = optimize_learners(args.learners, args.algorithms, args.workers, args.min_reviews)
+    fitted = [summary for summary in summaries if summary["fitted"]]
+
+    print(f"🧠 Fitted {len(fitted)} of {len(summaries)} learners "
+          f"in {time.perf_counter() - start:.1f}s")
+    for algorithm in args.algorithms:
+        gains = [summary["fitted"][algorithm] for summary in fitted]
+        if gains:
+            before = np.mean([loss for loss, _ in gains])
+            after = np.mean([loss for _, loss in gains])
+            print(f"   {algorithm.upper()}: mean log-loss {before:.4f} → {after:.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+"""
+pinyin.py - Pinyin syllable helpers for Chinese Learning App
+Converts tone-marked pinyin such as "jīntiān" or "nǐ hǎo" into toned
+syllables ("jin1", "tian1") by stripping tone marks and splitting run-together
+syllables against the table of valid Mandarin syllables.
+
+Words can also be encoded as tuples of small integers, one per syllable:
+the syllable's id among the ~410 base syllables, shifted left by
+SYLLABLE_SHIFT, an ERHUA flag for a trailing -r ("yìdiǎnr", "nǎr"), and
+the tone in the low TONE_BITS. Encoded words compare with integer operations, and turning
+codes back into tone marks, tone numbers or plain syllables is a table
+lookup, so a whole deck normalizes in one pass.
+
+Usage:
+    python pinyin.py --deck deck.py --style numbers    # print every word normalized
+"""
+
+import argparse
+import re
+import sys
+import time
+import unicodedata
+from functools import lru_cache
+
+# Marked vowel -> (plain vowel, tone)
+TONE_MARKS = {
+    "ā": ("a", 1), "á": ("a", 2), "ǎ": ("a", 3), "à": ("a", 4),
+    "ē": ("e", 1), "é": ("e", 2), "ě": ("e", 3), "è": ("e", 4),
+    "ī": ("i", 1), "í": ("i", 2), "ǐ": ("i", 3), "ì": ("i", 4),
+    "ō": ("o", 1), "ó": ("o", 2), "ǒ": ("o", 3), "ò": ("o", 4),
+    "ū": ("u", 1), "ú": ("u", 2), "ǔ": ("u", 3), "ù": ("u", 4),
+    "ǖ": ("ü", 1), "ǘ": ("ü", 2), "ǚ": ("ü", 3), "ǜ": ("ü", 4),
+}
+NEUTRAL_TONE = 5
+
+# Every syllable of standard Mandarin, without tones
+SYLLABLES = frozenset("""
+a ai an ang ao
+ba bai ban bang bao bei ben beng bi bian biao bie bin bing bo bu
+ca cai can cang cao ce cen ceng cha chai chan chang chao che chen cheng chi chong chou
+chu chua chuai chuan chuang chui chun chuo ci cong cou cu cuan cui cun cuo
+da dai dan dang dao de dei den deng di dia dian diao die ding diu dong dou du duan dui dun duo
+e ei en eng er
+fa fan fang fei fen feng fo fou fu
+ga gai gan gang gao ge gei gen geng gong gou gu gua guai guan guang gui gun guo
+ha hai han hang hao he hei hen heng hong hou hu hua huai huan huang hui hun huo
+ji jia jian jiang jiao jie jin jing jiong jiu ju juan jue jun
+ka kai kan kang kao ke kei ken keng kong kou ku kua kuai kuan kuang kui kun kuo
+la lai lan lang lao le lei leng li lia lian liang liao lie lin ling liu lo long lou
+lu luan lun luo lü lüe
+ma mai man mang mao me mei men meng mi mian miao mie min ming miu mo mou mu
+na nai nan nang nao ne nei nen neng ni nian niang niao nie nin ning niu nong nou
+nu nuan nuo nü nüe
+o ou
+pa pai pan pang pao pei pen peng pi pian piao pie pin ping po pou pu
+qi qia qian qiang qiao qie qin qing qiong qiu qu quan que qun
+ran rang rao re ren reng ri rong rou ru rua ruan rui run ruo
+sa sai san sang sao se sen seng sha shai shan shang shao she shei shen sheng shi shou
+shu shua shuai shuan shuang shui shun shuo si song sou su suan sui sun suo
+ta tai tan tang tao te teng ti tian tiao tie ting tong tou tu tuan tui tun tuo
+wa wai wan wang wei wen weng wo wu
+xi xia xian xiang xiao xie xin xing xiong xiu xu xuan xue xun
+ya yan yang yao ye yi yin ying yo yong you yu yuan yue yun
+za zai zan zang zao ze zei zen zeng zha zhai zhan zhang zhao zhe zhei zhen zheng zhi
+zhong zhou zhu zhua zhuai zhuan zhuang zhui zhun zhuo zi zong zou zu zuan zui zun zuo
+""".split())
+MAX_SYLLABLE_LENGTH = max(len(syllable) for syllable in SYLLABLES)
+
+# Syllable codes: syllable id << SYLLABLE_SHIFT | ERHUA | tone (NO_TONE when none was given).
+# code >> TONE_BITS is the syllable with its erhua, so toneless comparisons keep the -r
+SYLLABLE_LIST = tuple(sorted(SYLLABLES))
+SYLLABLE_IDS = {syllable: syllable_id for syllable_id, syllable in enumerate(SYLLABLE_LIST)}
+TONE_BITS = 3
+TONE_MASK = (1 << TONE_BITS) - 1
+ERHUA = 1 << TONE_BITS
+SYLLABLE_SHIFT = TONE_BITS + 1
+NO_TONE = 0
+STYLES = ["marks", "numbers", "plain"]
+
+PLAIN_TABLE = str.maketrans({**{marked: plain for marked, (plain, _) in TONE_MARKS.items()}, "v": "ü"})
+TONE_OF = {marked: tone for marked, (_, tone) in TONE_MARKS.items()}
+MARKED_VOWEL = {(plain, tone): marked for marked, (plain, tone) in TONE_MARKS.items()}
+TOKEN = re.compile(r"[^\W\d_]+|\d")
+
+def strip_tones(text):
+    """Lower-case text without tone marks, plus the tone carried by each character"""
+    plain, tones = [], []
+    for char in unicodedata.normalize("NFC", text.lower()):
+        base, tone = TONE_MARKS.get(char, (char, None))
+        plain.append(base)
+        tones.append(tone)
+    return "".join(plain), tones
+
+@lru_cache(maxsize=1 << 16)
+def _split_run(run, erhua=False):
+    """Split a run of letters into syllables, preferring long ones; None if impossible
+
+    With erhua, a syllable may carry a trailing "r" (its span includes it).
+    Cached: decks repeat the same runs ("shi", "zhongguo") over and over.
+    """
+    length = len(run)
+    dead_ends = set()
+
+    def split_from(start):
+        # Longest syllable first, backtracking only where the rest cannot be split
+        if start == length:
+            return ()
+        if start in dead_ends:
+            return None
+        for end in range(min(length, start + MAX_SYLLABLE_LENGTH), start, -1):
+            if run[start:end] in SYLLABLES:
+                rest = split_from(end)
+                if rest is not None:
+                    return ((start, end),) + rest
+                if erhua and run[end:end + 1] == "r":
+                    rest = split_from(end + 1)
+                    if rest is not None:
+                        return ((start, end + 1),) + rest
+        dead_ends.add(start)
+        return None
+
+    return split_from(0)
+
+@lru_cache(maxsize=1 << 16)
+def _encode_run(run, default_tone):
+    """Codes for one run of letters as written, e.g. "xuéxí" (None if not pinyin)"""
+    plain = run.translate(PLAIN_TABLE)
+    # Erhua only when the letters do not split without it ("er" is a syllable of its own)
+    spans = _split_run(plain) or _split_run(plain, erhua=True)
+    if spans is None:
+        return None
+    codes = []
+    for start, end in spans:
+        tone = next((TONE_OF[char] for char in run[start:end] if char in TONE_OF), default_tone)
+        syllable = plain[start:end]
+        if syllable in SYLLABLE_IDS:
+            codes.append(SYLLABLE_IDS[syllable] << SYLLABLE_SHIFT | tone)
+        else:
+            codes.append(SYLLABLE_IDS[syllable[:-1]] << SYLLABLE_SHIFT | ERHUA | tone)
+    return codes
+
+def encode(pinyin, default_tone=NEUTRAL_TONE):
+    """Pinyin -> tuple of syllable codes, or None if it is not valid pinyin
+
+    Accepts tone marks ("xuéxí") and tone numbers ("xue2xi2", "dian3r" or
+    "dianr3"); syllables with neither get default_tone (None stores NO_TONE,
+    "no tone typed"). A trailing -r is kept as the syllable's ERHUA flag.
+    """
+    text = pinyin.lower()
+    if not text.isascii():
+        text = unicodedata.normalize("NFC", text)
+    default_tone = default_tone or NO_TONE
+    codes = []
+    run_end = tone_end = -1
+    for token in TOKEN.finditer(text):
+        run = token.group()
+        if run.isdigit():
+            if token.start() == run_end and run in "12345":
+                # A tone number applies to the syllable just before it
+                codes[-1] = codes[-1] & ~TONE_MASK | int(run)
+                tone_end = token.end()
+            continue
+        if run == "r" and token.start() == tone_end and not codes[-1] & ERHUA:
+            # "dian3r": the erhua comes after the tone number
+            codes[-1] |= ERHUA
+            continue
+        run_codes = _encode_run(run, default_tone)
+        if run_codes is None:
+            return None
+        codes.extend(run_codes)
+        run_end = token.end()
+    return tuple(codes)
+
+def split_syllables(pinyin, default_tone=NEUTRAL_TONE):
+    """Pinyin -> [(syllable, tone)], or None if it is not valid pinyin
+
+    Accepts tone marks ("xuéxí") and tone numbers ("xue2xi2"); syllables with
+    neither get default_tone (pass None to tell "no tone typed" from neutral).
+    Erhua is dropped: "yìdiǎnr" gives the base syllables yi and dian.
+    """
+    codes = encode(pinyin, default_tone)
+    if codes is None:
+        return None
+    return [(SYLLABLE_LIST[code >> SYLLABLE_SHIFT], (code & TONE_MASK) or None) for code in codes]
+
+def syllable_of(code):
+    """The plain syllable of a code, with its -r if it has one"""
+    return STYLE_TABLES["plain"][code & ~TONE_MASK]
+
+def is_erhua(code):
+    """Whether a syllable code carries a trailing -r"""
+    return bool(code & ERHUA)
+
+def tone_of(code):
+    """The tone of a code (NO_TONE if none was given)"""
+    return code & TONE_MASK
+
+def toneless(codes):
+    """Codes with the tones dropped: equal for words that differ only in tone"""
+    return tuple(code >> TONE_BITS for code in codes)
+
+def _mark_syllable(syllable, tone):
+    """Put the tone mark on the right vowel: a or e, the o of ou, else the last vowel"""
+    if tone not in (1, 2, 3, 4):
+        return syllable
+    if "a" in syllable:
+        position = syllable.index("a")
+    elif "e" in syllable:
+        position = syllable.index("e")
+    elif "ou" in syllable:
+        position = syllable.index("o")
+    else:
+        position = max(syllable.rfind(vowel) for vowel in "iouü")
+    return syllable[:position] + MARKED_VOWEL[syllable[position], tone] + syllable[position + 1:]
+
+def _erhua_suffix(code):
+    return "r" if code & ERHUA else ""
+
+# Code -> syllable text in each style, so decoding never computes anything
+_CODES = range(len(SYLLABLE_LIST) << SYLLABLE_SHIFT)
+STYLE_TABLES = {
+    "marks": [_mark_syllable(SYLLABLE_LIST[code >> SYLLABLE_SHIFT], code & TONE_MASK) + _erhua_suffix(code)
+              for code in _CODES],
+    "numbers": [SYLLABLE_LIST[code >> SYLLABLE_SHIFT] + _erhua_suffix(code)
+                + (str(code & TONE_MASK) if code & TONE_MASK else "") for code in _CODES],
+    "plain": [SYLLABLE_LIST[code >> SYLLABLE_SHIFT] + _erhua_suffix(code) for code in _CODES],
+}
+
+def decode(codes, style="marks", separator=" "):
+    """Codes -> pinyin text in a style ("marks", "numbers" or "plain")"""
+    table = STYLE_TABLES[style]
+    return separator.join(table[code] for code in codes)
+
+def normalize(pinyin, style="marks", separator=" "):
+    """Pinyin in one consistent form, e.g. "xuéxí" -> "xué xí" or "xue2 xi2" (None if invalid)"""
+    codes = encode(pinyin)
+    return None if codes is None else decode(codes, style, separator)
+
+def encode_deck(vocabulary):
+    """Codes for every word of a deck, in order (None for pinyin that does not parse)"""
+    return [encode(word["pinyin"]) for word in vocabulary]
+
+def to_numbered(pinyin):
+    """Tone-marked pinyin -> numbered syllables, e.g. "nǐ hǎo" -> ["ni3", "hao3"]"""
+    codes = encode(pinyin)
+    if codes is None:
+        return None
+    return [STYLE_TABLES["numbers"][code] for code in codes]
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Normalize a deck's pinyin")
+    parser.add_argument("--deck", help="vocabulary module (default: the app's deck)")
+    parser.add_argument("--style", choices=STYLES, default="marks")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="report conversion speed instead of printing the words")
+    args = parser.parse_args()
+
+    from vocabulary import load_vocabulary
+
+    vocabulary = load_vocabulary(args.deck)
+    start = time.perf_counter()
+    codes = encode_deck(vocabulary)
+    table = STYLE_TABLES[args.style]
+    normalized = [None if word_codes is None else " ".join(table[code] for code in word_codes)
+                  for word_codes in codes]
+    elapsed = time.perf_counter() - start
+    invalid = [word["pinyin"] for word, word_codes in zip(vocabulary, codes) if word_codes is None]
+
+    if not args.benchmark:
+        for word, text in zip(vocabulary, normalized):
+            print(f"{word['hanzi']}\t{text if text is not None else '?'}")
+    print(f"🔤 {len(vocabulary):,} words normalized in {elapsed * 1000:.0f} ms, "
+          f"{len(invalid):,} not valid pinyin", file=sys.stderr)
+    for pinyin in invalid[:10]:
+        print(f"   ⚠️ {pinyin}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
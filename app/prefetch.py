@@ -0,0 +1,125 @@
+"""
+prefetch.py - Background flashcard prefetching for Chinese Learning App
+While the learner looks at one card, a worker thread prepares the next few
+cards of the session (question/answer projection, script detection, font
+sizes and anything added later such as audio or example lookups). Finished
+cards are handed back to the Tk thread through a queue polled with
+root.after, so advancing only swaps in precomputed content.
+"""
+
+import queue
+import threading
+
+from tracing import span
+
+DEFAULT_DEPTH = 3
+POLL_MS = 10
+
+class FlashcardPrefetcher:
+    """Prepares upcoming flashcards of the current session off the Tk thread
+
+    Each step is called as step(word, mode, content) on the worker thread and
+    fills in keys of the content dict; steps must not touch Tk widgets.
+    """
+
+    def __init__(self, root, steps, depth=DEFAULT_DEPTH):
+        self.root = root
+        self.steps = list(steps)
+        self.depth = depth
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.ready = {}            # card index -> prepared content
+        self.pending = set()       # card indexes requested but not back yet
+        self.session = 0           # bumped on every new session to drop stale results
+        self.words = []
+        self.mode = ""
+        self.worker = None
+        self.poll_id = None
+
+    def add_step(self, step):
+        """Add a preparation step run after the existing ones"""
+        self.steps.append(step)
+
+    def replace_step(self, old, new):
+        """Put a step in the place of another, e.g. when its data source is reopened"""
+        # A new list, so a card being prepared finishes with the steps it started with
+        self.steps = [new if step is old else step for step in self.steps]
+
+    def prepare(self, word, mode):
+        """Run every step for one card (on whichever thread calls it)"""
+        content = {}
+        for step in self.steps:
+            step(word, mode, content)
+        return content
+
+    def start_session(self, words, mode):
+        """Forget the previous session and prefetch the cards after the first one"""
+        self.session += 1
+        self.words = list(words)
+        self.mode = mode
+        self.ready.clear()
+        self.pending.clear()
+        self.advance(0)
+
+    def advance(self, current_index):
+        """Make sure the depth cards after current_index are ready or on their way"""
+        for index in list(self.ready):
+            if index <= current_index:
+                del self.ready[index]
+        last = min(current_index + self.depth, len(self.words) - 1)
+        for index in range(current_index + 1, last + 1):
+            if index not in self.ready and index not in self.pending:
+                self.pending.add(index)
+                self.requests.put((self.session, index, self.words[index], self.mode))
+        if self.pending:
+            self._ensure_running()
+
+    def take(self, index):
+        """Content for a card: prefetched if ready, otherwise prepared right now"""
+        self._drain()
+        content = self.ready.pop(index, None)
+        if content is None:
+            content = self.prepare(self.words[index], self.mode)
+        return content
+
+    def _ensure_running(self):
+        """Start the worker thread and the result poll when needed"""
+        if self.worker is None:
+            self.worker = threading.Thread(target=self._work, name="flashcard-prefetch", daemon=True)
+            self.worker.start()
+        if self.poll_id is None:
+            self.poll_id = self.root.after(POLL_MS, self._poll)
+
+    def _work(self):
+        """Worker thread: prepare requested cards forever"""
+        while True:
+            session, index, word, mode = self.requests.get()
+            if session != self.session:
+                continue  # The learner already left that session
+            try:
+                with span("prefetch_flashcard"):
+                    content = self.prepare(word, mode)
+            except Exception:
+                content = None  # take() will prepare it on the Tk thread instead
+            self.results.put((session, index, content))
+
+    def _drain(self):
+        """Move finished cards from the worker into the ready cache"""
+        while True:
+            try:
+                session, index, content = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if session != self.session:
+                continue
+            self.pending.discard(index)
+            if content is not None:
+                self.ready[index] = content
+
+    def _poll(self):
+        """Tk thread: collect results until nothing is pending"""
+        self._drain()
+        if self.pending:
+            self.poll_id = self.root.after(POLL_MS, self._poll)
+        else:
+            self.poll_id = None
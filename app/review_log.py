@@ -0,0 +1,115 @@
+"""
+review_log.py - Append-only learning event log for Chinese Learning App
+Each learner has one JSON-lines file of events ("review" for a flashcard
+graded Correct/Incorrect, "match" for a pair picked in the matching game).
+Lines are only ever appended, each with an increasing sequence number, so
+the file doubles as a replayable history. Events synced from the learner's
+other devices (see sync.py) carry the "device" and "origin_seq" they were
+recorded with.
+"""
+
+import json
+import os
+import threading
+import time
+
+from storage import get_data_dir, get_learner_id
+
+_next_seq = {}
+_lock = threading.Lock()    # The app logs on the Tk thread while a sync may append on another
+
+def get_log_path(learner_id=None):
+    """Path of a learner's event log"""
+    return os.path.join(get_data_dir("reviews"), f"{learner_id or get_learner_id()}.jsonl")
+
+def read_events(learner_id=None, event_type=None):
+    """Iterate over a learner's logged events, oldest first"""
+    path = get_log_path(learner_id)
+    if not os.path.exists(path):
+        return
+    with open(path, encoding="utf-8") as log_file:
+        for line in log_file:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                event = json.loads(line)
+            except ValueError:
+                continue  # Torn write from a crash, skip it
+            if event_type is None or event.get("type") == event_type:
+                yield event
+
+def _load_next_seq(learner_id):
+    """Make sure the learner's next sequence number is known"""
+    if learner_id not in _next_seq:
+        _next_seq[learner_id] = max((event.get("seq", 0) for event in read_events(learner_id)), default=0) + 1
+
+def record_event(event_type, learner_id=None, timestamp=None, **fields):
+    """Append one event to the learner's log and return it"""
+    learner_id = learner_id or get_learner_id()
+    _load_next_seq(learner_id)
+
+    with _lock:
+        event = {"seq": _next_seq[learner_id], "ts": timestamp or time.time(), "type": event_type}
+        event.update(fields)
+        with open(get_log_path(learner_id), "a", encoding="utf-8") as log_file:
+            log_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+        _next_seq[learner_id] += 1
+    return event
+
+def record_review(word, correct, learner_id=None, timestamp=None):
+    """Log a flashcard graded Correct/Incorrect"""
+    return record_event("review", learner_id, timestamp, word=word["hanzi"], correct=bool(correct))
+
+def record_match(word, other, learner_id=None, timestamp=None):
+    """Log a pair picked in the matching game (other is the word it was paired with)"""
+    return record_event("match", learner_id, timestamp, word=word["hanzi"], other=other["hanzi"],
+                        correct=word["hanzi"] == other["hanzi"])
+
+def record_reviews(reviews, learner_id=None):
+    """Append many (hanzi, correct, timestamp, extra fields) reviews in one write; returns the count"""
+    learner_id = learner_id or get_learner_id()
+    _load_next_seq(learner_id)
+    count = 0
+    with _lock, open(get_log_path(learner_id), "a", encoding="utf-8") as log_file:
+        for hanzi, correct, timestamp, fields in reviews:
+            event = {"seq": _next_seq[learner_id], "ts": timestamp, "type": "review",
+                     "word": hanzi, "correct": bool(correct)}
+            event.update(fields)
+            log_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            _next_seq[learner_id] += 1
+            count += 1
+    return count
+
+def append_events(events, learner_id=None):
+    """Append events recorded elsewhere (keeping their fields and timestamps) under new seqs; returns the count"""
+    learner_id = learner_id or get_learner_id()
+    _load_next_seq(learner_id)
+    count = 0
+    with _lock, open(get_log_path(learner_id), "a", encoding="utf-8") as log_file:
+        for event in events:
+            event = {"seq": _next_seq[learner_id], **{key: value for key, value in event.items() if key != "seq"}}
+            log_file.write(json.dumps(event, ensure_ascii=False) + "\n")
+            _next_seq[learner_id] += 1
+            count += 1
+    return count
+
+def load_known_words(learner_id=None):
+    """Hanzi of the words whose latest review was graded Correct"""
+    latest = {}
+    for event in read_events(learner_id, "review"):
+        # By timestamp: events synced from other devices are appended out of order
+        if event["word"] not in latest or event["ts"] >= latest[event["word"]][0]:
+            latest[event["word"]] = (event["ts"], event["correct"])
+    return {word for word, (_, correct) in latest.items() if correct}
+
+def load_reviews(learner_id=None):
+    """Load a learner's reviews as (words, days, correct) NumPy arrays"""
+    import numpy as np  # Deferred so the app can log reviews without loading NumPy
+
+    words, days, correct = [], [], []
+    for event in read_events(learner_id, "review"):
+        words.append(event["word"])
+        days.append(event["ts"] / 86400.0)
+        correct.append(event["correct"])
+    return np.array(words, dtype=object), np.array(days), np.array(correct, dtype=bool)
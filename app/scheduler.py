@@ -0,0 +1,303 @@
+"""
+scheduler.py - Spaced repetition scheduling for Chinese Learning App
+Vectorized SM-2 and FSRS schedulers that operate on NumPy arrays of card states,
+so the same code drives a single learner's session or a whole simulated cohort.
+"""
+
+import json
+import os
+import random
+import time
+
+import numpy as np
+
+from storage import get_data_dir, get_learner_id
+
+# FSRS forgetting curve constants (FSRS-4.5)
+FSRS_DECAY = -0.5
+FSRS_FACTOR = 19 / 81
+
+# Default FSRS-4.5 weights
+FSRS_DEFAULT_WEIGHTS = np.array([
+    0.4872, 1.4003, 3.7145, 13.8206, 5.1618, 1.2298, 0.8975, 0.031,
+    1.6474, 0.1367, 1.0461, 2.1072, 0.0793, 0.3246, 1.587, 0.2272, 2.8755
+])
+
+# Default SM-2 parameters (Anki-style ease penalty on lapses)
+SM2_DEFAULT_PARAMS = {
+    "initial_ease": 2.5,
+    "ease_bonus": 0.0,
+    "ease_penalty": 0.2,
+    "min_ease": 1.3,
+    "first_interval": 1.0,
+    "second_interval": 6.0,
+}
+
+DEFAULT_RETENTION = 0.9
+MAX_INTERVAL = 36500
+DEFAULT_ALGORITHM = "fsrs"
+SECONDS_PER_DAY = 86400.0
+
+# The app only records Correct/Incorrect, which map to FSRS "Again" and "Good"
+GRADE_AGAIN = 1
+GRADE_GOOD = 3
+
+def get_algorithms():
+    """Return available scheduling algorithms"""
+    return [
+        ("SM-2", "sm2"),
+        ("FSRS", "fsrs")
+    ]
+
+def default_parameters(algorithm):
+    """Get a fresh copy of the default parameters for an algorithm"""
+    if algorithm == "sm2":
+        return dict(SM2_DEFAULT_PARAMS)
+    if algorithm == "fsrs":
+        return FSRS_DEFAULT_WEIGHTS.copy()
+    raise ValueError(f"Unknown scheduling algorithm: {algorithm}")
+
+def get_parameters_path(learner_id=None):
+    """Path of a learner's fitted scheduler parameters"""
+    return os.path.join(get_data_dir("params"), f"{learner_id or get_learner_id()}.json")
+
+def load_parameters(algorithm, learner_id=None):
+    """Load a learner's fitted parameters, falling back to the defaults"""
+    try:
+        with open(get_parameters_path(learner_id), encoding="utf-8") as params_file:
+            fitted = json.load(params_file)[algorithm]["params"]
+    except (OSError, ValueError, KeyError):
+        return default_parameters(algorithm)
+    if algorithm == "fsrs":
+        return np.array(fitted, dtype=float)
+    return fitted
+
+def read_parameters_file(learner_id=None):
+    """Everything stored for a learner: {algorithm: {"params", "fitted_at", stats...}} ({} if nothing)"""
+    try:
+        with open(get_parameters_path(learner_id), encoding="utf-8") as params_file:
+            return json.load(params_file)
+    except (OSError, ValueError):
+        return {}
+
+def write_parameters_file(stored, learner_id=None):
+    """Replace a learner's stored parameters"""
+    path = get_parameters_path(learner_id)
+    # Write atomically so the app never reads a half-written file
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as params_file:
+        json.dump(stored, params_file, indent=2)
+    os.replace(temp_path, path)
+
+def save_parameters(algorithm, params, learner_id=None, **stats):
+    """Write fitted parameters back for the scheduler to pick up"""
+    stored = read_parameters_file(learner_id)
+    if isinstance(params, np.ndarray):
+        params = params.tolist()
+    stored[algorithm] = dict(stats, params=params, fitted_at=time.time())
+    write_parameters_file(stored, learner_id)
+
+def forgetting_curve(elapsed, stability):
+    """Probability of recall after elapsed days for a given FSRS stability"""
+    return (1 + FSRS_FACTOR * elapsed / stability) ** FSRS_DECAY
+
+def sm2_init(n):
+    """Create the initial SM-2 state for n new cards"""
+    return {
+        "interval": np.zeros(n),
+        "ease": np.full(n, SM2_DEFAULT_PARAMS["initial_ease"]),
+        "reps": np.zeros(n, dtype=np.int32),
+        "lapses": np.zeros(n, dtype=np.int32),
+    }
+
+def sm2_review(state, elapsed, correct, params=None):
+    """Apply one review to every card and return (new_state, next_interval)"""
+    params = params or SM2_DEFAULT_PARAMS
+    # A lapse also resets reps, so only cards never failed or passed are new
+    is_new = (state["reps"] == 0) & (state["lapses"] == 0)
+    ease = np.where(is_new, params["initial_ease"], state["ease"])
+    ease = np.where(correct, ease + params["ease_bonus"], ease - params["ease_penalty"])
+    ease = np.maximum(ease, params["min_ease"])
+
+    reps = np.where(correct, state["reps"] + 1, 0)
+    interval = np.where(reps <= 1, params["first_interval"],
+                        np.where(reps == 2, params["second_interval"],
+                                 state["interval"] * ease))
+    interval = np.clip(np.round(interval), 1, MAX_INTERVAL)
+
+    lapses = np.where(correct, state["lapses"], state["lapses"] + 1)
+    new_state = {"interval": interval, "ease": ease, "reps": reps.astype(np.int32),
+                 "lapses": lapses.astype(np.int32)}
+    return new_state, interval.astype(np.int32)
+
+def sm2_predict_recall(state, elapsed, params=None):
+    """SM-2 assumes 90% recall when a card comes due; extrapolate from there"""
+    interval = np.maximum(state["interval"], 1)
+    return DEFAULT_RETENTION ** (elapsed / interval)
+
+def fsrs_init(n):
+    """Create the initial FSRS state for n new cards"""
+    return {
+        "stability": np.zeros(n),
+        "difficulty": np.zeros(n),
+        "reps": np.zeros(n, dtype=np.int32),
+    }
+
+def fsrs_next_interval(stability, retention=DEFAULT_RETENTION):
+    """Interval in days at which recall drops to the requested retention"""
+    interval = stability / FSRS_FACTOR * (retention ** (1 / FSRS_DECAY) - 1)
+    return np.clip(np.round(interval), 1, MAX_INTERVAL).astype(np.int32)
+
+def fsrs_review(state, elapsed, correct, weights=None, retention=DEFAULT_RETENTION):
+    """Apply one review to every card and return (new_state, next_interval)"""
+    w = FSRS_DEFAULT_WEIGHTS if weights is None else weights
+    grade = np.where(correct, GRADE_GOOD, GRADE_AGAIN)
+    is_new = state["reps"] == 0
+
+    # First review: stability and difficulty come straight from the grade
+    init_stability = np.where(correct, w[GRADE_GOOD - 1], w[GRADE_AGAIN - 1])
+    init_difficulty = w[4] - (grade - 3) * w[5]
+
+    # Later reviews: mean-reverting difficulty, stability grows on recall and
+    # shrinks on a lapse depending on how much had been forgotten
+    old_stability = np.maximum(state["stability"], 0.01)
+    old_difficulty = np.maximum(state["difficulty"], 1)
+    retrievability = forgetting_curve(elapsed, old_stability)
+
+    difficulty = old_difficulty - w[6] * (grade - 3)
+    difficulty = w[7] * w[4] + (1 - w[7]) * difficulty
+
+    recall_stability = old_stability * (
+        1 + np.exp(w[8]) * (11 - old_difficulty) * old_stability ** -w[9]
+        * (np.exp((1 - retrievability) * w[10]) - 1)
+    )
+    forget_stability = (w[11] * old_difficulty ** -w[12]
+                        * ((old_stability + 1) ** w[13] - 1)
+                        * np.exp((1 - retrievability) * w[14]))
+    stability = np.where(correct, recall_stability,
+                         np.minimum(forget_stability, old_stability))
+
+    stability = np.where(is_new, init_stability, stability)
+    difficulty = np.clip(np.where(is_new, init_difficulty, difficulty), 1, 10)
+
+    new_state = {
+        "stability": np.clip(stability, 0.01, MAX_INTERVAL),
+        "difficulty": difficulty,
+        "reps": (state["reps"] + 1).astype(np.int32),
+    }
+    return new_state, fsrs_next_interval(new_state["stability"], retention)
+
+def fsrs_predict_recall(state, elapsed, weights=None):
+    """Predicted recall probability for each card after elapsed days"""
+    return forgetting_curve(elapsed, np.maximum(state["stability"], 0.01))
+
+SCHEDULERS = {
+    "sm2": (sm2_init, sm2_review, sm2_predict_recall),
+    "fsrs": (fsrs_init, fsrs_review, fsrs_predict_recall),
+}
+
+def get_scheduler(algorithm):
+    """Return the (init, review, predict_recall) functions for an algorithm"""
+    try:
+        return SCHEDULERS[algorithm]
+    except KeyError:
+        raise ValueError(f"Unknown scheduling algorithm: {algorithm}")
+
+def build_review_matrix(words, days, correct, max_reviews=None):
+    """Group reviews by card into padded (cards x reviews) arrays, one row per np.unique(words)"""
+    codes = np.unique(words, return_inverse=True)[1].ravel()
+    order = np.lexsort((days, codes))
+    codes, days, correct = codes[order], days[order], correct[order]
+
+    counts = np.bincount(codes)
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    position = np.arange(codes.size) - np.repeat(starts, counts)
+    max_reviews = max_reviews or int(counts.max())
+    keep = position < max_reviews
+
+    shape = (counts.size, min(int(counts.max()), max_reviews))
+    times = np.zeros(shape)
+    grades = np.zeros(shape, dtype=bool)
+    valid = np.zeros(shape, dtype=bool)
+    times[codes[keep], position[keep]] = days[keep]
+    grades[codes[keep], position[keep]] = correct[keep]
+    valid[codes[keep], position[keep]] = True
+    return times, grades, valid
+
+class ReviewSchedule:
+    """When each word a learner has reviewed is next due, under their fitted parameters"""
+
+    def __init__(self, algorithm=DEFAULT_ALGORITHM, params=None):
+        self.algorithm = algorithm
+        self.params = default_parameters(algorithm) if params is None else params
+        self.init_state, self.review, _ = get_scheduler(algorithm)
+        self.cards = {}     # hanzi -> (one-card state, last review day, due day)
+
+    @classmethod
+    def load(cls, learner_id=None, algorithm=DEFAULT_ALGORITHM):
+        """Replay a learner's review log with the parameters optimizer.py fitted for them"""
+        from review_log import load_reviews
+
+        schedule = cls(algorithm, load_parameters(algorithm, learner_id))
+        words, days, correct = load_reviews(learner_id)
+        if words.size:
+            schedule.replay(words, days, correct)
+        return schedule
+
+    def replay(self, words, days, correct):
+        """Apply recorded reviews to every card at once, oldest first"""
+        times, grades, valid = build_review_matrix(words, days, correct)
+        n_cards = times.shape[0]
+        state = self.init_state(n_cards)
+        last = times[:, 0].copy()
+        due = last.copy()
+        for k in range(times.shape[1]):
+            is_valid = valid[:, k]
+            elapsed = np.maximum(times[:, k] - last, 0)
+            new_state, interval = self.review(state, elapsed, grades[:, k], self.params)
+            state = {key: np.where(is_valid, new_state[key], state[key]) for key in new_state}
+            last = np.where(is_valid, times[:, k], last)
+            due = np.where(is_valid, times[:, k] + interval, due)
+
+        for i, hanzi in enumerate(np.unique(words).tolist()):
+            self.cards[hanzi] = ({key: value[i:i + 1] for key, value in state.items()},
+                                 float(last[i]), float(due[i]))
+
+    def record(self, hanzi, correct, day=None):
+        """Apply one new review of a word"""
+        day = time.time() / SECONDS_PER_DAY if day is None else day
+        state, last, _ = self.cards.get(hanzi) or (self.init_state(1), day, day)
+        elapsed = np.array([max(day - last, 0.0)])
+        state, interval = self.review(state, elapsed, np.array([bool(correct)]), self.params)
+        self.cards[hanzi] = (state, day, day + float(interval[0]))
+
+    def due_day(self, hanzi):
+        """Day a word is next due (None if it has never been reviewed)"""
+        card = self.cards.get(hanzi)
+        return card[2] if card else None
+
+    def select_words(self, vocabulary, num_words, word_index=None, today=None):
+        """Words due for review, most overdue first, topped up with random new words"""
+        today = time.time() / SECONDS_PER_DAY if today is None else today
+        by_hanzi = word_index if word_index is not None else {word["hanzi"]: word for word in vocabulary}
+        num_words = min(num_words, len(vocabulary))
+        due = sorted((due_day, hanzi) for hanzi, (_, _, due_day) in self.cards.items()
+                     if due_day <= today and hanzi in by_hanzi)
+        selected = [by_hanzi[hanzi] for _, hanzi in due[:num_words]]
+        chosen = {word["hanzi"] for word in selected}
+
+        # Random draws rather than a scan, so big decks stay cheap; words not due only as a last resort
+        for _ in range(20 * num_words):
+            if len(selected) >= num_words:
+                break
+            word = vocabulary[random.randrange(len(vocabulary))]
+            if word["hanzi"] not in chosen and word["hanzi"] not in self.cards:
+                chosen.add(word["hanzi"])
+                selected.append(word)
+        if len(selected) < num_words:
+            remaining = [word for word in vocabulary if word["hanzi"] not in chosen]
+            for pool in ([word for word in remaining if word["hanzi"] not in self.cards],
+                         [word for word in remaining if word["hanzi"] in self.cards]):
+                selected.extend(random.sample(pool, min(num_words - len(selected), len(pool))))
+        random.shuffle(selected)
+        return selected
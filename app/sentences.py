@@ -0,0 +1,237 @@
+"""
+sentences.py - Example sentences from a local corpus for Chinese Learning App
+Reads a Tatoeba-style TSV corpus (either `id<TAB>cmn<TAB>text` sentence
+lists or `id<TAB>text<TAB>id<TAB>translation` sentence pairs) without
+loading it into RAM. An on-disk inverted index maps every deck word to the
+byte offsets of sentences containing it; a lookup reads that posting list
+from the memory-mapped index and seeks each sentence in the memory-mapped
+corpus. Candidates are ranked by length and by how many of the sentence's
+other deck words the learner already knows. Given the app's deck segmenter,
+sentences where the word stands on its own rank above ones where it is only
+part of a longer word (学 inside 学习).
+
+Usage:
+    python sentences.py corpus.tsv 学习          # build the index if needed and look up
+"""
+
+import argparse
+import array
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+from storage import get_data_dir
+from vocabulary import contains_hanzi
+
+INDEX_MAGIC = b"CLASENT1"
+HEADER = struct.Struct("<8sQQ")   # magic, directory offset, directory length
+MAX_POSTINGS = 500                # Sentences kept per word; lookups rank only these
+MAX_SENTENCE_LENGTH = 40          # Characters; longer sentences make poor examples
+IDEAL_LENGTH = 12
+DEFAULT_EXAMPLES = 2
+
+def parse_line(line):
+    """(chinese, translation) from a corpus line, or None for other languages"""
+    fields = line.rstrip("\r\n").split("\t")
+    if len(fields) == 3 and fields[1] in ("cmn", "zho", "yue", "wuu") and contains_hanzi(fields[2]):
+        return fields[2], ""
+    if len(fields) >= 4 and contains_hanzi(fields[1]):
+        return fields[1], fields[3]
+    return None
+
+def find_deck_words(sentence, words, max_length):
+    """Deck words occurring in a sentence (every substring up to the longest word)"""
+    found = set()
+    for start in range(len(sentence)):
+        for end in range(start + 1, min(len(sentence), start + max_length) + 1):
+            if sentence[start:end] in words:
+                found.add(sentence[start:end])
+    return found
+
+def deck_digest(words):
+    """Short stable fingerprint of a deck's word list"""
+    return hashlib.sha1("\n".join(sorted(words)).encode("utf-8")).hexdigest()[:12]
+
+def get_index_path(corpus_path, words):
+    """Where the index of a corpus for a given deck is stored"""
+    name = os.path.splitext(os.path.basename(corpus_path))[0]
+    return os.path.join(get_data_dir("sentences"), f"{name}-{deck_digest(words)}.idx")
+
+def corpus_signature(corpus_path):
+    """Size and modification time, stored in the index to detect a changed corpus"""
+    stat = os.stat(corpus_path)
+    return [stat.st_size, int(stat.st_mtime)]
+
+def build_index(corpus_path, words, index_path=None):
+    """Stream the corpus once and write the word -> sentence offsets index"""
+    words = set(words)
+    index_path = index_path or get_index_path(corpus_path, words)
+    max_length = max((len(word) for word in words), default=1)
+    postings = {}
+    sentences = 0
+
+    with open(corpus_path, "rb") as corpus_file:
+        offset = 0
+        for raw_line in corpus_file:
+            line_offset = offset
+            offset += len(raw_line)
+            parsed = parse_line(raw_line.decode("utf-8", errors="replace"))
+            if parsed is None or len(parsed[0]) > MAX_SENTENCE_LENGTH:
+                continue
+            sentences += 1
+            for word in find_deck_words(parsed[0], words, max_length):
+                offsets = postings.setdefault(word, array.array("Q"))
+                if len(offsets) < MAX_POSTINGS:
+                    offsets.append(line_offset)
+
+    temp_path = index_path + ".tmp"
+    directory = {}
+    with open(temp_path, "wb") as index_file:
+        index_file.write(HEADER.pack(INDEX_MAGIC, 0, 0))
+        for word, offsets in postings.items():
+            directory[word] = [index_file.tell(), len(offsets)]
+            offsets.tofile(index_file)
+        encoded = json.dumps({"corpus": corpus_signature(corpus_path), "sentences": sentences,
+                              "max_length": max_length, "words": directory},
+                             ensure_ascii=False).encode("utf-8")
+        directory_offset = index_file.tell()
+        index_file.write(encoded)
+        index_file.seek(0)
+        index_file.write(HEADER.pack(INDEX_MAGIC, directory_offset, len(encoded)))
+    os.replace(temp_path, index_path)
+    return index_path
+
+def _map_file(path):
+    """Read-only memory map of a whole file (None for an empty file)"""
+    with open(path, "rb") as mapped_file:
+        if os.fstat(mapped_file.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(mapped_file.fileno(), 0, access=mmap.ACCESS_READ)
+
+class SentenceCorpus:
+    """Example sentence lookups backed by a memory-mapped corpus and index"""
+
+    def __init__(self, corpus_path, words):
+        self.corpus_path = corpus_path
+        self.words = set(words)
+        index_path = get_index_path(corpus_path, self.words)
+        if not self._index_is_current(index_path):
+            build_index(corpus_path, self.words, index_path)
+        self.corpus = _map_file(corpus_path)
+        self.index = _map_file(index_path)
+        _, directory_offset, directory_length = HEADER.unpack_from(self.index, 0)
+        directory = json.loads(self.index[directory_offset:directory_offset + directory_length].decode("utf-8"))
+        self.postings = directory["words"]
+        self.max_length = directory["max_length"]
+        self.segmenter = None     # The app's deck segmenter, when it has one (see use_segmenter)
+
+    def use_segmenter(self, segmenter):
+        """Find deck words in sentences by segmenting them rather than by substring"""
+        self.segmenter = segmenter
+
+    def _index_is_current(self, index_path):
+        """Whether an index exists for this exact corpus file"""
+        try:
+            with open(index_path, "rb") as index_file:
+                magic, directory_offset, directory_length = HEADER.unpack(index_file.read(HEADER.size))
+                if magic != INDEX_MAGIC:
+                    return False
+                index_file.seek(directory_offset)
+                directory = json.loads(index_file.read(directory_length).decode("utf-8"))
+        except (OSError, ValueError, struct.error):
+            return False
+        return directory["corpus"] == corpus_signature(self.corpus_path)
+
+    def close(self):
+        """Release the memory maps"""
+        for mapped in (self.corpus, self.index):
+            if mapped is not None:
+                mapped.close()
+
+    def sentence_at(self, offset):
+        """(chinese, translation) of the corpus line starting at a byte offset"""
+        end = self.corpus.find(b"\n", offset)
+        line = self.corpus[offset:end if end != -1 else len(self.corpus)]
+        return parse_line(line.decode("utf-8", errors="replace"))
+
+    def candidates(self, hanzi):
+        """All indexed sentences containing a word"""
+        location = self.postings.get(hanzi)
+        if location is None:
+            return []
+        start, count = location
+        offsets = array.array("Q")
+        offsets.frombytes(self.index[start:start + count * offsets.itemsize])
+        return [self.sentence_at(offset) for offset in offsets]
+
+    def deck_words_in(self, sentence):
+        """Deck words in a sentence: its segmented words if there is a segmenter, else every substring"""
+        if self.segmenter is None:
+            return find_deck_words(sentence, self.words, self.max_length)
+        return {token for token in self.segmenter.segment(sentence) if token in self.words}
+
+    def score(self, sentence, hanzi, known_words, words=None):
+        """Higher is better: near the ideal length and made of words the learner knows"""
+        words = self.deck_words_in(sentence) if words is None else words
+        others = words - {hanzi}
+        known_share = len(others & known_words) / len(others) if others else 0.5
+        length_penalty = abs(len(sentence) - IDEAL_LENGTH) / IDEAL_LENGTH
+        return known_share - 0.5 * length_penalty
+
+    def examples(self, hanzi, known_words=frozenset(), limit=DEFAULT_EXAMPLES):
+        """The best example sentences for a word as (chinese, translation) pairs"""
+        ranked = []
+        for pair in self.candidates(hanzi):
+            words = self.deck_words_in(pair[0])
+            # Without a segmenter the word always counts as found (the index matched it)
+            standalone = self.segmenter is None or hanzi in words
+            ranked.append(((standalone, self.score(pair[0], hanzi, known_words, words)), pair))
+        ranked.sort(key=lambda item: item[0], reverse=True)
+        return [pair for _, pair in ranked[:limit]]
+
+    def prefetch_step(self, get_known_words):
+        """Prefetcher step looking up the card's example sentences
+
+        get_known_words returns the learner's current known-word set; it is
+        called per card so words learned mid-session count straight away.
+        """
+        def step(word, mode, content):
+            content["examples"] = self.examples(word["hanzi"], get_known_words())
+        return step
+
+def get_default_corpus_path():
+    """Where the app looks for a sentence corpus unless told otherwise"""
+    return os.environ.get("CHINESE_APP_SENTENCES") or os.path.join(get_data_dir("sentences"), "sentences.tsv")
+
+def open_corpus(words, path=None):
+    """Open (indexing on first use) the corpus for a deck, or None if there is none"""
+    path = path or get_default_corpus_path()
+    if not os.path.exists(path):
+        return None
+    try:
+        return SentenceCorpus(path, words)
+    except (OSError, ValueError, KeyError) as error:
+        print(f"⚠️ Could not open sentence corpus {path}: {error}")
+        return None
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Look up example sentences for a word")
+    parser.add_argument("corpus", help="Tatoeba-style TSV file")
+    parser.add_argument("word", help="hanzi to look up")
+    parser.add_argument("--deck", help="vocabulary module whose words are indexed")
+    parser.add_argument("--limit", type=int, default=5)
+    args = parser.parse_args()
+
+    from review_log import load_known_words
+    from vocabulary import load_vocabulary
+
+    words = {entry["hanzi"] for entry in load_vocabulary(args.deck)} | {args.word}
+    corpus = SentenceCorpus(args.corpus, words)
+    for chinese, translation in corpus.examples(args.word, load_known_words(), args.limit):
+        print(f"  {chinese}" + (f"  —  {translation}" if translation else ""))
+
+if __name__ == "__main__":
+    main()
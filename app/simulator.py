@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+simulator.py - Review workload simulator for Chinese Learning App
+Forecasts the daily review load a scheduling algorithm produces for a cohort of
+learners. Every card of every learner is simulated at once as NumPy arrays:
+instead of stepping day by day, each loop iteration advances all cards to their
+next review, so the number of iterations is the number of reviews per card
+rather than the number of simulated days.
+
+Usage:
+    python simulator.py --cards 100000 --learners 1000 --days 365 --algorithm fsrs
+"""
+
+import argparse
+import time
+
+import numpy as np
+
+from scheduler import FSRS_DEFAULT_WEIGHTS, forgetting_curve, fsrs_init, fsrs_review, get_scheduler
+
+def synthetic_recall_model(mean_difficulty=5.0, spread=1.5, weights=None):
+    """Recall model where every learner/card pair draws a random difficulty"""
+    def difficulty(rng, cards, learners):
+        return np.clip(rng.normal(mean_difficulty, spread, cards.shape), 1, 10)
+
+    return {
+        "name": "synthetic",
+        "weights": FSRS_DEFAULT_WEIGHTS if weights is None else weights,
+        "difficulty": difficulty,
+    }
+
+def recorded_recall_model(deck, pass_rates, default_rate=0.8, spread=0.5, weights=None):
+    """Recall model calibrated from recorded per-word pass rates (keyed by hanzi)"""
+    rates = np.array([pass_rates.get(word["hanzi"], default_rate) for word in deck])
+    card_difficulty = 1 + 9 * (1 - np.clip(rates, 0, 1))
+
+    def difficulty(rng, cards, learners):
+        noise = rng.normal(0, spread, cards.shape)
+        return np.clip(card_difficulty[cards % len(card_difficulty)] + noise, 1, 10)
+
+    return {
+        "name": "recorded",
+        "weights": FSRS_DEFAULT_WEIGHTS if weights is None else weights,
+        "difficulty": difficulty,
+    }
+
+def simulate_learner_chunk(n_learners, n_cards, algorithm, recall_model, days,
+                           new_per_day, params, rng):
+    """Simulate a block of learners and return their reviews-per-day counts"""
+    init_state, review, _ = get_scheduler(algorithm)
+    weights = recall_model["weights"]
+    histogram = np.zeros(days, dtype=np.int64)
+
+    # Only cards introduced within the horizon ever get reviewed
+    active_cards = min(n_cards, new_per_day * days)
+    if active_cards == 0:
+        return histogram
+    cards = np.tile(np.arange(active_cards), n_learners)
+    learners = np.repeat(np.arange(n_learners), active_cards)
+    n = cards.size
+
+    # First exposure on the day the card is introduced
+    due = (cards // new_per_day).astype(np.int32)
+    difficulty = recall_model["difficulty"](rng, cards, learners)
+    correct = rng.random(n) < 1 - (difficulty - 1) / 18
+    histogram += np.bincount(due, minlength=days)
+
+    truth = fsrs_init(n)
+    truth["difficulty"] = difficulty
+    truth, _ = fsrs_review(truth, np.zeros(n), correct, weights)
+    truth["difficulty"] = difficulty
+    sched, interval = review(init_state(n), np.zeros(n), correct, params)
+    last = due
+    due = due + interval
+
+    while True:
+        # Drop cards whose next review falls past the horizon
+        keep = due < days
+        if not keep.all():
+            due, last = due[keep], last[keep]
+            truth = {key: value[keep] for key, value in truth.items()}
+            sched = {key: value[keep] for key, value in sched.items()}
+        if due.size == 0:
+            break
+
+        histogram += np.bincount(due, minlength=days)
+        elapsed = (due - last).astype(np.float64)
+        correct = rng.random(due.size) < forgetting_curve(elapsed, truth["stability"])
+
+        truth, _ = fsrs_review(truth, elapsed, correct, weights)
+        sched, interval = review(sched, elapsed, correct, params)
+        last = due
+        due = due + interval
+
+    return histogram
+
+def simulate_workload(deck, algorithm="fsrs", recall_model=None, n_learners=1000, days=365,
+                      new_per_day=20, params=None, seed=0, chunk_learners=100):
+    """Forecast reviews per day for a cohort studying the given deck"""
+    recall_model = recall_model or synthetic_recall_model()
+    rng = np.random.default_rng(seed)
+    histogram = np.zeros(days, dtype=np.int64)
+
+    start = time.perf_counter()
+    for first in range(0, n_learners, chunk_learners):
+        block = min(chunk_learners, n_learners - first)
+        histogram += simulate_learner_chunk(block, len(deck), algorithm, recall_model,
+                                            days, new_per_day, params, rng)
+
+    return {
+        "algorithm": algorithm,
+        "recall_model": recall_model["name"],
+        "reviews_per_day": histogram,
+        "mean_per_learner": histogram / max(n_learners, 1),
+        "total_reviews": int(histogram.sum()),
+        "elapsed_seconds": time.perf_counter() - start,
+    }
+
+def format_forecast(result, bucket_days=7, width=50):
+    """Render the forecast as a text histogram with one bar per bucket of days"""
+    per_learner = result["mean_per_learner"]
+    buckets = [per_learner[i:i + bucket_days].mean()
+               for i in range(0, len(per_learner), bucket_days)]
+    peak = max(max(buckets), 1e-9)
+
+    lines = [f"📈 {result['algorithm'].upper()} workload forecast "
+             f"({result['recall_model']} recall model)"]
+    for i, value in enumerate(buckets):
+        bar = "█" * int(round(value / peak * width))
+        lines.append(f"Day {i * bucket_days + 1:>4}: {bar} {value:.1f}/day")
+    lines.append(f"Total reviews: {result['total_reviews']:,} "
+                 f"in {result['elapsed_seconds']:.2f}s")
+    return "\n".join(lines)
+
+def build_deck(num_cards):
+    """Repeat the loaded vocabulary until the deck has num_cards entries"""
+    from vocabulary import load_vocabulary
+
+    vocabulary = load_vocabulary()
+    if not num_cards:
+        return list(vocabulary)
+    return [vocabulary[i % len(vocabulary)] for i in range(num_cards)]
+
+def main():
+    """Command line entry point for workload forecasting"""
+    parser = argparse.ArgumentParser(description="Forecast daily review load for a cohort")
+    parser.add_argument("--cards", type=int, default=0,
+                        help="deck size (default: the loaded vocabulary)")
+    parser.add_argument("--learners", type=int, default=1000)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--new-per-day", type=int, default=20)
+    parser.add_argument("--algorithm", choices=["sm2", "fsrs"], default="fsrs")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    deck = build_deck(args.cards)
+    result = simulate_workload(deck, args.algorithm, n_learners=args.learners,
+                               days=args.days, new_per_day=args.new_per_day, seed=args.seed)
+    print(format_forecast(result))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+stall_watchdog.py - Main-thread stall watchdog for Chinese Learning App
+A heartbeat scheduled with root.after proves the Tk event loop is alive.
+A monitor thread notices when the heartbeat is late, grabs the main thread's
+Python stack via sys._current_frames() to show what is blocking, and every
+stall's duration is added to a histogram printed when the app exits.
+
+Enable with CHINESE_APP_WATCHDOG=50 or `python main_simplified.py --watchdog 50`
+(threshold in milliseconds).
+"""
+
+import logging
+import os
+import sys
+import threading
+import time
+import traceback
+
+DEFAULT_THRESHOLD_MS = 50
+HEARTBEAT_MS = 20
+STALL_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000]
+APP_DIR = os.path.dirname(os.path.abspath(__file__))
+
+logger = logging.getLogger("chinese_learning_app.watchdog")
+
+class StallWatchdog:
+    """Detects and explains Tk main loop stalls"""
+
+    def __init__(self, root, threshold_ms=DEFAULT_THRESHOLD_MS, heartbeat_ms=HEARTBEAT_MS):
+        self.root = root
+        self.threshold = threshold_ms / 1000.0
+        self.heartbeat_ms = heartbeat_ms
+        self.main_thread_id = threading.main_thread().ident
+        self.last_beat = time.perf_counter()
+        self.stall_counts = [0] * (len(STALL_BUCKETS_MS) + 1)
+        self.stall_durations = []
+        self.blame = {}          # app function on top of the stack -> samples
+        self.after_id = None
+        self.stop_event = threading.Event()
+        self.monitor = None
+
+    def start(self):
+        """Start the heartbeat and the monitor thread"""
+        self.last_beat = time.perf_counter()
+        self.after_id = self.root.after(self.heartbeat_ms, self._heartbeat)
+        self.monitor = threading.Thread(target=self._monitor, name="stall-watchdog", daemon=True)
+        self.monitor.start()
+        return self
+
+    def stop(self):
+        """Stop watching and return the histogram text"""
+        self.stop_event.set()
+        if self.after_id:
+            try:
+                self.root.after_cancel(self.after_id)
+            except Exception:
+                pass  # Root window already destroyed
+            self.after_id = None
+        if self.monitor:
+            self.monitor.join(timeout=1)
+        return self.format_report()
+
+    def _heartbeat(self):
+        """Runs on the Tk thread; a late beat is a stall that has just ended"""
+        now = time.perf_counter()
+        lag = now - self.last_beat - self.heartbeat_ms / 1000.0
+        if lag > self.threshold:
+            self._record_stall(lag)
+        self.last_beat = now
+        if not self.stop_event.is_set():
+            self.after_id = self.root.after(self.heartbeat_ms, self._heartbeat)
+
+    def _record_stall(self, duration):
+        """Add a finished stall to the histogram"""
+        duration_ms = duration * 1000
+        bucket = sum(1 for limit in STALL_BUCKETS_MS if duration_ms >= limit)
+        self.stall_counts[bucket] += 1
+        self.stall_durations.append(duration_ms)
+        logger.warning("Main thread stalled for %.0f ms", duration_ms)
+
+    def _monitor(self):
+        """Runs on its own thread; samples the main stack while a stall lasts"""
+        poll = max(self.threshold / 4, 0.005)
+        sampled_beat = None
+        next_sample = 0.0
+        while not self.stop_event.wait(poll):
+            beat = self.last_beat
+            lag = time.perf_counter() - beat - self.heartbeat_ms / 1000.0
+            if lag <= self.threshold:
+                continue
+            # One sample when a stall is detected, then one per extra threshold
+            if beat != sampled_beat:
+                sampled_beat, next_sample = beat, 0.0
+            if lag >= next_sample:
+                self._sample_main_stack(lag)
+                next_sample = lag + self.threshold
+
+    def _sample_main_stack(self, lag):
+        """Capture and log the main thread's current Python stack"""
+        frame = sys._current_frames().get(self.main_thread_id)
+        if frame is None:
+            return
+        stack = traceback.extract_stack(frame)
+        culprit = self._find_culprit(stack)
+        self.blame[culprit] = self.blame.get(culprit, 0) + 1
+        logger.warning("Main thread blocked for %.0f ms in %s\n%s",
+                       lag * 1000, culprit, "".join(traceback.format_list(stack)))
+
+    def _find_culprit(self, stack):
+        """Innermost frame that belongs to the app rather than tkinter or the stdlib"""
+        for entry in reversed(stack):
+            if os.path.dirname(os.path.abspath(entry.filename)) == APP_DIR \
+                    and not entry.filename.endswith("stall_watchdog.py"):
+                return f"{os.path.basename(entry.filename)}:{entry.name}"
+        entry = stack[-1]
+        return f"{os.path.basename(entry.filename)}:{entry.name}"
+
+    def format_report(self):
+        """Stall duration histogram and the functions caught blocking"""
+        total = len(self.stall_durations)
+        lines = [f"⏱️ Main-thread stalls over {self.threshold * 1000:.0f} ms: {total}"]
+        if not total:
+            return "\n".join(lines)
+
+        peak = max(self.stall_counts)
+        labels = [f"{low}-{high} ms" for low, high in zip(STALL_BUCKETS_MS, STALL_BUCKETS_MS[1:])]
+        labels = [f"<{STALL_BUCKETS_MS[0]} ms"] + labels + [f"≥{STALL_BUCKETS_MS[-1]} ms"]
+        for label, count in zip(labels, self.stall_counts):
+            if count:
+                lines.append(f"  {label:>12}: {'█' * max(1, int(count / peak * 40))} {count}")
+        lines.append(f"  worst: {max(self.stall_durations):.0f} ms")
+
+        if self.blame:
+            lines.append("  Blocking code (stack samples):")
+            for culprit, samples in sorted(self.blame.items(), key=lambda item: -item[1])[:10]:
+                lines.append(f"    {samples:>5}  {culprit}")
+        return "\n".join(lines)
+
+def start_watchdog(root, threshold_ms=None):
+    """Start a watchdog if requested by argument or CHINESE_APP_WATCHDOG"""
+    if threshold_ms is None:
+        threshold_ms = os.environ.get("CHINESE_APP_WATCHDOG")
+    if not threshold_ms:
+        return None
+    try:
+        threshold_ms = float(threshold_ms)
+    except ValueError:
+        logger.warning("CHINESE_APP_WATCHDOG=%r is not a number of milliseconds, using %d",
+                       threshold_ms, DEFAULT_THRESHOLD_MS)
+        threshold_ms = DEFAULT_THRESHOLD_MS
+    return StallWatchdog(root, threshold_ms).start()
@@ -0,0 +1,60 @@
+"""
+startup.py - Cold start profile for Chinese Learning App
+Marks named milestones (imports done, window created, first paint, deck
+ready...) against the moment the main module started, and reports them
+against the first-paint budget.
+
+Enable with `python main_simplified.py --profile-startup`. For a per-module
+import breakdown run `python -X importtime main_simplified.py`.
+"""
+
+import sys
+import time
+
+FIRST_PAINT_TARGET_MS = 150
+# Imported by the deck loader thread or on first use; the main module must not pull them in
+DEFERRED_MODULES = ("answers", "audio", "browser", "bundle", "cloze", "concurrent.futures", "hot_reload", "ime",
+                    "numpy", "pinyin", "prefetch", "segmenter", "sentences")
+
+class StartupProfile:
+    """Milestone timestamps since process start"""
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.marks = []   # (name, seconds since start)
+        self.early_imports = []
+
+    def mark(self, name):
+        """Record that a milestone has been reached"""
+        self.marks.append((name, time.perf_counter() - self.start))
+
+    def check_imports(self, deferred=DEFERRED_MODULES):
+        """Note which deferred modules are already imported (call once the main module's imports are done)"""
+        self.early_imports = [name for name in deferred if name in sys.modules]
+        return self.early_imports
+
+    def elapsed_ms(self, name):
+        """Milliseconds from start to a milestone, or None if not reached"""
+        for mark_name, elapsed in self.marks:
+            if mark_name == name:
+                return elapsed * 1000
+        return None
+
+    def format_report(self, target_ms=FIRST_PAINT_TARGET_MS):
+        """Milestone table plus a verdict on time to first paint"""
+        lines = ["🚦 Startup profile", f"   {'Milestone':<24} {'Total ms':>9} {'Step ms':>9}"]
+        previous = 0.0
+        for name, elapsed in self.marks:
+            lines.append(f"   {name:<24} {elapsed * 1000:>9.1f} {(elapsed - previous) * 1000:>9.1f}")
+            previous = elapsed
+
+        if self.early_imports:
+            lines.append(f"   ⚠️ Imported before the window: {', '.join(self.early_imports)}")
+        first_paint = self.elapsed_ms("first paint")
+        if first_paint is None:
+            lines.append("   ⚠️ The window was never painted")
+        elif first_paint <= target_ms:
+            lines.append(f"   ✅ First paint in {first_paint:.0f} ms (target {target_ms} ms)")
+        else:
+            lines.append(f"   ⚠️ First paint in {first_paint:.0f} ms, over the {target_ms} ms target")
+        return "\n".join(lines)
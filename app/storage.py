@@ -0,0 +1,54 @@
+"""
+storage.py - Local storage locations for Chinese Learning App
+Everything the app remembers about a learner (reviews, fitted scheduler
+parameters, caches) lives under one data directory, by default
+~/.chinese_learning_app. Set CHINESE_APP_HOME to move it and
+CHINESE_APP_LEARNER to pick the learner profile.
+"""
+
+import getpass
+import os
+import re
+import uuid
+
+def get_data_dir(*parts):
+    """Return (and create) a directory inside the app data directory"""
+    base = os.environ.get("CHINESE_APP_HOME") or os.path.join(os.path.expanduser("~"), ".chinese_learning_app")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def get_learner_id():
+    """Return the current learner profile name"""
+    learner = os.environ.get("CHINESE_APP_LEARNER")
+    if not learner:
+        try:
+            learner = getpass.getuser()
+        except Exception:
+            learner = "default"
+    return safe_name(learner)
+
+def get_device_id():
+    """Random id of this installation, created on first use (tells synced devices apart)"""
+    path = os.path.join(get_data_dir(), "device_id")
+    try:
+        with open(path, encoding="utf-8") as device_file:
+            device_id = device_file.read().strip()
+        if device_id:
+            return device_id
+    except OSError:
+        pass
+    device_id = uuid.uuid4().hex[:16]
+    with open(path, "w", encoding="utf-8") as device_file:
+        device_file.write(device_id + "\n")
+    return device_id
+
+def safe_name(name):
+    """Make a learner id or deck name safe to use as a file name"""
+    return re.sub(r"[^\w.-]", "_", name) or "default"
+
+def list_learners(kind):
+    """List learner ids that have files in a data subdirectory"""
+    directory = get_data_dir(kind)
+    return sorted(os.path.splitext(name)[0] for name in os.listdir(directory)
+                  if not name.startswith("."))
@@ -0,0 +1,307 @@
+"""
+sync.py - Offline-first progress sync for Chinese Learning App
+The app always records to the learner's local event log (review_log.py) and
+syncs when it can reach the school server, in one request: the client
+uploads the events it recorded since the last sync, the server merges them
+and answers with the events the learner recorded on other devices plus any
+newer scheduler parameters (fitted on the server with optimizer.py).
+
+Every event is identified by the device that recorded it and its sequence
+number there, so resending a batch is harmless and merging never conflicts:
+events are facts, and each log simply gains the ones it lacks. Batches are
+sent column by column (sequence and time deltas, a word table, correct
+flags) and zlib-compressed, so a week of offline study is a few KB.
+
+The server keeps each learner's merged history as an ordinary event log in
+its own data directory (CHINESE_APP_HOME), so optimizer.py runs there as is.
+
+Usage:
+    python sync.py serve --port 8766
+    python sync.py sync http://school-server:8766/
+"""
+
+import argparse
+import json
+import os
+import threading
+import time
+import urllib.error
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from review_log import append_events, read_events
+from storage import get_data_dir, get_device_id, get_learner_id, safe_name
+
+SYNC_PATH = "/sync"
+DEFAULT_PORT = 8766
+SYNC_TIMEOUT = 20
+CORE_FIELDS = {"seq", "ts", "type", "word", "correct", "other"}
+MAX_REQUEST_BYTES = 16 * 1024 * 1024
+SERVER_DEVICE = "server"
+# One sync at a time per process: two in flight would both upload and pull the same events
+SYNC_LOCK = threading.Lock()
+
+def pack(message):
+    """Compressed JSON body of a request or response"""
+    return zlib.compress(json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 9)
+
+def unpack(data):
+    """Message from a body written by pack"""
+    return json.loads(zlib.decompress(data))
+
+def encode_batch(events):
+    """Events as columns: deltas for seq and ms timestamps, indexes into word and type tables"""
+    words, word_ids, types, type_ids = [], {}, [], {}
+    batch = {"seq": [], "ts": [], "type": [], "word": [], "correct": "", "other": [], "extra": [],
+             "words": words, "types": types}
+    last_seq = last_ms = 0
+    correct = []
+
+    def word_id(hanzi):
+        if hanzi is None:
+            return -1
+        if hanzi not in word_ids:
+            word_ids[hanzi] = len(words)
+            words.append(hanzi)
+        return word_ids[hanzi]
+
+    for position, event in enumerate(events):
+        ms = round(event["ts"] * 1000)
+        batch["seq"].append(event["seq"] - last_seq)
+        batch["ts"].append(ms - last_ms)
+        last_seq, last_ms = event["seq"], ms
+        if event["type"] not in type_ids:
+            type_ids[event["type"]] = len(types)
+            types.append(event["type"])
+        batch["type"].append(type_ids[event["type"]])
+        batch["word"].append(word_id(event.get("word")))
+        batch["other"].append(word_id(event.get("other")))
+        correct.append("1" if event.get("correct") else "0")
+        extra = {key: value for key, value in event.items() if key not in CORE_FIELDS}
+        if extra:
+            batch["extra"].append([position, extra])
+    batch["correct"] = "".join(correct)
+    if not any(other >= 0 for other in batch["other"]):
+        del batch["other"]      # Reviews only: leave the column out
+    return batch
+
+def decode_batch(batch):
+    """Events back from encode_batch"""
+    words, types = batch["words"], batch["types"]
+    others = batch.get("other")
+    extras = dict((position, extra) for position, extra in batch["extra"])
+    events = []
+    seq = ms = 0
+    for position, (seq_delta, ms_delta, type_id, word_id) in enumerate(
+            zip(batch["seq"], batch["ts"], batch["type"], batch["word"])):
+        seq += seq_delta
+        ms += ms_delta
+        event = {"seq": seq, "ts": ms / 1000, "type": types[type_id]}
+        if word_id >= 0:
+            event["word"] = words[word_id]
+        event["correct"] = batch["correct"][position] == "1"
+        if others and others[position] >= 0:
+            event["other"] = words[others[position]]
+        event.update(extras.get(position, {}))
+        events.append(event)
+    return events
+
+def parameters_version(stored):
+    """Newest fit time in a learner's stored parameters (0 for none)"""
+    return max((entry.get("fitted_at", 0) for entry in stored.values()), default=0)
+
+def get_state_path(learner_id=None):
+    """Where a learner's sync progress is kept"""
+    return os.path.join(get_data_dir("sync"), f"{learner_id or get_learner_id()}.json")
+
+def load_state(learner_id=None):
+    """{"uploaded": last own seq the server acknowledged, "cursor": last server seq pulled}"""
+    try:
+        with open(get_state_path(learner_id), encoding="utf-8") as state_file:
+            return json.load(state_file)
+    except (OSError, ValueError):
+        return {"uploaded": 0, "cursor": 0}
+
+def save_state(state, learner_id=None):
+    """Store sync progress (atomically: a crash must not make us resend or skip events)"""
+    path = get_state_path(learner_id)
+    temp_path = path + ".tmp"
+    with open(temp_path, "w", encoding="utf-8") as state_file:
+        json.dump(state, state_file)
+    os.replace(temp_path, path)
+
+def is_mismatch(event):
+    """Whether an event is a matching-game mismatch (recorded into the confusion matrix)"""
+    return event["type"] == "match" and not event["correct"] and event.get("other") is not None
+
+def record_mismatches(events, learner_id=None):
+    """Add pulled mismatches to the learner's stored confusion matrix; returns how many"""
+    mismatches = [event for event in events if is_mismatch(event)]
+    if mismatches:
+        from confusion import ConfusionMatrix
+
+        confusion = ConfusionMatrix.load(learner_id)
+        for event in mismatches:
+            confusion.record({"hanzi": event["word"]}, {"hanzi": event["other"]})
+        confusion.save()
+    return len(mismatches)
+
+def sync(url, learner_id=None, timeout=SYNC_TIMEOUT):
+    """Exchange events and parameters with the server in one round-trip; returns a summary
+
+    Pulled events are appended to the log and their mismatches saved to the
+    confusion matrix before returning: later syncs skip events already in
+    the log, so anything not applied here would be lost.
+
+    Raises OSError (URLError included) when the server cannot be reached;
+    nothing is lost, the same events are simply sent next time.
+    """
+    with SYNC_LOCK:
+        return _sync(url, learner_id or get_learner_id(), timeout)
+
+def _sync(url, learner_id, timeout):
+    from scheduler import read_parameters_file, write_parameters_file
+
+    start = time.perf_counter()
+    state = load_state(learner_id)
+    pending = []
+    merged = set()            # (device, origin seq) of events already pulled from other devices
+    for event in read_events(learner_id):
+        if "device" in event:
+            merged.add((event["device"], event["origin_seq"]))
+        elif event["seq"] > state["uploaded"]:
+            pending.append(event)
+    request = pack({"learner": learner_id, "device": get_device_id(), "batch": encode_batch(pending),
+                    "cursor": state["cursor"], "params_version": parameters_version(read_parameters_file(learner_id))})
+    http_request = urllib.request.Request(url.rstrip("/") + SYNC_PATH, data=request,
+                                          headers={"Content-Type": "application/octet-stream"})
+    with urllib.request.urlopen(http_request, timeout=timeout) as response:
+        response_data = response.read()
+    reply = unpack(response_data)
+
+    # A lost sync state means events come again: keep only the new ones
+    pulled = [event for event in decode_batch(reply["batch"])
+              if (event["device"], event["origin_seq"]) not in merged]
+    append_events(pulled, learner_id)
+    record_mismatches(pulled, learner_id)
+    if reply.get("params"):
+        write_parameters_file(reply["params"], learner_id)
+    save_state({"uploaded": reply["ack"], "cursor": reply["cursor"]}, learner_id)
+    return {"uploaded": len(pending), "pulled": pulled, "params_updated": bool(reply.get("params")),
+            "bytes_sent": len(request), "bytes_received": len(response_data),
+            "seconds": time.perf_counter() - start}
+
+class SyncStore:
+    """Server side: merged event logs per learner, in this process's data directory"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.high_water = {}      # learner -> {device: last origin seq merged}
+
+    def _devices(self, learner_id):
+        """Last merged seq per device, read from the learner's log on first use"""
+        if learner_id not in self.high_water:
+            devices = {}
+            for event in read_events(learner_id):
+                if "device" in event:
+                    devices[event["device"]] = max(devices.get(event["device"], 0), event["origin_seq"])
+            self.high_water[learner_id] = devices
+        return self.high_water[learner_id]
+
+    def exchange(self, message):
+        """Merge a client's batch and build its reply"""
+        from scheduler import read_parameters_file
+
+        learner_id = safe_name(message["learner"])
+        device = message["device"]
+        with self.lock:
+            devices = self._devices(learner_id)
+            seen = devices.get(device, 0)
+            fresh = []
+            for event in decode_batch(message["batch"]):
+                if event["seq"] > seen:
+                    origin_seq = event.pop("seq")
+                    fresh.append(dict(event, device=device, origin_seq=origin_seq))
+                    seen = origin_seq
+            append_events(fresh, learner_id)
+            devices[device] = seen
+
+            cursor = message["cursor"]
+            others = []
+            for event in read_events(learner_id):
+                if event["seq"] > cursor:
+                    cursor = event["seq"]
+                    if "device" not in event:
+                        # Recorded on the server itself (e.g. an Anki import there)
+                        event = dict(event, device=SERVER_DEVICE, origin_seq=event["seq"])
+                    if event["device"] != device:
+                        others.append(event)
+        stored = read_parameters_file(learner_id)
+        newer = parameters_version(stored) > message.get("params_version", 0)
+        return {"ack": seen, "cursor": cursor, "batch": encode_batch(others), "params": stored if newer else None}
+
+class SyncHandler(BaseHTTPRequestHandler):
+    """POST /sync with a packed request; answers with a packed reply"""
+
+    store = None
+
+    def do_POST(self):
+        if self.path != SYNC_PATH:
+            self.send_error(404)
+            return
+        length = int(self.headers.get("Content-Length", 0))
+        if not 0 < length <= MAX_REQUEST_BYTES:
+            self.send_error(400, "bad request size")
+            return
+        try:
+            reply = pack(self.store.exchange(unpack(self.rfile.read(length))))
+        except (ValueError, KeyError, TypeError, zlib.error) as error:
+            self.send_error(400, f"bad sync request: {error}")
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(reply)))
+        self.end_headers()
+        self.wfile.write(reply)
+
+    def log_message(self, format, *args):
+        pass      # One line per sync from every student is noise
+
+def make_server(port=DEFAULT_PORT, host="127.0.0.1"):
+    """Sync server on host:port (port 0 picks a free port)"""
+    handler = type("BoundSyncHandler", (SyncHandler,), {"store": SyncStore()})
+    return ThreadingHTTPServer((host, port), handler)
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Sync learning progress with the school server")
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="run the sync server (data in CHINESE_APP_HOME)")
+    serve_parser.add_argument("--host", default="127.0.0.1", help="address to listen on (0.0.0.0 for the network)")
+    serve_parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    sync_parser = commands.add_parser("sync", help="sync this learner's progress now")
+    sync_parser.add_argument("url")
+    sync_parser.add_argument("--learner", help="learner profile (default: CHINESE_APP_LEARNER or your user name)")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        server = make_server(args.port, args.host)
+        print(f"🌐 Sync server at http://{args.host}:{server.server_address[1]}/ "
+              f"(data in {get_data_dir()}, Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.server_close()
+        return
+    try:
+        summary = sync(args.url, args.learner)
+    except (OSError, ValueError, zlib.error) as error:
+        parser.error(f"sync failed, progress stays local until next time: {error}")
+    print(f"🔄 Sent {summary['uploaded']:,} events ({summary['bytes_sent']:,} bytes), received "
+          f"{len(summary['pulled']):,} ({summary['bytes_received']:,} bytes)"
+          f"{', new scheduler parameters' if summary['params_updated'] else ''} "
+          f"in {summary['seconds'] * 1000:.0f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+tracing.py - Hot-path tracing spans for Chinese Learning App
+Times screen builds, widget creation, event handlers and data loading, then
+exports a Chrome trace (open in chrome://tracing or ui.perfetto.dev) and
+prints a p50/p95/p99 summary per span when the app exits.
+
+Enable with CHINESE_APP_TRACE=trace.json or `python main_simplified.py --trace trace.json`.
+When tracing is off, span() returns a shared no-op object and traced
+functions pay a single flag check.
+"""
+
+import atexit
+import functools
+import json
+import math
+import os
+import threading
+import time
+
+_enabled = False
+_output_path = None
+_events = []   # (name, phase, start_ns, duration_ns, thread_id)
+_origin_ns = time.perf_counter_ns()
+
+class _NullSpan:
+    """Span used while tracing is disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    """Records one complete ("X") trace event"""
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        end = time.perf_counter_ns()
+        _events.append((self.name, "X", self.start, end - self.start, threading.get_ident()))
+        return False
+
+def span(name):
+    """Context manager timing a block of code"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+def instant(name):
+    """Record a point in time, e.g. when a delayed callback is scheduled"""
+    if _enabled:
+        _events.append((name, "i", time.perf_counter_ns(), 0, threading.get_ident()))
+
+def traced(name=None):
+    """Decorator timing every call of a function"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            with _Span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def is_enabled():
+    """Whether spans are currently being recorded"""
+    return _enabled
+
+def enable(output_path=None):
+    """Start recording spans; write them to output_path when the app exits"""
+    global _enabled, _output_path
+    if output_path and not _output_path:
+        atexit.register(finish)
+    _output_path = output_path or _output_path
+    _enabled = True
+
+def disable():
+    """Stop recording spans"""
+    global _enabled
+    _enabled = False
+
+def export_chrome_trace(path):
+    """Write recorded spans in Chrome trace / Perfetto JSON format"""
+    pid = os.getpid()
+    trace_events = []
+    for name, phase, start, duration, thread_id in list(_events):
+        event = {
+            "name": name,
+            "cat": "app",
+            "ph": phase,
+            "ts": (start - _origin_ns) / 1000.0,
+            "pid": pid,
+            "tid": thread_id,
+        }
+        if phase == "X":
+            event["dur"] = duration / 1000.0
+        else:
+            event["s"] = "t"
+        trace_events.append(event)
+
+    with open(path, "w", encoding="utf-8") as trace_file:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, trace_file)
+
+def _percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    rank = max(math.ceil(fraction * len(sorted_values)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+def summarize():
+    """Per-span call counts and p50/p95/p99/max durations in milliseconds"""
+    durations = {}
+    for name, phase, _, duration, _ in list(_events):
+        if phase == "X":
+            durations.setdefault(name, []).append(duration / 1e6)
+
+    summary = []
+    for name, values in durations.items():
+        values.sort()
+        summary.append({
+            "name": name,
+            "count": len(values),
+            "total_ms": sum(values),
+            "p50_ms": _percentile(values, 0.50),
+            "p95_ms": _percentile(values, 0.95),
+            "p99_ms": _percentile(values, 0.99),
+            "max_ms": values[-1],
+        })
+    summary.sort(key=lambda row: row["total_ms"], reverse=True)
+    return summary
+
+def format_summary(summary=None):
+    """Render the span summary as a text table"""
+    summary = summarize() if summary is None else summary
+    width = max([len(row["name"]) for row in summary] + [4])
+    lines = [f"{'Span':<{width}} {'Count':>7} {'Total ms':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'Max':>8}"]
+    for row in summary:
+        lines.append(f"{row['name']:<{width}} {row['count']:>7} {row['total_ms']:>10.1f} "
+                     f"{row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} {row['max_ms']:>8.2f}")
+    return "\n".join(lines)
+
+def finish():
+    """Export the trace and print the summary table"""
+    if not _events:
+        return
+    if _output_path:
+        export_chrome_trace(_output_path)
+        print(f"📊 Trace written to {_output_path} (open in ui.perfetto.dev)")
+    print(format_summary())
+
+if os.environ.get("CHINESE_APP_TRACE"):
+    enable(os.environ["CHINESE_APP_TRACE"])
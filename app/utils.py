@@ -6,35 +6,16 @@ Contains all the game logic, UI components, and utility functions with beautiful
 import tkinter as tk
 from tkinter import ttk
 import random
-import sys
-import os
+import re
 
-# Try to import vocabulary from data file, fallback to sample data
-def load_vocabulary():
-    """Load vocabulary data from file or use fallback data"""
-    try:
-        sys.path.append(os.path.join(os.path.dirname(__file__), 'data'))
-        from sample_vocabulary import vocabulary_data
-        return vocabulary_data
-    except ImportError:
-        # Fallback sample data
-        return [
-            {"hanzi": "今天", "pinyin": "jīntiān", "english": "today", "spanish": "hoy"},
-            {"hanzi": "明天", "pinyin": "míngtiān", "english": "tomorrow", "spanish": "mañana"},
-            {"hanzi": "昨天", "pinyin": "zuótiān", "english": "yesterday", "spanish": "ayer"},
-            {"hanzi": "水", "pinyin": "shuǐ", "english": "water", "spanish": "agua"},
-            {"hanzi": "火", "pinyin": "huǒ", "english": "fire", "spanish": "fuego"},
-            {"hanzi": "你好", "pinyin": "nǐ hǎo", "english": "hello", "spanish": "hola"},
-            {"hanzi": "谢谢", "pinyin": "xiè xiè", "english": "thank you", "spanish": "gracias"},
-            {"hanzi": "再见", "pinyin": "zài jiàn", "english": "goodbye", "spanish": "adiós"},
-            {"hanzi": "学习", "pinyin": "xuéxí", "english": "to study", "spanish": "estudiar"},
-            {"hanzi": "朋友", "pinyin": "péngyǒu", "english": "friend", "spanish": "amigo"},
-            {"hanzi": "吃", "pinyin": "chī", "english": "to eat", "spanish": "comer"},
-            {"hanzi": "喝", "pinyin": "hē", "english": "to drink", "spanish": "beber"},
-            {"hanzi": "看", "pinyin": "kàn", "english": "to see", "spanish": "ver"},
-            {"hanzi": "听", "pinyin": "tīng", "english": "to listen", "spanish": "escuchar"},
-            {"hanzi": "说", "pinyin": "shuō", "english": "to speak", "spanish": "hablar"}
-        ]
+from tracing import span, traced
+from vocabulary import (contains_hanzi, get_learning_modes, get_question_answer, load_vocabulary,
+                        load_vocabulary_file, setup_matching_game)
+
+IME_CANDIDATES = 9
+MATCH_HOLD_MS = 600      # Matched cards stay green this long before fading
+FADE_STEP_MS = 150
+PINYIN_COMPOSITION = re.compile(r"[A-Za-züÜ']+$")   # Pinyin still being typed at the end of an answer
 
 def setup_styles():
     """Configure ultra-enhanced ttk styles for stunning appearance"""
@@ -80,6 +61,7 @@ def center_window(root):
     y = (root.winfo_screenheight() // 2) - (height // 2)
     root.geometry(f'{width}x{height}+{x}+{y}')
 
+@traced()
 def clear_frame(frame):
     """Clear all widgets from frame"""
     for widget in frame.winfo_children():
@@ -93,31 +75,7 @@ def create_gradient_label(parent, text, font_size=24, fg_color='#1f2937', bg_sta
     label.pack(pady=10, padx=20)
     return frame
 
-def get_learning_modes():
-    """Return available learning modes"""
-    return [
-        ("Pinyin → Hanzi", "pinyin-hanzi"),
-        ("Pinyin → Spanish", "pinyin-spanish"),
-        ("Pinyin → English", "pinyin-english"),
-        ("Hanzi → Spanish", "hanzi-spanish"),
-        ("Hanzi → English", "hanzi-english"),
-        ("Hanzi + Pinyin → Spanish", "hanzi+pinyin-spanish"),
-        ("Hanzi + Pinyin → English", "hanzi+pinyin-english")
-    ]
-
-def get_question_answer(word, mode):
-    """Get question and answer based on selected mode"""
-    mode_map = {
-        "pinyin-hanzi": (word["pinyin"], word["hanzi"]),
-        "pinyin-spanish": (word["pinyin"], word["spanish"]),
-        "pinyin-english": (word["pinyin"], word["english"]),
-        "hanzi-spanish": (word["hanzi"], word["spanish"]),
-        "hanzi-english": (word["hanzi"], word["english"]),
-        "hanzi+pinyin-spanish": (f"{word['hanzi']} ({word['pinyin']})", word["spanish"]),
-        "hanzi+pinyin-english": (f"{word['hanzi']} ({word['pinyin']})", word["english"])
-    }
-    return mode_map.get(mode, (word["pinyin"], word["hanzi"]))
-
+@traced()
 def prepare_words(vocabulary, mode_var, words_var):
     """Prepare the selected words based on user preferences"""
     current_mode = mode_var.get()
@@ -129,8 +87,47 @@ def update_words_label(words_label, value):
     """Update the words count label"""
     words_label.config(text=f"Selected: {value} words")
 
+@traced()
+def create_loading_screen(main_frame):
+    """Create a lightweight loading screen shown while the deck loads"""
+    clear_frame(main_frame)
+
+    container = tk.Frame(main_frame, bg='#0f172a')
+    container.pack(fill=tk.BOTH, expand=True)
+
+    title_label = tk.Label(container,
+                          text="🇨🇳 Chinese Learning App",
+                          font=('Segoe UI', 28, 'bold'),
+                          bg='#0f172a',
+                          fg='#f8fafc')
+    title_label.pack(pady=(220, 20))
+
+    # Progress bar drawn as a filled frame inside a track
+    track = tk.Frame(container, bg='#1e293b', width=400, height=10)
+    track.pack()
+    track.pack_propagate(False)
+    fill = tk.Frame(track, bg='#8b5cf6', width=0, height=10)
+    fill.place(x=0, y=0, relheight=1, relwidth=0)
+
+    status_label = tk.Label(container,
+                           text="📚 Loading vocabulary...",
+                           font=('Segoe UI', 12),
+                           bg='#0f172a',
+                           fg='#94a3b8')
+    status_label.pack(pady=15)
+
+    return status_label, fill
+
+def update_loading_screen(loading_widgets, text, fraction):
+    """Show loading progress (fraction between 0 and 1)"""
+    status_label, fill = loading_widgets
+    status_label.configure(text=text)
+    fill.place_configure(relwidth=max(0.0, min(1.0, fraction)))
+
+@traced()
 def create_start_screen(main_frame, vocabulary, mode_var, words_var, 
-                       start_flashcards_callback, start_game_callback):
+                       start_flashcards_callback, start_game_callback,
+                       start_confusables_callback=None, typed_var=None, browse_callback=None):
     """Create and display the compact stunning start screen"""
     clear_frame(main_frame)
     
@@ -255,6 +252,21 @@ def create_start_screen(main_frame, vocabulary, mode_var, words_var,
     words_label.pack(pady=(5, 15))
     words_scale.configure(command=lambda v: update_words_label(words_label, v))
     
+    # Typed answers instead of self-grading in flashcards
+    if typed_var is not None:
+        typed_check = tk.Checkbutton(words_card, 
+                                    text="⌨️ Type my answers",
+                                    variable=typed_var,
+                                    font=('Segoe UI', 11),
+                                    bg='#1e293b',
+                                    fg='#e2e8f0',
+                                    activebackground='#334155',
+                                    activeforeground='#f1f5f9',
+                                    selectcolor='#5b21b6',
+                                    bd=0,
+                                    highlightthickness=0)
+        typed_check.pack(pady=(0, 15))
+    
     # Compact action buttons
     button_frame = tk.Frame(scrollable_frame, bg='#0f172a')
     button_frame.pack(pady=20)
@@ -291,33 +303,113 @@ def create_start_screen(main_frame, vocabulary, mode_var, words_var,
                         cursor='hand2')
     game_btn.pack(side=tk.LEFT, padx=15)
     
+    # Matching board built from the learner's most confused pairs
+    if start_confusables_callback:
+        confusables_btn = tk.Button(button_frame, 
+                                   text="🧩 Confusables Drill",
+                                   command=start_confusables_callback,
+                                   font=('Segoe UI', 14, 'bold'),
+                                   bg='#b45309',
+                                   fg='white',
+                                   activebackground='#92400e',
+                                   activeforeground='white',
+                                   relief=tk.FLAT,
+                                   bd=0,
+                                   padx=25,
+                                   pady=12,
+                                   cursor='hand2')
+        confusables_btn.pack(side=tk.LEFT, padx=15)
+    
+    # Sortable, filterable list of the whole deck
+    if browse_callback:
+        browse_btn = tk.Button(button_frame, 
+                              text="📖 Browse Deck",
+                              command=browse_callback,
+                              font=('Segoe UI', 14, 'bold'),
+                              bg='#0e7490',
+                              fg='white',
+                              activebackground='#155e75',
+                              activeforeground='white',
+                              relief=tk.FLAT,
+                              bd=0,
+                              padx=25,
+                              pady=12,
+                              cursor='hand2')
+        browse_btn.pack(side=tk.LEFT, padx=15)
+    
     # Compact info footer
     info_frame = tk.Frame(scrollable_frame, bg='#334155', relief=tk.FLAT, bd=0)
     info_frame.pack(fill=tk.X, pady=(15, 0), padx=20)
     
     info_label = tk.Label(info_frame, 
-                         text=f"📚 {len(vocabulary)} words • 🎯 7 modes • 🚀 Interactive learning",
+                         text=f"📚 {len(vocabulary)} words • 🎯 {len(mode_options)} modes • 🚀 Interactive learning",
                          font=('Segoe UI', 10),
                          bg='#334155',
                          fg='#cbd5e1')
     info_label.pack(pady=12)
     
     # Bind mousewheel to canvas for scrolling
+    bind_mousewheel(canvas)
+
+def bind_mousewheel(canvas):
+    """Scroll canvas with the mouse wheel
+
+    bind_all registers a Tcl command that lives as long as the root window,
+    so the handler is bound once per window and scrolls whichever canvas was
+    bound last instead of piling up a new command on every screen rebuild.
+    """
+    root = canvas.winfo_toplevel()
+    root.scroll_canvas = canvas
+    if getattr(root, 'mousewheel_bound', False):
+        return
+    
     def _on_mousewheel(event):
-        canvas.yview_scroll(int(-1*(event.delta/120)), "units")
+        target = getattr(root, 'scroll_canvas', None)
+        if target is not None and target.winfo_exists():
+            target.yview_scroll(int(-1*(event.delta/120)), "units")
     
-    canvas.bind_all("<MouseWheel>", _on_mousewheel)
+    root.bind_all("<MouseWheel>", _on_mousewheel)
+    root.mousewheel_bound = True
+
+def prepare_flashcard_content(word, current_mode, content):
+    """Fill in everything a flashcard shows; safe to run off the Tk thread"""
+    question, answer = get_question_answer(word, current_mode)
+    content["question"] = question
+    content["answer"] = answer
+    content["mode_text"] = current_mode.replace('-', ' → ').replace('+', ' + ').title()
+    # Hanzi (Chinese characters) get an extra large font, whole cloze sentences less so
+    if current_mode == "cloze-hanzi":
+        content["question_font_size"] = 36
+    else:
+        content["question_font_size"] = 72 if contains_hanzi(question) else 48
+    content["answer_font_size"] = 48 if contains_hanzi(answer) else 32
 
+@traced()
 def create_flashcard_screen(main_frame, word, current_mode, current_index, total_cards,
-                           show_answer_callback, next_card_callback, back_callback):
-    """Create and display an ultra-beautiful flashcard"""
+                           show_answer_callback, next_card_callback, back_callback,
+                           grade_callback=None, content=None, play_callback=None,
+                           typed_answer=False, ime=None):
+    """Create and display an ultra-beautiful flashcard
+
+    When grade_callback is given, the learner grades themselves with
+    Correct/Incorrect buttons (grade_callback(True/False)) instead of Next.
+    content is the card prepared by prepare_flashcard_content (e.g. by the
+    prefetcher); it is computed here when not given. play_callback adds a
+    Listen button that plays content["audio"]. With typed_answer (and a
+    content["answer_key"] from answers.py) the learner types the answer,
+    sees live feedback, and the typed grade goes to grade_callback. An ime
+    (ime.CandidateEngine) turns typed pinyin into hanzi candidates when the
+    answer is hanzi: Space or 1-9 picks one, Esc switches to plain pinyin.
+    """
     clear_frame(main_frame)
     
     # Stunning main container
     container = tk.Frame(main_frame, bg='#0f172a')
     container.pack(fill=tk.BOTH, expand=True, padx=0, pady=0)
     
-    question, answer = get_question_answer(word, current_mode)
+    if content is None:
+        content = {}
+        prepare_flashcard_content(word, current_mode, content)
     
     # Beautiful progress section
     progress_frame = tk.Frame(container, bg='#1e293b', height=120)
@@ -355,9 +447,8 @@ def create_flashcard_screen(main_frame, word, current_mode, current_index, total
     card_frame.lift()
     
     # Mode display with enhanced styling
-    mode_text = current_mode.replace('-', ' → ').replace('+', ' + ').title()
     mode_label = tk.Label(card_frame, 
-                         text=f"Mode: {mode_text}",
+                         text=f"Mode: {content['mode_text']}",
                          font=('Segoe UI', 16),
                          bg='#1e293b',
                          fg='#94a3b8')
@@ -367,13 +458,9 @@ def create_flashcard_screen(main_frame, word, current_mode, current_index, total
     question_frame = tk.Frame(card_frame, bg='#334155', relief=tk.FLAT)
     question_frame.pack(pady=40, padx=40, fill=tk.BOTH, expand=True)
     
-    # Determine if this is hanzi (Chinese characters) for extra large font
-    is_hanzi = any('\u4e00' <= char <= '\u9fff' for char in question)
-    font_size = 72 if is_hanzi else 48
-    
     question_label = tk.Label(question_frame, 
-                             text=question,
-                             font=('Segoe UI', font_size, 'bold'),
+                             text=content["question"],
+                             font=('Segoe UI', content["question_font_size"], 'bold'),
                              bg='#334155', 
                              fg='#f8fafc',
                              wraplength=700)
@@ -386,21 +473,153 @@ def create_flashcard_screen(main_frame, word, current_mode, current_index, total
     separator = tk.Frame(answer_frame, bg='#5b21b6', height=4)
     separator.pack(fill=tk.X, pady=(0, 30), padx=60)
     
-    # Check if answer contains hanzi for font sizing
-    is_answer_hanzi = any('\u4e00' <= char <= '\u9fff' for char in answer)
-    answer_font_size = 48 if is_answer_hanzi else 32
-    
     answer_label = tk.Label(answer_frame, 
-                           text=answer,
-                           font=('Segoe UI', answer_font_size, 'bold'),
+                           text=content["answer"],
+                           font=('Segoe UI', content["answer_font_size"], 'bold'),
                            bg='#1e293b', 
                            fg='#0d9488',
                            wraplength=600)
     
+    # Example sentences from the corpus, revealed with the answer
+    examples_label = None
+    if content.get("examples"):
+        examples_text = "\n".join(f"{chinese}  —  {translation}" if translation else chinese
+                                  for chinese, translation in content["examples"])
+        examples_label = tk.Label(answer_frame, 
+                                 text=examples_text,
+                                 font=('Segoe UI', 14),
+                                 bg='#1e293b', 
+                                 fg='#94a3b8',
+                                 justify=tk.LEFT,
+                                 wraplength=700)
+    
     # Store references for show_answer callback
     answer_frame.answer_label = answer_label
+    answer_frame.examples_label = examples_label
     answer_frame.answer_shown = False
     
+    # Typed answers are graded instead of self-graded
+    answer_key = content.get("answer_key") if typed_answer and grade_callback else None
+    if answer_key:
+        typed_frame = tk.Frame(card_frame, bg='#1e293b')
+        typed_frame.pack(before=answer_frame, pady=(0, 20))
+        
+        answer_entry = tk.Entry(typed_frame, 
+                               font=('Segoe UI', 20),
+                               width=24,
+                               justify=tk.CENTER,
+                               bg='#334155',
+                               fg='#f8fafc',
+                               insertbackground='#f8fafc',
+                               relief=tk.FLAT)
+        answer_entry.pack(ipady=8)
+        answer_entry.focus_set()
+        
+        feedback_label = tk.Label(typed_frame, 
+                                 text="Type the answer (pinyin works for hanzi)",
+                                 font=('Segoe UI', 12),
+                                 bg='#1e293b',
+                                 fg='#94a3b8')
+        feedback_label.pack(pady=(8, 0))
+        typed_state = {"result": None}
+        
+        # IME candidate bar: a fixed row of buttons, relabelled on every keystroke
+        ime_state = {"candidates": [], "enabled": True}
+        candidate_buttons = []
+        if ime is not None and answer_key.is_hanzi:
+            feedback_label.configure(text="Type pinyin: Space or 1-9 picks hanzi, Esc for plain pinyin")
+            candidate_frame = tk.Frame(typed_frame, bg='#1e293b')
+            candidate_frame.pack(before=feedback_label, pady=(8, 0))
+            for number in range(1, IME_CANDIDATES + 1):
+                candidate_btn = tk.Button(candidate_frame, 
+                                         font=('Segoe UI', 16),
+                                         bg='#334155',
+                                         fg='#f8fafc',
+                                         activebackground='#475569',
+                                         activeforeground='white',
+                                         relief=tk.FLAT,
+                                         bd=0,
+                                         padx=10,
+                                         pady=4,
+                                         cursor='hand2',
+                                         command=lambda number=number: pick_candidate(number))
+                candidate_buttons.append(candidate_btn)
+        
+        def refresh_candidates():
+            if not candidate_buttons:
+                return
+            composing = PINYIN_COMPOSITION.search(answer_entry.get())
+            candidates = []
+            if ime_state["enabled"] and composing and typed_state["result"] is None:
+                candidates = ime.candidates(composing.group(), IME_CANDIDATES)
+            if candidates == ime_state["candidates"]:
+                return
+            ime_state["candidates"] = candidates
+            for number, candidate_btn in enumerate(candidate_buttons, 1):
+                if number <= len(candidates):
+                    candidate_btn.configure(text=f"{number} {candidates[number - 1]}")
+                    candidate_btn.pack(side=tk.LEFT, padx=4)
+                else:
+                    candidate_btn.pack_forget()
+        
+        def pick_candidate(number):
+            composing = PINYIN_COMPOSITION.search(answer_entry.get())
+            if composing and number <= len(ime_state["candidates"]):
+                answer_entry.delete(composing.start(), tk.END)
+                answer_entry.insert(tk.END, ime_state["candidates"][number - 1])
+            on_key(None)
+        
+        def on_ime_key(event):
+            if typed_state["result"] is not None:
+                return None
+            if event.keysym == "Escape":
+                ime_state["enabled"] = not ime_state["enabled"]
+                on_key(None)
+                return "break"
+            if not ime_state["candidates"]:
+                return None
+            if event.keysym == "space":
+                pick_candidate(1)
+                return "break"
+            if event.char and event.char in "123456789":
+                pick_candidate(int(event.char))
+                return "break"
+            return None
+        
+        def show_feedback(accepted, verdict, message):
+            if verdict == "empty":
+                color = '#94a3b8'
+            elif accepted:
+                color = '#0d9488'
+            elif verdict in ("wrong_tone", "wrong_syllable"):
+                color = '#f59e0b'
+            else:
+                color = '#dc2626'
+            feedback_label.configure(text=message, fg=color)
+        
+        def on_key(event):
+            if typed_state["result"] is None:
+                refresh_candidates()
+                accepted, verdict, message = answer_key.check(answer_entry.get())
+                # Only encourage while typing; misses are revealed on submit
+                show_feedback(accepted, verdict, message if accepted or verdict != "incorrect" else "")
+        
+        def on_submit(event=None):
+            if typed_state["result"] is None:
+                typed_state["result"] = answer_key.check(answer_entry.get())
+                show_feedback(*typed_state["result"])
+                answer_entry.configure(state='disabled')
+                refresh_candidates()
+                show_answer_callback(answer_frame)
+                check_btn.configure(text="➡️ Continue")
+            else:
+                grade_callback(typed_state["result"][0])
+        
+        answer_entry.bind('<KeyRelease>', on_key)
+        answer_entry.bind('<Return>', on_submit)
+        if candidate_buttons:
+            answer_entry.bind('<Key>', on_ime_key)
+    
     # Gorgeous action buttons
     button_frame = tk.Frame(container, bg='#0f172a')
     button_frame.pack(pady=40)
@@ -418,22 +637,86 @@ def create_flashcard_screen(main_frame, word, current_mode, current_index, total
                         padx=35,
                         pady=18,
                         cursor='hand2')
-    show_btn.pack(side=tk.LEFT, padx=20)
-    
-    next_btn = tk.Button(button_frame, 
-                        text="➡️ Next Word",
-                        command=next_card_callback,
-                        font=('Segoe UI', 16, 'bold'),
-                        bg='#0d9488',
-                        fg='white',
-                        activebackground='#0f766e',
-                        activeforeground='white',
-                        relief=tk.FLAT,
-                        bd=0,
-                        padx=35,
-                        pady=18,
-                        cursor='hand2')
-    next_btn.pack(side=tk.LEFT, padx=20)
+    if not answer_key:
+        show_btn.pack(side=tk.LEFT, padx=20)
+    
+    if play_callback and content.get("audio"):
+        listen_btn = tk.Button(button_frame, 
+                              text="🔊 Listen",
+                              command=lambda: play_callback(content["audio"]),
+                              font=('Segoe UI', 16, 'bold'),
+                              bg='#7c3aed',
+                              fg='white',
+                              activebackground='#6d28d9',
+                              activeforeground='white',
+                              relief=tk.FLAT,
+                              bd=0,
+                              padx=35,
+                              pady=18,
+                              cursor='hand2')
+        listen_btn.pack(side=tk.LEFT, padx=20)
+    
+    if answer_key:
+        check_btn = tk.Button(button_frame, 
+                             text="⏎ Check",
+                             command=on_submit,
+                             font=('Segoe UI', 16, 'bold'),
+                             bg='#0d9488',
+                             fg='white',
+                             activebackground='#0f766e',
+                             activeforeground='white',
+                             relief=tk.FLAT,
+                             bd=0,
+                             padx=35,
+                             pady=18,
+                             cursor='hand2')
+        check_btn.pack(side=tk.LEFT, padx=20)
+    elif grade_callback:
+        # Self-grading buttons feed the review log and scheduler
+        correct_btn = tk.Button(button_frame, 
+                               text="✓ Correct",
+                               command=lambda: grade_callback(True),
+                               font=('Segoe UI', 16, 'bold'),
+                               bg='#0d9488',
+                               fg='white',
+                               activebackground='#0f766e',
+                               activeforeground='white',
+                               relief=tk.FLAT,
+                               bd=0,
+                               padx=35,
+                               pady=18,
+                               cursor='hand2')
+        correct_btn.pack(side=tk.LEFT, padx=20)
+        
+        incorrect_btn = tk.Button(button_frame, 
+                                 text="✗ Incorrect",
+                                 command=lambda: grade_callback(False),
+                                 font=('Segoe UI', 16, 'bold'),
+                                 bg='#dc2626',
+                                 fg='white',
+                                 activebackground='#b91c1c',
+                                 activeforeground='white',
+                                 relief=tk.FLAT,
+                                 bd=0,
+                                 padx=35,
+                                 pady=18,
+                                 cursor='hand2')
+        incorrect_btn.pack(side=tk.LEFT, padx=20)
+    else:
+        next_btn = tk.Button(button_frame, 
+                            text="➡️ Next Word",
+                            command=next_card_callback,
+                            font=('Segoe UI', 16, 'bold'),
+                            bg='#0d9488',
+                            fg='white',
+                            activebackground='#0f766e',
+                            activeforeground='white',
+                            relief=tk.FLAT,
+                            bd=0,
+                            padx=35,
+                            pady=18,
+                            cursor='hand2')
+        next_btn.pack(side=tk.LEFT, padx=20)
     
     # Beautiful back button
     back_btn = tk.Button(container, 
@@ -455,9 +738,13 @@ def show_flashcard_answer(answer_frame):
     """Show the answer on the flashcard with beautiful animation"""
     if not answer_frame.answer_shown:
         answer_frame.answer_label.pack()
+        if answer_frame.examples_label:
+            answer_frame.examples_label.pack(pady=(15, 0))
         answer_frame.answer_shown = True
 
-def create_flashcard_results(main_frame, total_cards, retry_callback, menu_callback):
+@traced()
+def create_flashcard_results(main_frame, total_cards, retry_callback, menu_callback,
+                             correct_count=None):
     """Show spectacular flashcard session completion"""
     clear_frame(main_frame)
     
@@ -490,6 +777,8 @@ def create_flashcard_results(main_frame, total_cards, retry_callback, menu_callb
     
     # Beautiful completion message
     completion_text = f"You reviewed {total_cards} words!"
+    if correct_count is not None:
+        completion_text = f"You got {correct_count} of {total_cards} words right!"
     completion_label = tk.Label(results_frame, 
                                text=completion_text,
                                font=('Segoe UI', 24),
@@ -539,20 +828,7 @@ def create_flashcard_results(main_frame, total_cards, retry_callback, menu_callb
                         cursor='hand2')
     menu_btn.pack(side=tk.LEFT, padx=25)
 
-def setup_matching_game(selected_words, current_mode):
-    """Setup the matching game pairs"""
-    game_pairs = []
-    
-    for word in selected_words:
-        question, answer = get_question_answer(word, current_mode)
-        game_pairs.extend([
-            {"text": question, "pair_id": len(game_pairs) // 2, "type": "question"},
-            {"text": answer, "pair_id": len(game_pairs) // 2, "type": "answer"}
-        ])
-    
-    random.shuffle(game_pairs)
-    return game_pairs
-
+@traced()
 def create_matching_game_screen(main_frame, game_pairs, current_mode, score, matched_pairs,
                                selected_words, card_click_callback, back_callback):
     """Display the spectacular matching game"""
@@ -603,37 +879,38 @@ def create_matching_game_screen(main_frame, game_pairs, current_mode, score, mat
     rows = (total_cards + cols - 1) // cols
     
     game_buttons = []
-    for i, pair in enumerate(game_pairs):
-        row = i // cols
-        col = i % cols
-        
-        # Determine if this is hanzi for larger font
-        is_hanzi = any('\u4e00' <= char <= '\u9fff' for char in pair["text"])
-        font_size = 24 if is_hanzi else 16
-        
-        # Spectacular button styling
-        btn = tk.Button(game_frame, 
-                       text=pair["text"],
-                       font=('Segoe UI', font_size, 'bold'),
-                       bg='#5b21b6',
-                       fg='white',
-                       activebackground='#4c1d95',
-                       activeforeground='white',
-                       relief=tk.RAISED,
-                       bd=3,
-                       width=12 if is_hanzi else 16, 
-                       height=4,
-                       wraplength=140,
-                       cursor='hand2',
-                       command=lambda idx=i: card_click_callback(idx))
-        btn.grid(row=row, column=col, padx=12, pady=12, sticky='nsew')
-        
-        # Store pair info
-        btn.pair_info = pair
-        btn.index = i
-        btn.matched = False
-        btn.is_hanzi = is_hanzi
-        game_buttons.append(btn)
+    with span("create_matching_game_screen.cards"):
+        for i, pair in enumerate(game_pairs):
+            row = i // cols
+            col = i % cols
+            
+            # Determine if this is hanzi for larger font
+            is_hanzi = any('\u4e00' <= char <= '\u9fff' for char in pair["text"])
+            font_size = 24 if is_hanzi else 16
+            
+            # Spectacular button styling
+            btn = tk.Button(game_frame, 
+                           text=pair["text"],
+                           font=('Segoe UI', font_size, 'bold'),
+                           bg='#5b21b6',
+                           fg='white',
+                           activebackground='#4c1d95',
+                           activeforeground='white',
+                           relief=tk.RAISED,
+                           bd=3,
+                           width=12 if is_hanzi else 16, 
+                           height=4,
+                           wraplength=140,
+                           cursor='hand2',
+                           command=lambda idx=i: card_click_callback(idx))
+            btn.grid(row=row, column=col, padx=12, pady=12, sticky='nsew')
+            
+            # Store pair info
+            btn.pair_info = pair
+            btn.index = i
+            btn.matched = False
+            btn.is_hanzi = is_hanzi
+            game_buttons.append(btn)
     
     # Configure grid weights for responsive layout
     for i in range(cols):
@@ -669,12 +946,13 @@ def show_immediate_feedback(card, is_correct):
 def animate_matched_cards_disappear(card1, card2, callback):
     """Animate matched cards to disappear with beautiful effect"""
     # Keep cards green for a moment
-    card1.after(600, lambda: fade_out_cards_beautifully(card1, card2, callback))
+    card1.after(MATCH_HOLD_MS, lambda: fade_out_cards_beautifully(card1, card2, callback))
 
 def fade_out_cards_beautifully(card1, card2, callback):
     """Beautiful fade out animation for matched cards"""
     fade_colors = ['#10b981', '#34d399', '#6ee7b7', '#9ca3af', '#d1d5db', '#f3f4f6']
     
+    @traced("fade_step")
     def fade_step(step=0):
         if step < len(fade_colors):
             try:
@@ -682,7 +960,7 @@ def fade_out_cards_beautifully(card1, card2, callback):
                                activebackground=fade_colors[step])
                 card2.configure(bg=fade_colors[step], fg=fade_colors[step],
                                activebackground=fade_colors[step])
-                card1.after(150, lambda: fade_step(step + 1))
+                card1.after(FADE_STEP_MS, lambda: fade_step(step + 1))
             except tk.TclError:
                 pass
         else:
@@ -698,6 +976,7 @@ def fade_out_cards_beautifully(card1, card2, callback):
     
     fade_step()
 
+@traced()
 def create_game_results(main_frame, score, selected_words, play_again_callback, menu_callback):
     """Show spectacular matching game results"""
     clear_frame(main_frame)
@@ -0,0 +1,227 @@
+"""
+validate.py - Deck validation and deduplication for Chinese Learning App
+Checks one or more decks (merged in order) in a single streaming pass:
+every entry must have the four fields as non-empty text, hanzi that are
+Chinese characters and pinyin that parses, with one syllable per character.
+Duplicates are found by hashing normalized keys: the same hanzi, or
+(near-duplicates) different hanzi with the same toned pinyin and gloss.
+Only 64-bit hashes are kept, in flat open-addressing tables, so memory does
+not depend on how long the entries are, and the report is streamed to disk.
+
+JSON decks written one entry per line (as anki.py does) and .jsonl files
+are read line by line; vocabulary modules are imported as usual.
+
+Usage:
+    python validate.py data/sample_vocabulary.py decks/extra.json --report report.json
+"""
+
+import argparse
+import hashlib
+import json
+import sys
+import time
+import unicodedata
+from array import array
+from itertools import chain, islice
+
+from answers import normalize_gloss
+from pinyin import decode, encode, is_erhua
+from segmenter import HANZI_RUN
+
+REQUIRED_FIELDS = ["hanzi", "pinyin", "english", "spanish"]
+OPTIONAL_FIELDS = {"cloze"}
+ERROR = "error"           # The app would crash or show garbage
+WARNING = "warning"
+DEFAULT_CAPACITY = 1 << 18
+APP_DECK = "(app deck)"
+MAX_LOAD = 0.7
+
+class HashIndex:
+    """Open-addressing table of 64-bit key hashes -> index of the entry first seen with them"""
+
+    def __init__(self, capacity=DEFAULT_CAPACITY):
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.mask = capacity - 1
+        self.hashes = array("Q", [0]) * capacity     # 0 marks an empty slot
+        self.first = array("q", [0]) * capacity
+        self.count = 0
+
+    def add(self, key_hash, index):
+        """Remember key_hash for entry index; returns the earlier index if it was already seen"""
+        slot = key_hash & self.mask
+        hashes = self.hashes
+        while hashes[slot]:
+            if hashes[slot] == key_hash:
+                return self.first[slot]
+            slot = (slot + 1) & self.mask
+        hashes[slot] = key_hash
+        self.first[slot] = index
+        self.count += 1
+        if self.count > self.capacity * MAX_LOAD:
+            self._grow()
+        return None
+
+    def _grow(self):
+        """Double the table (only when far more keys arrive than it was sized for)"""
+        old = [(key_hash, first) for key_hash, first in zip(self.hashes, self.first) if key_hash]
+        self._allocate(self.capacity * 2)
+        for key_hash, first in old:
+            self.add(key_hash, first)
+
+def key_hash(text):
+    """64-bit hash of a normalized key (never 0)"""
+    return int.from_bytes(hashlib.blake2b(text.encode("utf-8"), digest_size=8).digest(), "little") or 1
+
+def iter_deck(path=None):
+    """Yield a deck's entries (the app's deck for None), streaming JSON-lines and one-entry-per-line JSON"""
+    if path and path.endswith(".jsonl"):
+        with open(path, encoding="utf-8") as deck_file:
+            for line in deck_file:
+                if line.strip():
+                    yield json.loads(line)
+        return
+    if path and path.endswith(".json"):
+        with open(path, encoding="utf-8") as deck_file:
+            head = list(islice(deck_file, 2))
+            if _is_line_per_entry(head):
+                for line in chain(head[1:], deck_file):
+                    line = line.strip().rstrip(",")
+                    if line and line != "]":
+                        yield json.loads(line)
+                return
+            deck_file.seek(0)
+            yield from json.load(deck_file)
+        return
+    from vocabulary import load_vocabulary
+
+    yield from load_vocabulary(path)
+
+def _is_line_per_entry(head):
+    """Whether a JSON file starts "[" then one entry per line"""
+    if len(head) < 2 or head[0].strip() != "[":
+        return False
+    try:
+        return isinstance(json.loads(head[1].strip().rstrip(",")), dict)
+    except ValueError:
+        return False
+
+def check_entry(entry):
+    """Schema and pinyin problems of one entry: [(level, code, message)]"""
+    if not isinstance(entry, dict):
+        return [(ERROR, "not_an_entry", f"expected an object, got {type(entry).__name__}")]
+    issues = []
+    for field in REQUIRED_FIELDS:
+        value = entry.get(field)
+        if value is None:
+            issues.append((ERROR, "missing_field", f"no {field!r}"))
+        elif not isinstance(value, str):
+            issues.append((ERROR, "bad_type", f"{field!r} is {type(value).__name__}, not text"))
+        elif not value.strip():
+            issues.append((ERROR, "empty_field", f"{field!r} is empty"))
+    for field in entry.keys() - set(REQUIRED_FIELDS) - OPTIONAL_FIELDS:
+        issues.append((WARNING, "unknown_field", f"unexpected field {field!r}"))
+
+    hanzi, pinyin = entry.get("hanzi"), entry.get("pinyin")
+    if isinstance(hanzi, str) and hanzi.strip() and not HANZI_RUN.search(hanzi):
+        issues.append((ERROR, "no_hanzi", f"hanzi {hanzi!r} has no Chinese characters"))
+    if isinstance(pinyin, str) and pinyin.strip():
+        codes = encode(pinyin)
+        if codes is None:
+            issues.append((ERROR, "bad_pinyin", f"pinyin {pinyin!r} does not parse"))
+        elif isinstance(hanzi, str):
+            characters = sum(len(run) for run in HANZI_RUN.findall(hanzi))
+            # Erhua is usually written with its own 儿 (一点儿 = yìdiǎnr)
+            syllables = len(codes) + sum(1 for code in codes if is_erhua(code))
+            if characters and characters not in (len(codes), syllables):
+                issues.append((WARNING, "syllable_count",
+                               f"{characters} characters but {len(codes)} syllables ({decode(codes, 'numbers')})"))
+    return issues
+
+def duplicate_keys(entry):
+    """(exact key, near-duplicate key) of an entry; None where a field is unusable"""
+    hanzi, pinyin, english = entry.get("hanzi"), entry.get("pinyin"), entry.get("english")
+    exact = near = None
+    if isinstance(hanzi, str) and hanzi.strip():
+        exact = unicodedata.normalize("NFKC", "".join(hanzi.split()))
+    if isinstance(pinyin, str) and isinstance(english, str):
+        codes = encode(pinyin)
+        if codes:
+            near = decode(codes, "numbers", "") + "\x1f" + normalize_gloss(english)
+    return exact, near
+
+def validate(paths, report_file, capacity=DEFAULT_CAPACITY):
+    """Check decks in one pass, writing issues to report_file as they are found
+
+    Returns the summary that ends the report.
+    """
+    by_hanzi = HashIndex(capacity)
+    by_reading = HashIndex(capacity)
+    sources = []          # (path, global index of its first entry), to name earlier entries
+    counts = {}
+    totals = {ERROR: 0, WARNING: 0}
+    index = 0
+    wrote_issue = False
+
+    def locate(global_index):
+        path, offset = next((path, offset) for path, offset in reversed(sources) if offset <= global_index)
+        return {"source": path, "index": global_index - offset}
+
+    report_file.write('{"issues": [')
+    for path in paths:
+        sources.append((path or APP_DECK, index))
+        for entry in iter_deck(path):
+            issues = check_entry(entry)
+            if isinstance(entry, dict):
+                exact, near = duplicate_keys(entry)
+                first = by_hanzi.add(key_hash(exact), index) if exact else None
+                if first is not None:
+                    issues.append((WARNING, "duplicate", "same hanzi as an earlier entry", first))
+                elif near:
+                    first = by_reading.add(key_hash(near), index)
+                    if first is not None:
+                        issues.append((WARNING, "near_duplicate", "same pinyin and gloss as an earlier entry",
+                                       first))
+            for level, code, message, *first in issues:
+                issue = {"level": level, "code": code, "message": message, **locate(index),
+                         "hanzi": entry.get("hanzi") if isinstance(entry, dict) else None}
+                if first:
+                    issue["first"] = locate(first[0])
+                report_file.write(("," if wrote_issue else "") + "\n" + json.dumps(issue, ensure_ascii=False))
+                wrote_issue = True
+                counts[code] = counts.get(code, 0) + 1
+                totals[level] += 1
+            index += 1
+    summary = {"decks": [path or APP_DECK for path in paths], "entries": index, "errors": totals[ERROR], "warnings": totals[WARNING],
+               "counts": counts, "unique_hanzi": by_hanzi.count}
+    report_file.write("\n], \"summary\": " + json.dumps(summary, ensure_ascii=False) + "}\n")
+    return summary
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Validate and deduplicate decks in one streaming pass")
+    parser.add_argument("decks", nargs="*", help="vocabulary modules, .json or .jsonl decks (default: the app's deck)")
+    parser.add_argument("--report", default="-", help="JSON report path (default: stdout)")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY,
+                        help="initial hash table slots (a power of two)")
+    args = parser.parse_args()
+
+    paths = args.decks or [None]
+    if args.capacity & (args.capacity - 1):
+        parser.error("--capacity must be a power of two")
+
+    start = time.perf_counter()
+    if args.report == "-":
+        summary = validate(paths, sys.stdout, args.capacity)
+    else:
+        with open(args.report, "w", encoding="utf-8") as report_file:
+            summary = validate(paths, report_file, args.capacity)
+    counts = " ".join(f"{code}={count}" for code, count in sorted(summary["counts"].items()))
+    print(f"🔍 {summary['entries']:,} entries in {time.perf_counter() - start:.1f}s: "
+          f"{summary['errors']:,} errors, {summary['warnings']:,} warnings {counts}", file=sys.stderr)
+    sys.exit(1 if summary["errors"] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+vocabulary.py - Deck loading and learning-mode helpers for Chinese Learning App
+The plain-Python half of utils.py: loading decks, turning a word into a
+question and answer for a mode, and laying out matching-game pairs. It does
+not import tkinter, so the notebook frontend and the command line tools can
+use it on machines without a display or a Tk build.
+"""
+
+import os
+import random
+import sys
+
+from tracing import traced
+
+# Try to import vocabulary from data file, fallback to sample data
+@traced()
+def load_vocabulary(path=None):
+    """Load vocabulary data from file or use fallback data
+
+    path may point at any vocabulary module defining vocabulary_data, at a
+    JSON list of words (e.g. written by anki.py) or at a deck bundle, which
+    is returned as a lazily inflated sequence (see bundle.py).
+    """
+    if path:
+        return load_vocabulary_file(path)
+    try:
+        sys.path.append(os.path.join(os.path.dirname(__file__), 'data'))
+        from sample_vocabulary import vocabulary_data
+        return vocabulary_data
+    except ImportError:
+        # Fallback sample data
+        return [
+            {"hanzi": "今天", "pinyin": "jīntiān", "english": "today", "spanish": "hoy"},
+            {"hanzi": "明天", "pinyin": "míngtiān", "english": "tomorrow", "spanish": "mañana"},
+            {"hanzi": "昨天", "pinyin": "zuótiān", "english": "yesterday", "spanish": "ayer"},
+            {"hanzi": "水", "pinyin": "shuǐ", "english": "water", "spanish": "agua"},
+            {"hanzi": "火", "pinyin": "huǒ", "english": "fire", "spanish": "fuego"},
+            {"hanzi": "你好", "pinyin": "nǐ hǎo", "english": "hello", "spanish": "hola"},
+            {"hanzi": "谢谢", "pinyin": "xiè xiè", "english": "thank you", "spanish": "gracias"},
+            {"hanzi": "再见", "pinyin": "zài jiàn", "english": "goodbye", "spanish": "adiós"},
+            {"hanzi": "学习", "pinyin": "xuéxí", "english": "to study", "spanish": "estudiar"},
+            {"hanzi": "朋友", "pinyin": "péngyǒu", "english": "friend", "spanish": "amigo"},
+            {"hanzi": "吃", "pinyin": "chī", "english": "to eat", "spanish": "comer"},
+            {"hanzi": "喝", "pinyin": "hē", "english": "to drink", "spanish": "beber"},
+            {"hanzi": "看", "pinyin": "kàn", "english": "to see", "spanish": "ver"},
+            {"hanzi": "听", "pinyin": "tīng", "english": "to listen", "spanish": "escuchar"},
+            {"hanzi": "说", "pinyin": "shuō", "english": "to speak", "spanish": "hablar"}
+        ]
+
+def load_vocabulary_file(path):
+    """Load vocabulary_data from a vocabulary module (or a JSON deck or bundle) at an explicit path"""
+    if path.endswith(".bundle"):
+        from bundle import DeckBundle
+        return DeckBundle(path)
+    if path.endswith(".json"):
+        import json
+        with open(path, encoding="utf-8") as deck_file:
+            return json.load(deck_file)
+    
+    import importlib.util
+    
+    spec = importlib.util.spec_from_file_location("vocabulary_file", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module.vocabulary_data
+
+def deck_hanzi(vocabulary):
+    """Every word's hanzi in deck order; a bundle answers from its index without inflating entries"""
+    hanzi = getattr(vocabulary, "hanzi", None)
+    return hanzi if hanzi is not None else [word["hanzi"] for word in vocabulary]
+
+def get_learning_modes():
+    """Return available learning modes"""
+    return [
+        ("Pinyin → Hanzi", "pinyin-hanzi"),
+        ("Pinyin → Spanish", "pinyin-spanish"),
+        ("Pinyin → English", "pinyin-english"),
+        ("Hanzi → Spanish", "hanzi-spanish"),
+        ("Hanzi → English", "hanzi-english"),
+        ("Hanzi + Pinyin → Spanish", "hanzi+pinyin-spanish"),
+        ("Hanzi + Pinyin → English", "hanzi+pinyin-english"),
+        ("Cloze → Hanzi", "cloze-hanzi")
+    ]
+
+def get_question_answer(word, mode):
+    """Get question and answer based on selected mode"""
+    mode_map = {
+        "pinyin-hanzi": (word["pinyin"], word["hanzi"]),
+        "pinyin-spanish": (word["pinyin"], word["spanish"]),
+        "pinyin-english": (word["pinyin"], word["english"]),
+        "hanzi-spanish": (word["hanzi"], word["spanish"]),
+        "hanzi-english": (word["hanzi"], word["english"]),
+        "hanzi+pinyin-spanish": (f"{word['hanzi']} ({word['pinyin']})", word["spanish"]),
+        "hanzi+pinyin-english": (f"{word['hanzi']} ({word['pinyin']})", word["english"]),
+        # Cloze words carry a sentence with the word blanked out (see cloze.py)
+        "cloze-hanzi": (word.get("cloze", word["pinyin"]), word["hanzi"])
+    }
+    return mode_map.get(mode, (word["pinyin"], word["hanzi"]))
+
+def contains_hanzi(text):
+    """Whether text contains Chinese characters"""
+    return any('\u4e00' <= char <= '\u9fff' for char in text)
+
+@traced()
+def setup_matching_game(selected_words, current_mode):
+    """Setup the matching game pairs"""
+    game_pairs = []
+    
+    for word in selected_words:
+        question, answer = get_question_answer(word, current_mode)
+        game_pairs.extend([
+            {"text": question, "pair_id": len(game_pairs) // 2, "type": "question"},
+            {"text": answer, "pair_id": len(game_pairs) // 2, "type": "answer"}
+        ])
+    
+    random.shuffle(game_pairs)
+    return game_pairs
@@ -0,0 +1,346 @@
+"""
+worksheets.py - Printable flashcard sheets and worksheets for Chinese Learning App
+Renders A4 SVG pages for a class: double-sided flashcard sheets (backs are
+mirrored so they line up when printed duplex) and a matching worksheet, in
+any learning mode. Every student gets a personalised selection and order
+(seeded by name), plus an answer key and a print.html that prints the whole
+pack in one go. Packs are laid out and rendered across a process pool.
+
+With --font (a CJK .ttf/.otf, needs fontTools) text is drawn from glyph
+outlines instead of relying on the printer's fonts: each worker extracts a
+glyph once, caches it, and every page defines the glyphs it uses once as
+symbols that its text <use>s.
+
+Usage:
+    python worksheets.py out/ --students class.txt --mode hanzi-english --words 20
+    python worksheets.py out/ --count 500 --font NotoSansSC-Regular.otf --workers 8
+"""
+
+import argparse
+import html
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from storage import safe_name
+from vocabulary import get_learning_modes, get_question_answer, load_vocabulary
+
+PAGE_WIDTH = 210         # A4, in millimetres
+PAGE_HEIGHT = 297
+MARGIN = 12
+CARD_COLUMNS = 2
+CARD_ROWS = 5
+MATCHING_ROWS = 12
+CARD_PADDING = 4
+MAX_FONT_SIZE = 16       # mm
+MIN_FONT_SIZE = 5
+INK = "#111827"
+FAINT = "#9ca3af"
+FONT_FAMILY = "Noto Sans SC, PingFang SC, Microsoft YaHei, SimHei, sans-serif"
+
+_glyphs = None           # Per worker process, set up once by _init_worker
+
+def _init_worker(font_path):
+    """Process pool initializer: open the font once per worker"""
+    global _glyphs
+    _glyphs = GlyphCache(font_path) if font_path else None
+
+def is_wide(char):
+    """Whether a character takes a full em (CJK and full-width forms)"""
+    return ord(char) >= 0x2e80
+
+class GlyphCache:
+    """Glyph outlines from a font, extracted once per character (needs fontTools)"""
+
+    def __init__(self, font_path):
+        try:
+            from fontTools.ttLib import TTFont
+        except ImportError:
+            raise ValueError("--font needs fontTools (pip install fonttools)")
+        self.font = TTFont(font_path)
+        self.glyph_set = self.font.getGlyphSet()
+        self.cmap = self.font.getBestCmap()
+        self.units_per_em = self.font["head"].unitsPerEm
+        self.outlines = {}
+
+    def outline(self, char):
+        """(glyph id, SVG path in font units, advance) for a character, None if the font lacks it"""
+        if char not in self.outlines:
+            from fontTools.pens.svgPathPen import SVGPathPen
+
+            name = self.cmap.get(ord(char))
+            if name is None:
+                self.outlines[char] = None
+            else:
+                pen = SVGPathPen(self.glyph_set)
+                glyph = self.glyph_set[name]
+                glyph.draw(pen)
+                self.outlines[char] = (f"g{ord(char):x}", pen.getCommands(), glyph.width)
+        return self.outlines[char]
+
+class Page:
+    """One SVG page, measured in millimetres"""
+
+    def __init__(self, glyphs=None):
+        self.glyphs = glyphs
+        self.parts = []
+        self.symbols = {}    # Glyph id -> path, written once in <defs>
+
+    def _outlines(self, text):
+        """Outlines for every character of text, or None to fall back to <text>"""
+        if self.glyphs is None:
+            return None
+        outlines = [self.glyphs.outline(char) for char in text]
+        return None if None in outlines else outlines
+
+    def measure(self, text, size):
+        """Width of text at a font size"""
+        outlines = self._outlines(text)
+        if outlines is not None:
+            return sum(advance for _, _, advance in outlines) * size / self.glyphs.units_per_em
+        return sum(size if is_wide(char) else 0.55 * size for char in text)
+
+    def rect(self, x, y, width, height, dashed=False):
+        dash = ' stroke-dasharray="2,2"' if dashed else ""
+        self.parts.append(f'<rect x="{x:.2f}" y="{y:.2f}" width="{width:.2f}" height="{height:.2f}" '
+                          f'fill="none" stroke="{FAINT}" stroke-width="0.3"{dash}/>')
+
+    def line(self, x1, y1, x2, y2):
+        self.parts.append(f'<line x1="{x1:.2f}" y1="{y1:.2f}" x2="{x2:.2f}" y2="{y2:.2f}" '
+                          f'stroke="{FAINT}" stroke-width="0.3"/>')
+
+    def text(self, x, y, text, size, anchor="start", color=INK, bold=False):
+        """Draw one line of text with its baseline at y"""
+        outlines = self._outlines(text)
+        if outlines is None:
+            weight = ' font-weight="bold"' if bold else ""
+            self.parts.append(f'<text x="{x:.2f}" y="{y:.2f}" font-size="{size:.2f}" fill="{color}" '
+                              f'text-anchor="{anchor}"{weight}>{html.escape(text)}</text>')
+            return
+        width = self.measure(text, size)
+        x -= {"start": 0, "middle": width / 2, "end": width}[anchor]
+        scale = size / self.glyphs.units_per_em
+        uses = []
+        for glyph_id, path, advance in outlines:
+            self.symbols[glyph_id] = path
+            uses.append(f'<use href="#{glyph_id}" x="{x / scale:.1f}"/>')
+            x += advance * scale
+        # One group per line: glyphs are placed in font units, flipped to SVG's y-down
+        self.parts.append(f'<g fill="{color}" transform="translate(0 {y:.2f}) scale({scale:.5f} {-scale:.5f})">'
+                          + "".join(uses) + "</g>")
+
+    def fitted_text(self, x, y, width, height, text, max_size=MAX_FONT_SIZE, color=INK):
+        """Text centred in a box: shrunk to fit on one line, wrapped if it still does not fit"""
+        size = max_size
+        while size > MIN_FONT_SIZE and self.measure(text, size) > width:
+            size -= 1
+        fits = "\n" not in text and self.measure(text, size) <= width
+        lines = [text] if fits else self.wrap(text, size, width)
+        line_height = size * 1.25
+        lines = lines[:max(1, int(height // line_height))]
+        baseline = y + (height - line_height * len(lines)) / 2 + size
+        for line in lines:
+            self.text(x + width / 2, baseline, line, size, "middle", color)
+            baseline += line_height
+
+    def wrap(self, text, size, width):
+        """Break text into lines no wider than width (at spaces, or anywhere in CJK text)"""
+        lines = []
+        for paragraph in text.split("\n"):
+            wide = any(map(is_wide, paragraph))
+            separator = "" if wide else " "
+            current = ""
+            for token in (paragraph if wide else paragraph.split(" ")):
+                candidate = f"{current}{separator}{token}" if current else token
+                if current and self.measure(candidate, size) > width:
+                    lines.append(current)
+                    current = token
+                else:
+                    current = candidate
+            lines.append(current)
+        return lines
+
+    def to_svg(self):
+        """The finished page"""
+        defs = "".join(f'<path id="{glyph_id}" d="{path}"/>' for glyph_id, path in self.symbols.items())
+        return (f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+                f'width="{PAGE_WIDTH}mm" height="{PAGE_HEIGHT}mm" viewBox="0 0 {PAGE_WIDTH} {PAGE_HEIGHT}" '
+                f'font-family="{FONT_FAMILY}">'
+                + (f"<defs>{defs}</defs>" if defs else "")
+                + f'<rect width="{PAGE_WIDTH}" height="{PAGE_HEIGHT}" fill="white"/>'
+                + "".join(self.parts) + "</svg>\n")
+
+def get_mode_text(mode):
+    """Display name of a learning mode"""
+    return next((text for text, value in get_learning_modes() if value == mode), mode)
+
+def flashcard_page(words, mode, back=False, glyphs=None):
+    """A sheet of cut-out cards: questions on the front, answers on the back"""
+    page = Page(glyphs)
+    card_width = (PAGE_WIDTH - 2 * MARGIN) / CARD_COLUMNS
+    card_height = (PAGE_HEIGHT - 2 * MARGIN) / CARD_ROWS
+    for position, word in enumerate(words):
+        row, column = divmod(position, CARD_COLUMNS)
+        if back:
+            # Mirror the columns so each answer prints behind its question
+            column = CARD_COLUMNS - 1 - column
+        x = MARGIN + column * card_width
+        y = MARGIN + row * card_height
+        page.rect(x, y, card_width, card_height, dashed=True)
+        question, answer = get_question_answer(word, mode)
+        page.fitted_text(x + CARD_PADDING, y + CARD_PADDING, card_width - 2 * CARD_PADDING,
+                         card_height - 2 * CARD_PADDING, answer if back else question)
+    return page
+
+def matching_page(words, mode, student, rng, glyphs=None):
+    """Numbered questions on the left, lettered answers shuffled on the right
+
+    Returns (page, answer key as "1-C" strings).
+    """
+    page = Page(glyphs)
+    page.text(MARGIN, MARGIN + 8, f"Matching: {get_mode_text(mode)}", 8, bold=True)
+    page.text(PAGE_WIDTH - MARGIN, MARGIN + 8, f"Name: {student}", 5, "end", FAINT)
+    pairs = [get_question_answer(word, mode) for word in words]
+    order = list(range(len(pairs)))
+    rng.shuffle(order)
+
+    top = MARGIN + 20
+    row_height = (PAGE_HEIGHT - top - MARGIN) / MATCHING_ROWS
+    column_width = (PAGE_WIDTH - 2 * MARGIN) / 2
+    key = []
+    for row, (question, _) in enumerate(pairs):
+        y = top + row * row_height
+        page.text(MARGIN, y + row_height / 2 + 2, f"{row + 1}.", 5)
+        page.line(MARGIN + 8, y + row_height - 3, MARGIN + 16, y + row_height - 3)
+        page.fitted_text(MARGIN + 18, y, column_width - 22, row_height, question, max_size=10)
+        letter = chr(ord("A") + row)
+        _, answer = pairs[order[row]]
+        page.text(MARGIN + column_width, y + row_height / 2 + 2, f"{letter}.", 5)
+        page.fitted_text(MARGIN + column_width + 8, y, column_width - 8, row_height, answer, max_size=10)
+        # Answer `letter` belongs to question order[row]; question `row` is answered by order.index(row)
+        key.append(f"{row + 1}-{chr(ord('A') + order.index(row))}")
+    return page, key
+
+def answer_key_page(student, keys, glyphs=None):
+    """The teacher's key for a student's matching worksheets"""
+    page = Page(glyphs)
+    page.text(MARGIN, MARGIN + 8, f"Answer key: {student}", 8, bold=True)
+    y = MARGIN + 20
+    for sheet, key in enumerate(keys, 1):
+        page.text(MARGIN, y, f"Worksheet {sheet}:  " + "   ".join(key), 5)
+        y += 8
+    return page
+
+def chunk(items, size):
+    """Consecutive slices of at most size items"""
+    return [items[start:start + size] for start in range(0, len(items), size)]
+
+def render_pack(task):
+    """Worker: lay out and write one student's pages; returns (student, pages written)"""
+    student, words, mode, output_dir, seed = task
+    rng = random.Random(f"{seed}:{student}")
+    pack_dir = os.path.join(output_dir, safe_name(student))
+    os.makedirs(pack_dir, exist_ok=True)
+
+    pages, keys = [], []
+    cards_per_page = CARD_COLUMNS * CARD_ROWS
+    for page_words in chunk(words, cards_per_page):
+        pages.append(flashcard_page(page_words, mode, back=False, glyphs=_glyphs))
+        pages.append(flashcard_page(page_words, mode, back=True, glyphs=_glyphs))
+    for page_words in chunk(words, MATCHING_ROWS):
+        page, key = matching_page(page_words, mode, student, rng, _glyphs)
+        pages.append(page)
+        keys.append(key)
+
+    svgs = [page.to_svg() for page in pages]
+    for number, svg in enumerate(svgs, 1):
+        with open(os.path.join(pack_dir, f"page-{number:02d}.svg"), "w", encoding="utf-8") as page_file:
+            page_file.write(svg)
+    with open(os.path.join(pack_dir, "answer-key.svg"), "w", encoding="utf-8") as key_file:
+        key_file.write(answer_key_page(student, keys, _glyphs).to_svg())
+    # Every page inline, one per printed sheet: print this file to get the whole pack (or a PDF)
+    with open(os.path.join(pack_dir, "print.html"), "w", encoding="utf-8") as print_file:
+        print_file.write("<!DOCTYPE html><html><head><meta charset=\"utf-8\"><title>"
+                         f"{html.escape(student)}</title><style>@page {{ size: A4; margin: 0 }} "
+                         "body { margin: 0 } svg { display: block; page-break-after: always }"
+                         "</style></head><body>\n" + "".join(svgs) + "</body></html>\n")
+    return student, len(pages)
+
+def select_words(vocabulary, count, rng):
+    """A student's words: a seeded random sample (the whole selection if count is 0)"""
+    if not count or count >= len(vocabulary):
+        words = list(vocabulary)
+        rng.shuffle(words)
+        return words
+    return rng.sample(vocabulary, count)
+
+def attach_cloze(vocabulary, deck=None):
+    """For the cloze mode: only words with a cached sentence, with the sentence attached
+
+    When vocabulary is a slice of a deck, pass the whole deck as well: the
+    cache is keyed by the deck it was built for.
+    """
+    from cloze import load_cloze_items, make_cloze
+
+    cloze_items = load_cloze_items(vocabulary if deck is None else deck)
+    cloze_words = []
+    for word in vocabulary:
+        if word["hanzi"] in cloze_items:
+            sentence, _, *offset = cloze_items[word["hanzi"]][0]
+            cloze_words.append(dict(word, cloze=make_cloze(sentence, word["hanzi"], *offset)))
+    return cloze_words
+
+def generate_packs(vocabulary, students, mode, output_dir, words_per_student=20, font_path=None,
+                   workers=None, seed=0):
+    """Render every student's pack across a process pool; returns the number of pages"""
+    if font_path:
+        GlyphCache(font_path)   # Fail here rather than inside every worker
+    os.makedirs(output_dir, exist_ok=True)
+    workers = workers or os.cpu_count() or 1
+    tasks = [(student, select_words(vocabulary, words_per_student, random.Random(f"{seed}:{student}")),
+              mode, output_dir, seed) for student in students]
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(font_path,)) as pool:
+        chunksize = max(1, len(tasks) // (4 * workers))
+        return sum(pages for _, pages in pool.map(render_pack, tasks, chunksize=chunksize))
+
+def main():
+    """Command line entry point"""
+    modes = [mode for _, mode in get_learning_modes()]
+    parser = argparse.ArgumentParser(description="Generate printable flashcard sheets and worksheets")
+    parser.add_argument("output", help="directory for the packs (one folder per student)")
+    parser.add_argument("--deck", help="vocabulary module or JSON deck (default: the app's deck)")
+    parser.add_argument("--mode", choices=modes, default="hanzi-english")
+    parser.add_argument("--range", metavar="START:END", help="only use this slice of the deck, e.g. 0:150")
+    parser.add_argument("--words", type=int, default=20, help="words per student (0 for the whole selection)")
+    parser.add_argument("--students", help="file with one student name per line")
+    parser.add_argument("--count", type=int, default=1, help="number of numbered packs without --students")
+    parser.add_argument("--font", help="CJK font to draw glyph outlines from (needs fontTools)")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0, help="change to reshuffle every pack")
+    args = parser.parse_args()
+
+    deck = vocabulary = load_vocabulary(args.deck)
+    if args.range:
+        start, _, end = args.range.partition(":")
+        vocabulary = deck[int(start or 0):int(end) if end else None]
+    if args.mode == "cloze-hanzi":
+        vocabulary = attach_cloze(vocabulary, deck)
+    if not vocabulary:
+        parser.error("no words to print (for cloze-hanzi, build the cloze cache first)")
+    if args.students:
+        with open(args.students, encoding="utf-8") as students_file:
+            students = [line.strip() for line in students_file if line.strip()]
+    else:
+        students = [f"Student {number}" for number in range(1, args.count + 1)] if args.count > 1 else ["Class"]
+
+    start = time.perf_counter()
+    try:
+        pages = generate_packs(vocabulary, students, args.mode, args.output, args.words, args.font,
+                               args.workers, args.seed)
+    except ValueError as error:
+        parser.error(str(error))
+    print(f"🖨️ {len(students):,} packs, {pages:,} pages in {time.perf_counter() - start:.1f}s → {args.output}")
+
+if __name__ == "__main__":
+    main()
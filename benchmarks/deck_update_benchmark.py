@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+deck_update_benchmark.py - Delta update benchmark for Chinese Learning App
+Publishes a large synthetic deck to a local stand-in server, brings a client
+up to date, then publishes typical edits one after another and measures what
+the client transfers and how long applying each update takes, next to the
+size of downloading the whole bundle again.
+
+Usage:
+    python benchmarks/deck_update_benchmark.py --words 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+from ui_benchmarks import APP_DIR, make_vocabulary  # noqa: E402
+
+def make_deck(num_words):
+    """Synthetic deck with the extra fields distributed decks carry"""
+    deck = make_vocabulary(num_words)
+    for word in deck:
+        word["french"] = "mot " + word["english"]
+        word["sentence"] = f"我们今天学习{word['hanzi']}这个词。"
+        word["tags"] = ["hsk", "synthetic"]
+    return deck
+
+def edit_one_gloss(deck, rng):
+    """Fix a typo in one gloss"""
+    deck[rng.randrange(len(deck))]["english"] += " (fixed)"
+
+def edit_many_glosses(deck, rng):
+    """Revise the Spanish gloss of 1% of the words"""
+    for position in rng.sample(range(len(deck)), len(deck) // 100):
+        deck[position]["spanish"] += " (revisado)"
+
+def add_words(deck, rng):
+    """Insert 20 new words at random places"""
+    for number in range(20):
+        position = rng.randrange(len(deck))
+        deck.insert(position, {"hanzi": chr(0x9000 + number) + chr(0x9100 + len(deck) % 200), "pinyin": "xīn",
+                               "english": f"new {number}", "spanish": f"nuevo {number}"})
+
+def remove_words(deck, rng):
+    """Delete 50 words"""
+    for position in sorted(rng.sample(range(len(deck)), 50), reverse=True):
+        del deck[position]
+
+def append_words(deck, rng):
+    """Add 200 words at the end"""
+    start = len(deck)
+    deck.extend({"hanzi": chr(0x9200 + number % 100) + chr(0x9300 + number // 100), "pinyin": "fù",
+                 "english": f"appendix {number}", "spanish": f"apéndice {number}"}
+                for number in range(start % 1000, start % 1000 + 200))
+
+EDITS = [
+    ("fix one gloss", edit_one_gloss),
+    ("insert 20 words", add_words),
+    ("delete 50 words", remove_words),
+    ("append 200 words", append_words),
+    ("revise 1% of glosses", edit_many_glosses),
+]
+
+def run_benchmark(num_words, codec, seed):
+    """Publish, update, then edit/publish/update for each typical edit"""
+    sys.path.insert(0, APP_DIR)
+    from bundle import DeckBundle
+    from deck_updates import DeckUpdater, make_server, publish
+
+    rng = random.Random(seed)
+    workdir = tempfile.mkdtemp(prefix="cla-updates-")
+    site = os.path.join(workdir, "site")
+    bundle_path = os.path.join(workdir, "deck.bundle")
+    server = make_server(site, 0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    deck = make_deck(num_words)
+    publish(deck, site, codec)
+    thread.start()
+    try:
+        updater = DeckUpdater(f"http://127.0.0.1:{server.server_address[1]}/", os.path.join(workdir, "store"))
+        results = [dict(edit="initial download", **updater.update(bundle_path))]
+        for name, edit in EDITS:
+            edit(deck, rng)
+            publish(deck, site, codec)
+            summary = updater.update(bundle_path)
+            bundle = DeckBundle(bundle_path)
+            if list(bundle) != deck:
+                raise AssertionError(f"bundle after {name!r} does not match the published deck")
+            bundle.close()
+            results.append(dict(edit=name, **summary))
+    finally:
+        server.shutdown()
+        server.server_close()
+    full_size = os.path.getsize(bundle_path)
+    for result in results:
+        result["full_bytes"] = full_size
+    return results
+
+def format_results(results):
+    """Table of bytes transferred and apply time per edit"""
+    lines = [f"{'edit':<22} {'chunks':>13} {'bytes':>12} {'of full':>8} {'fetch ms':>9} {'apply ms':>9}"]
+    for result in results:
+        lines.append(f"{result['edit']:<22} {result['fetched']:>6,}/{result['chunks']:<6,} {result['bytes']:>12,} "
+                     f"{result['bytes'] / result['full_bytes']:>7.1%} {result['fetch_seconds'] * 1000:>9.1f} "
+                     f"{result['apply_seconds'] * 1000:>9.1f}")
+    return "\n".join(lines)
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Delta update benchmark")
+    parser.add_argument("--words", type=int, default=100000)
+    parser.add_argument("--codec", choices=["zlib", "lzma"], default="zlib")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--output", help="also write the results as JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("CHINESE_APP_HOME", tempfile.mkdtemp(prefix="cla-bench-"))
+    results = run_benchmark(args.words, args.codec, args.seed)
+    print(format_results(results))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump(results, output_file, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+soak_test.py - Widget and Tcl-command leak detector for Chinese Learning App
+Cycles start → flashcards → results → matching → results thousands of times
+(with animation timers compressed) and tracks Python object counts, Tcl
+command counts (`info commands`), live widget totals and RSS. Metrics that
+keep growing after warm-up are flagged, and each screen is then rebuilt on
+its own to point at the one that leaks.
+
+Usage:
+    python benchmarks/soak_test.py --cycles 2000
+"""
+
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCH_DIR)
+from ui_benchmarks import APP_DIR, describe_labels, make_vocabulary, pump, start_virtual_display  # noqa: E402
+
+METRICS = ["python_objects", "tcl_commands", "widgets", "rss_kb"]
+
+# Growth per cycle below which a metric is considered flat
+GROWTH_LIMITS = {"python_objects": 5.0, "tcl_commands": 0.0, "widgets": 0.0, "rss_kb": 8.0}
+
+def compress_timers(factor=0.0):
+    """Scale every Tk after() delay so animations finish immediately"""
+    import tkinter as tk
+
+    original_after = tk.Misc.after
+
+    def fast_after(self, ms, func=None, *args):
+        return original_after(self, int(ms * factor), func, *args) if func else original_after(self, ms)
+
+    tk.Misc.after = fast_after
+
+def count_widgets(widget):
+    """Widgets alive below (and including) a widget"""
+    return 1 + sum(count_widgets(child) for child in widget.winfo_children())
+
+def read_rss_kb():
+    """Resident set size of this process in KiB"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") // 1024
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+def sample(root):
+    """Take one reading of every metric"""
+    gc.collect()
+    return {
+        "python_objects": len(gc.get_objects()),
+        "tcl_commands": len(root.tk.splitlist(root.tk.call("info", "commands"))),
+        "widgets": count_widgets(root),
+        "rss_kb": read_rss_kb(),
+    }
+
+def growth_per_cycle(values):
+    """Least-squares slope of a series"""
+    n = len(values)
+    if n < 2:
+        return 0.0
+    mean_x = (n - 1) / 2
+    mean_y = sum(values) / n
+    numerator = sum((x - mean_x) * (y - mean_y) for x, y in enumerate(values))
+    denominator = sum((x - mean_x) ** 2 for x in range(n))
+    return numerator / denominator
+
+def is_monotonic_growth(values, limit, sample_every=1):
+    """Growing (almost) every sample and faster than the metric's noise floor"""
+    if len(values) < 3 or values[-1] <= values[0]:
+        return False
+    rising = sum(1 for a, b in zip(values, values[1:]) if b >= a)
+    return rising >= 0.9 * (len(values) - 1) and growth_per_cycle(values) / sample_every > limit
+
+class SoakRunner:
+    """Drives the real app through every screen"""
+
+    def __init__(self, root, num_words):
+        import main_simplified
+
+        self.root = root
+        self.app = main_simplified.ChineseLearningApp(root, vocabulary=make_vocabulary(200))
+        self.app.words_var.set(num_words)
+
+    def settle(self):
+        """Let pending (compressed) timers and redraws run"""
+        self.root.update()
+
+    def start_screen(self):
+        self.app.show_start_screen()
+        self.settle()
+
+    def flashcards(self):
+        self.app.start_flashcards()
+        self.settle()
+        for index in range(len(self.app.selected_words) - 1):
+            self.app.answer_flashcard(index % 3 != 0)
+            self.settle()
+
+    def flashcard_results(self):
+        self.app.answer_flashcard(True)
+        self.settle()
+
+    def matching(self):
+        app = self.app
+        app.start_matching_game()
+        self.settle()
+        by_pair = {}
+        for index, pair in enumerate(app.game_pairs):
+            by_pair.setdefault(pair["pair_id"], []).append(index)
+        pairs = sorted(by_pair.values())
+        for number, (first, second) in enumerate(pairs):
+            if number + 1 < len(pairs):
+                # A wrong guess before the right one
+                app.card_clicked(first)
+                app.card_clicked(pairs[number + 1][0])
+                pump(self.root, lambda: not app.checking_match)
+            app.card_clicked(first)
+            app.card_clicked(second)
+            pump(self.root, lambda: not app.checking_match)
+
+    def game_results(self):
+        # The app opens the results screen itself once the last pair fades
+        pump(self.root, lambda: "Final Score" in describe_labels(self.app.main_frame))
+
+    def steps(self):
+        """The screens of one cycle, in order"""
+        return [
+            ("start_screen", self.start_screen),
+            ("flashcards", self.flashcards),
+            ("flashcard_results", self.flashcard_results),
+            ("matching_game", self.matching),
+            ("game_results", self.game_results),
+        ]
+
+    def isolated_screens(self):
+        """Builders that can be rebuilt repeatedly on their own"""
+        app = self.app
+        app.start_flashcards()
+        app.start_matching_game()
+        return [
+            ("start_screen", app.show_start_screen),
+            ("flashcard_screen", lambda: (setattr(app, "current_card_index", 0), app.show_flashcard())),
+            ("flashcard_results", app.show_flashcard_results),
+            ("matching_game_screen", app.show_matching_game),
+            ("game_results", app.show_game_results),
+        ]
+
+def run_cycles(runner, cycles, sample_every):
+    """Full start → … → results cycles, sampling every few cycles"""
+    series = {metric: [] for metric in METRICS}
+    start = time.perf_counter()
+    for cycle in range(cycles):
+        for _, step in runner.steps():
+            step()
+        if cycle % sample_every == 0:
+            reading = sample(runner.root)
+            for metric in METRICS:
+                series[metric].append(reading[metric])
+        if cycle and cycle % max(1, cycles // 10) == 0:
+            print(f"   cycle {cycle}/{cycles} ({time.perf_counter() - start:.0f}s)")
+    return series
+
+def run_isolation(runner, rebuilds):
+    """Rebuild each screen on its own and report per-rebuild growth"""
+    growth = {}
+    for name, build in runner.isolated_screens():
+        for _ in range(10):
+            build()
+            runner.settle()
+        readings = []
+        for _ in range(rebuilds):
+            build()
+            runner.settle()
+            readings.append(sample(runner.root))
+        growth[name] = {metric: growth_per_cycle([reading[metric] for reading in readings])
+                        for metric in METRICS}
+    return growth
+
+def analyse(series, isolation, sample_every, warmup_fraction=0.1):
+    """Flag metrics with monotonic growth and screens that grow on their own"""
+    leaks = []
+    for metric, values in series.items():
+        steady = values[int(len(values) * warmup_fraction):]
+        if is_monotonic_growth(steady, GROWTH_LIMITS[metric], sample_every):
+            leaks.append(metric)
+
+    leaking_screens = {}
+    for screen, growth in isolation.items():
+        grown = {metric: rate for metric, rate in growth.items() if rate > GROWTH_LIMITS[metric]}
+        if grown:
+            leaking_screens[screen] = grown
+    return leaks, leaking_screens
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Soak test for widget and Tcl command leaks")
+    parser.add_argument("--cycles", type=int, default=2000)
+    parser.add_argument("--sample-every", type=int, default=10)
+    parser.add_argument("--rebuilds", type=int, default=200,
+                        help="rebuilds per screen in the isolation phase")
+    parser.add_argument("--words", type=int, default=5)
+    parser.add_argument("--output", help="write the metric series as JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("CHINESE_APP_HOME", tempfile.mkdtemp(prefix="cla-soak-"))
+    sys.path.insert(0, APP_DIR)
+    display = start_virtual_display()
+    try:
+        import tkinter as tk
+
+        compress_timers()
+        root = tk.Tk()
+        runner = SoakRunner(root, args.words)
+        print(f"🔁 Soaking {args.cycles} cycles...")
+        series = run_cycles(runner, args.cycles, args.sample_every)
+        print(f"🔬 Rebuilding each screen {args.rebuilds} times...")
+        isolation = run_isolation(runner, args.rebuilds)
+        root.destroy()
+    finally:
+        if display:
+            display.terminate()
+
+    leaks, leaking_screens = analyse(series, isolation, args.sample_every)
+    for metric in METRICS:
+        values = series[metric]
+        print(f"   {metric:>15}: {values[0]:>10,} → {values[-1]:>10,} "
+              f"({growth_per_cycle(values) / args.sample_every:+.2f}/cycle)")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as output_file:
+            json.dump({"series": series, "isolation": isolation, "sample_every": args.sample_every},
+                      output_file, indent=2)
+
+    if not leaks and not leaking_screens:
+        print("✅ No monotonic growth detected")
+        return
+    if leaks:
+        print(f"\n❌ Monotonic growth in: {', '.join(leaks)}")
+    for screen, grown in leaking_screens.items():
+        details = ", ".join(f"{metric} {rate:+.2f}/rebuild" for metric, rate in grown.items())
+        print(f"   🔎 {screen}: {details}")
+    sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+ui_benchmarks.py - Headless UI benchmarks for Chinese Learning App
+Times the real Tk screens under a virtual X display (Xvfb), plays a full
+matching game with a scripted clicker and measures deck loading. The game
+runs with the card animation delays set to zero, so it times the app's code
+rather than its timers. Results are written as JSON and compared against the
+committed baseline (benchmarks/baseline.json); any benchmark slower than the
+baseline by more than the tolerance fails the run, and so does a missing
+baseline.
+
+Requirements:
+- Xvfb (only when no DISPLAY is available and --skip-ui is not given)
+
+Usage:
+    python benchmarks/ui_benchmarks.py                   # run and compare
+    python benchmarks/ui_benchmarks.py --skip-ui         # deck loading only, no display needed
+    python benchmarks/ui_benchmarks.py --save-baseline   # record a new baseline for what ran
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_DIR = os.path.join(os.path.dirname(BENCH_DIR), "app")
+sys.path.insert(0, APP_DIR)
+
+DEFAULT_BASELINE = os.path.join(BENCH_DIR, "baseline.json")
+DEFAULT_OUTPUT = os.path.join(BENCH_DIR, "results.json")
+MATCHING_SIZES = [3, 15, 50, 200]
+DECK_SIZES = [100, 10000, 100000]
+TOLERANCE = 0.25       # Allowed slowdown before a benchmark counts as a regression
+MIN_REGRESSION_MS = 2  # Ignore noise on very fast benchmarks
+# (module, constant) of every after() delay in a matching game
+ANIMATION_DELAYS = [
+    ("main_simplified", "MATCH_CHECK_DELAY_MS"),
+    ("main_simplified", "MISMATCH_RESET_MS"),
+    ("main_simplified", "RESULTS_DELAY_MS"),
+    ("utils", "MATCH_HOLD_MS"),
+    ("utils", "FADE_STEP_MS"),
+]
+
+def start_virtual_display(width=1280, height=1024):
+    """Start Xvfb when there is no display; returns the process to stop later"""
+    if os.environ.get("DISPLAY"):
+        return None
+    if not shutil.which("Xvfb"):
+        sys.exit("❌ No DISPLAY and Xvfb is not installed (apt install xvfb)")
+
+    for display_number in range(99, 120):
+        if os.path.exists(f"/tmp/.X11-unix/X{display_number}"):
+            continue
+        process = subprocess.Popen(["Xvfb", f":{display_number}", "-screen", "0",
+                                    f"{width}x{height}x24", "-nolisten", "tcp"],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(50):
+            if os.path.exists(f"/tmp/.X11-unix/X{display_number}"):
+                os.environ["DISPLAY"] = f":{display_number}"
+                return process
+            if process.poll() is not None:
+                break
+            time.sleep(0.1)
+        process.kill()
+    sys.exit("❌ Could not start Xvfb")
+
+def make_vocabulary(num_words):
+    """Synthetic vocabulary entries with unique hanzi"""
+    base = 0x4e00
+    words = []
+    for i in range(num_words):
+        hanzi = chr(base + i % 20000) + (chr(base + i // 20000) if i >= 20000 else "")
+        words.append({"hanzi": hanzi, "pinyin": f"pin{i}", "english": f"word {i}", "spanish": f"palabra {i}"})
+    return words
+
+def write_vocabulary_file(path, num_words):
+    """Write a vocabulary module in the same format as data/sample_vocabulary.py"""
+    with open(path, "w", encoding="utf-8") as vocab_file:
+        vocab_file.write("vocabulary_data = [\n")
+        for word in make_vocabulary(num_words):
+            vocab_file.write(f"    {word!r},\n")
+        vocab_file.write("]\n")
+
+def measure(func, repeat, setup=None):
+    """Run func repeat times and return timing statistics in milliseconds"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        "median_ms": statistics.median(timings),
+        "p95_ms": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+        "min_ms": timings[0],
+        "runs": repeat,
+    }
+
+def pump(root, until, timeout=60):
+    """Process Tk events until a condition holds"""
+    deadline = time.perf_counter() + timeout
+    while not until():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("UI did not reach the expected state")
+        root.update()
+        time.sleep(0.001)
+
+def bench_screens(root, main_frame, repeat):
+    """Time each screen builder including layout (update_idletasks)"""
+    import tkinter as tk
+    import utils
+
+    vocabulary = make_vocabulary(200)
+    mode_var = tk.StringVar(value="hanzi-english")
+    words_var = tk.IntVar(value=5)
+    noop = lambda *args: None
+    results = {}
+
+    def build(create):
+        def run():
+            create()
+            root.update_idletasks()
+        return run
+
+    results["create_start_screen"] = measure(build(lambda: utils.create_start_screen(
+        main_frame, vocabulary, mode_var, words_var, noop, noop, noop)), repeat)
+    results["create_flashcard_screen"] = measure(build(lambda: utils.create_flashcard_screen(
+        main_frame, vocabulary[0], "hanzi-english", 0, 10, noop, noop, noop, noop)), repeat)
+
+    for size in MATCHING_SIZES:
+        words = vocabulary[:size]
+        pairs = utils.setup_matching_game(words, "hanzi-english")
+        results[f"create_matching_game_screen[{size}]"] = measure(build(
+            lambda: utils.create_matching_game_screen(main_frame, pairs, "hanzi-english", 0, [],
+                                                      words, noop, noop)), repeat)
+
+    import browser
+    for size in DECK_SIZES:
+        deck = make_vocabulary(size)
+        results[f"create_browser_screen[{size}]"] = measure(build(
+            lambda: browser.create_browser_screen(main_frame, deck, noop)), repeat)
+    utils.clear_frame(main_frame)
+    return results
+
+@contextlib.contextmanager
+def without_animation_delays():
+    """Set the matching game's animation delays to zero while benchmarking"""
+    import importlib
+
+    saved = []
+    for module_name, name in ANIMATION_DELAYS:
+        module = importlib.import_module(module_name)
+        saved.append((module, name, getattr(module, name)))
+        setattr(module, name, 0)
+    try:
+        yield
+    finally:
+        for module, name, value in saved:
+            setattr(module, name, value)
+
+def bench_matching_game(root, num_words, repeat):
+    """Play whole matching games with a scripted clicker (one mismatch per pair)"""
+    import main_simplified
+
+    app = main_simplified.ChineseLearningApp(root, vocabulary=make_vocabulary(max(num_words, 20)))
+    app.words_var.set(num_words)
+
+    def click(index):
+        app.card_clicked(index)
+
+    def play():
+        app.start_matching_game()
+        by_pair = {}
+        for index, pair in enumerate(app.game_pairs):
+            by_pair.setdefault(pair["pair_id"], []).append(index)
+
+        for pair_id, (first, second) in sorted(by_pair.items()):
+            # A wrong guess first, then the right one
+            wrong = next((i for i in range(len(app.game_pairs))
+                          if i not in app.matched_pairs and app.game_pairs[i]["pair_id"] != pair_id), None)
+            if wrong is not None:
+                click(first)
+                click(wrong)
+                pump(root, lambda: not app.checking_match)
+            click(first)
+            click(second)
+            pump(root, lambda: not app.checking_match)
+        pump(root, lambda: "Final Score" in describe_labels(app.main_frame))
+
+    cpu_start = time.process_time()
+    with without_animation_delays():
+        result = measure(play, repeat)
+    result["cpu_ms_per_game"] = (time.process_time() - cpu_start) * 1000 / repeat
+    app.show_start_screen()
+    return result
+
+def describe_labels(widget):
+    """All label texts currently shown below a widget"""
+    texts = []
+    for child in widget.winfo_children():
+        try:
+            texts.append(str(child.cget("text")))
+        except Exception:
+            pass
+        texts.extend(describe_labels(child))
+    return " ".join(texts)
+
+def bench_deck_loading(repeat):
+    """Time loading vocabulary modules of increasing size"""
+    import utils
+
+    results = {}
+    sys.dont_write_bytecode = True
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in DECK_SIZES:
+            path = os.path.join(temp_dir, f"vocabulary_{size}.py")
+            write_vocabulary_file(path, size)
+            runs = repeat if size < 100000 else max(1, repeat // 3)
+            results[f"load_vocabulary[{size}]"] = measure(lambda: utils.load_vocabulary(path), runs)
+    return results
+
+def bench_ui(repeat, game_repeat):
+    """Screen builders and full matching games (needs a display)"""
+    import tkinter as tk
+    import utils
+
+    root = tk.Tk()
+    root.geometry("1000x700")
+    utils.setup_styles()
+    main_frame = tk.Frame(root, bg='#0f172a')
+    main_frame.pack(fill=tk.BOTH, expand=True)
+    root.update()
+
+    results = {}
+    try:
+        results.update(bench_screens(root, main_frame, repeat))
+        main_frame.destroy()
+        for size in (3, 15):
+            results[f"matching_game_full[{size}]"] = bench_matching_game(root, size, game_repeat)
+    finally:
+        root.destroy()
+    return results
+
+def run_benchmarks(repeat, game_repeat, ui=True):
+    """Run every benchmark and return the results document"""
+    import tkinter as tk
+
+    results = {}
+    if ui:
+        results.update(bench_ui(repeat, game_repeat))
+    results.update(bench_deck_loading(repeat))
+
+    return {
+        "meta": {
+            "python": platform.python_version(),
+            "tk": str(tk.TkVersion),
+            "platform": platform.platform(),
+            "timestamp": time.time(),
+        },
+        "results": results,
+    }
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """Return (name, baseline_ms, current_ms) for every regression"""
+    regressions = []
+    for name, current in results["results"].items():
+        previous = baseline.get("results", {}).get(name)
+        if not previous:
+            continue
+        limit = previous["median_ms"] * (1 + tolerance)
+        if current["median_ms"] > limit and current["median_ms"] - previous["median_ms"] > MIN_REGRESSION_MS:
+            regressions.append((name, previous["median_ms"], current["median_ms"]))
+    return regressions
+
+def format_results(results, baseline=None):
+    """Text table of the benchmark medians, with the baseline when available"""
+    baseline_results = (baseline or {}).get("results", {})
+    width = max(len(name) for name in results["results"])
+    lines = [f"{'Benchmark':<{width}} {'Median ms':>10} {'p95 ms':>10} {'Baseline':>10}"]
+    for name, row in results["results"].items():
+        previous = baseline_results.get(name, {}).get("median_ms")
+        previous_text = f"{previous:>10.2f}" if previous is not None else f"{'-':>10}"
+        lines.append(f"{name:<{width}} {row['median_ms']:>10.2f} {row['p95_ms']:>10.2f} {previous_text}")
+    return "\n".join(lines)
+
+def main():
+    """Command line entry point"""
+    parser = argparse.ArgumentParser(description="Headless UI benchmarks")
+    parser.add_argument("--repeat", type=int, default=15)
+    parser.add_argument("--game-repeat", type=int, default=2)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument("--skip-ui", action="store_true",
+                        help="only run the benchmarks that need no display")
+    parser.add_argument("--save-baseline", action="store_true",
+                        help="store these results in the baseline (other entries are kept)")
+    args = parser.parse_args()
+
+    os.environ.setdefault("CHINESE_APP_HOME", tempfile.mkdtemp(prefix="cla-bench-"))
+    display = None if args.skip_ui else start_virtual_display()
+    try:
+        results = run_benchmarks(args.repeat, args.game_repeat, ui=not args.skip_ui)
+    finally:
+        if display:
+            display.terminate()
+
+    with open(args.output, "w", encoding="utf-8") as output_file:
+        json.dump(results, output_file, indent=2)
+
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as baseline_file:
+            baseline = json.load(baseline_file)
+    print(format_results(results, baseline))
+
+    if args.save_baseline:
+        # Merged, so a --skip-ui run does not drop the UI entries
+        stored = dict(results, results=dict((baseline or {}).get("results", {}), **results["results"]))
+        with open(args.baseline, "w", encoding="utf-8") as baseline_file:
+            json.dump(stored, baseline_file, indent=2)
+        print(f"💾 Baseline saved to {args.baseline}")
+        return
+
+    if baseline is None:
+        sys.exit(f"❌ No baseline at {args.baseline}; run with --save-baseline to record one")
+    missing = [name for name in results["results"] if name not in baseline.get("results", {})]
+    if missing:
+        print(f"⚠️ Not in the baseline (not compared): {', '.join(missing)}")
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n❌ PERFORMANCE REGRESSIONS:")
+        for name, previous, current in regressions:
+            print(f"   {name}: {previous:.2f} ms → {current:.2f} ms ({current / previous - 1:+.0%})")
+        sys.exit(1)
+    print("✅ No regressions against baseline")
+
+if __name__ == "__main__":
+    main()
@@ -1 +1,805 @@
-# Unit tests
\ No newline at end of file
+# Unit tests
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+import time
+import wave
+import zipfile
+
+import numpy as np
+import pytest
+
+APP_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app")
+sys.path.insert(0, APP_DIR)
+
+import anki
+import answers
+import bundle
+import cloze
+import deck_updates
+import optimizer
+import pinyin
+import review_log
+import scheduler
+import simulator
+import sync
+import tracing
+import validate
+import worksheets
+from audio import AudioPack, build_audio_pack
+from confusion import ConfusionMatrix
+from hot_reload import DeckReader, diff_decks
+from ime import CandidateEngine
+from prefetch import FlashcardPrefetcher
+from segmenter import Segmenter
+from sentences import SentenceCorpus
+from startup import StartupProfile
+
+STUDY = {"hanzi": "学习", "pinyin": "xuéxí", "english": "to study", "spanish": "estudiar"}
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Keep every test's learner data in a fresh directory"""
+    monkeypatch.setenv("CHINESE_APP_HOME", str(tmp_path))
+    monkeypatch.setenv("CHINESE_APP_LEARNER", "tester")
+    return tmp_path
+
+# Answer grading
+
+def test_pinyin_hanzi_rejects_the_pinyin_shown_as_the_question():
+    key = answers.AnswerKey(STUDY, "pinyin-hanzi")
+    assert key.check("xuexi")[0] is False
+    assert key.check("xué xí")[0] is False
+    assert key.check("学习") == (True, answers.CORRECT, "✓ Correct")
+
+def test_cloze_with_a_sentence_accepts_pinyin():
+    key = answers.AnswerKey(dict(STUDY, cloze="我在＿＿中文"), "cloze-hanzi")
+    assert key.check("xue2xi2")[:2] == (True, answers.CORRECT)
+    assert key.check("xue4xi2")[1] == answers.WRONG_TONE
+    assert key.check("学习")[0] is True
+
+def test_cloze_without_a_sentence_shows_pinyin_so_rejects_it():
+    key = answers.AnswerKey(STUDY, "cloze-hanzi")
+    assert key.check("xuexi")[0] is False
+    assert key.check("学习")[0] is True
+
+@pytest.mark.parametrize("mode, gloss", [
+    ("pinyin-english", "study"),
+    ("pinyin-spanish", "estudiar"),
+    ("hanzi-english", "to study"),
+    ("hanzi-spanish", "estudiar"),
+    ("hanzi+pinyin-english", "study"),
+    ("hanzi+pinyin-spanish", "Estudiar"),
+])
+def test_gloss_modes_grade_the_gloss_not_pinyin_or_hanzi(mode, gloss):
+    key = answers.AnswerKey(STUDY, mode)
+    assert key.check(gloss)[0] is True
+    assert key.check("xuexi")[0] is False
+    assert key.check("学习")[0] is False
+
+def test_gloss_typos_are_accepted_as_typos():
+    key = answers.AnswerKey({"hanzi": "看", "pinyin": "kàn", "english": "to see/watch", "spanish": "ver"},
+                            "hanzi-english")
+    assert key.check("watch")[1] == answers.CORRECT
+    assert key.check("wtch")[:2] == (True, answers.TYPO)
+    assert key.check("listen")[0] is False
+
+def test_hanzi_one_character_off():
+    key = answers.AnswerKey(STUDY, "pinyin-hanzi")
+    assert key.check("学校")[:2] == (False, answers.INCORRECT)
+    assert "One character off" in key.check("学校")[2]
+
+# IME candidates
+
+IME_DECK = [
+    {"hanzi": "中国", "pinyin": "zhōngguó"},
+    {"hanzi": "吃饭", "pinyin": "chīfàn"},
+    {"hanzi": "时候", "pinyin": "shíhou"},
+    {"hanzi": "学习", "pinyin": "xuéxí"},
+    {"hanzi": "学校", "pinyin": "xuéxiào"},
+    {"hanzi": "在", "pinyin": "zài"},
+]
+
+@pytest.mark.parametrize("typed, expected", [
+    ("zhongguo", "中国"), ("zhong'guo", "中国"), ("zhg", "中国"), ("zg", "中国"),
+    ("chifan", "吃饭"), ("chf", "吃饭"), ("cf", "吃饭"), ("shh", "时候"),
+])
+def test_ime_full_and_abbreviated_pinyin(typed, expected):
+    assert CandidateEngine(IME_DECK).candidates(typed)[0] == expected
+
+def test_ime_ranks_words_of_the_typed_length_first():
+    engine = CandidateEngine(IME_DECK)
+    assert engine.candidates("z")[0] == "在"
+    assert set(engine.candidates("xuex")) == {"学习", "学校"}
+    assert engine.candidates("qqq") == []
+
+# Pinyin encoding
+
+@pytest.mark.parametrize("typed, numbers", [
+    ("xuéxí", "xue2 xi2"), ("xue2xi2", "xue2 xi2"), ("Nǐ hǎo", "ni3 hao3"),
+    ("xi'an", "xi an"), ("xian1", "xian1"),
+    ("yìdiǎnr", "yi4 dianr3"), ("yi4dian3r", "yi4 dianr3"), ("nǎr", "nar3"), ("érzi", "er2 zi"),
+])
+def test_encode_accepts_marks_numbers_and_erhua(typed, numbers):
+    assert pinyin.decode(pinyin.encode(typed, None), "numbers") == numbers
+
+def test_encode_rejects_what_is_not_pinyin():
+    assert pinyin.encode("hello") is None
+    assert pinyin.encode("xuexq") is None
+
+def test_tone_only_differences_compare_equal_toneless():
+    assert pinyin.toneless(pinyin.encode("mā")) == pinyin.toneless(pinyin.encode("mà"))
+    assert pinyin.encode("mā") != pinyin.encode("mà")
+    assert pinyin.toneless(pinyin.encode("nǎ")) != pinyin.toneless(pinyin.encode("nǎr"))
+
+def test_normalize_round_trips_between_styles():
+    assert pinyin.normalize("lv4 nv3") == "lǜ nǚ"
+    assert pinyin.normalize("xue2xi2", "marks", "") == "xuéxí"
+    assert pinyin.to_numbered("yìdiǎnr") == ["yi4", "dianr3"]
+    assert pinyin.split_syllables("yìdiǎnr") == [("yi", 4), ("dian", 3)]
+
+def test_validator_accepts_erhua_with_or_without_its_character():
+    for hanzi in ("一点", "一点儿"):
+        entry = {"hanzi": hanzi, "pinyin": "yìdiǎnr", "english": "a little", "spanish": "un poco"}
+        assert validate.check_entry(entry) == []
+
+
+# Scheduling
+
+def sm2_state(reviews):
+    state = scheduler.sm2_init(1)
+    for correct in reviews:
+        state, interval = scheduler.sm2_review(state, np.ones(1), np.array([correct]))
+    return state, interval
+
+def test_sm2_intervals_grow_with_ease():
+    state, interval = sm2_state([True, True, True])
+    assert state["reps"][0] == 3
+    assert interval[0] == round(6 * 2.5)
+
+def test_sm2_lapse_keeps_the_lowered_ease():
+    state, interval = sm2_state([True, True, False])
+    assert (state["reps"][0], state["lapses"][0], interval[0]) == (0, 1, 1)
+    assert state["ease"][0] == pytest.approx(2.3)
+    # Relearning is not a new card: the lapse penalty stays
+    state, _ = sm2_state([True, True, False, True])
+    assert state["ease"][0] == pytest.approx(2.3)
+
+def test_fsrs_success_grows_stability_and_lapses_shrink_it():
+    state = scheduler.fsrs_init(2)
+    state, _ = scheduler.fsrs_review(state, np.zeros(2), np.array([True, True]))
+    after_first = state["stability"].copy()
+    state, interval = scheduler.fsrs_review(state, np.full(2, 3.0), np.array([True, False]))
+    assert state["stability"][0] > after_first[0] > state["stability"][1]
+    assert interval[0] > interval[1] >= 1
+
+# Workload simulation
+
+def test_simulated_workload_histogram():
+    deck = [STUDY] * 50
+    result = simulator.simulate_workload(deck, "sm2", n_learners=30, days=40, new_per_day=5, seed=1,
+                                         chunk_learners=8)
+    histogram = result["reviews_per_day"]
+    assert histogram.shape == (40,)
+    assert result["total_reviews"] == histogram.sum()
+    np.testing.assert_allclose(result["mean_per_learner"], histogram / 30)
+    # Every card is introduced once, within the first ten days: new reviews alone are 30 x 50
+    assert histogram[:10].min() >= 30 * 5
+    assert result["total_reviews"] > 30 * 50
+    again = simulator.simulate_workload(deck, "sm2", n_learners=30, days=40, new_per_day=5, seed=1,
+                                        chunk_learners=8)
+    np.testing.assert_array_equal(again["reviews_per_day"], histogram)
+
+def test_simulated_workload_only_introduces_cards_within_the_horizon():
+    result = simulator.simulate_workload([STUDY] * 100, "fsrs", n_learners=4, days=3, new_per_day=10)
+    assert result["reviews_per_day"][0] >= 40
+    assert result["total_reviews"] >= 4 * 30
+    assert result["total_reviews"] < 4 * 100
+
+# Review schedules and parameter fitting
+
+def test_schedule_replays_the_log_and_puts_overdue_words_first():
+    day = time.time() / scheduler.SECONDS_PER_DAY
+    schedule = scheduler.ReviewSchedule("sm2")
+    schedule.replay(np.array(["学习", "学习", "中国"], dtype=object), np.array([day - 30, day - 29, day - 3]),
+                    np.array([True, True, True]))
+    assert schedule.due_day("学习") == pytest.approx(day - 29 + 6)
+    assert schedule.due_day("在") is None
+    words = schedule.select_words(IME_DECK, 2, today=day)
+    assert {word["hanzi"] for word in words} & {"学习", "中国"} == {"学习", "中国"}
+    schedule.record("学习", True, day)
+    assert schedule.due_day("学习") > day
+
+def test_schedule_uses_the_fitted_parameters():
+    params = dict(scheduler.SM2_DEFAULT_PARAMS, first_interval=3.0)
+    scheduler.save_parameters("sm2", params)
+    review_log.record_review(STUDY, True)
+    schedule = scheduler.ReviewSchedule.load(algorithm="sm2")
+    assert schedule.due_day("学习") - time.time() / scheduler.SECONDS_PER_DAY == pytest.approx(3.0, abs=0.01)
+
+def record_synthetic_reviews(weights, n_cards=60, gaps=(0, 1, 2, 4, 7, 12), seed=3):
+    """Log reviews whose outcomes follow FSRS with the given weights"""
+    rng = np.random.default_rng(seed)
+    state = scheduler.fsrs_init(n_cards)
+    day = 19000.0
+    reviews = []
+    for k, gap in enumerate(gaps):
+        elapsed = np.full(n_cards, float(gap))
+        recall = scheduler.forgetting_curve(elapsed, np.maximum(state["stability"], 0.01)) if k else 1.0
+        correct = rng.random(n_cards) < recall
+        state, _ = scheduler.fsrs_review(state, elapsed, correct, weights)
+        day += gap
+        reviews.extend((f"词{card}", correct[card], day * scheduler.SECONDS_PER_DAY, {}) for card in range(n_cards))
+    return review_log.record_reviews(reviews)
+
+def test_fit_lowers_the_log_loss_of_a_forgetful_learner():
+    weights = scheduler.FSRS_DEFAULT_WEIGHTS.copy()
+    weights[:4] = [0.1, 0.2, 0.4, 1.0]      # Much faster forgetting than the defaults assume
+    record_synthetic_reviews(weights)
+    times, grades, valid = scheduler.build_review_matrix(*review_log.load_reviews())
+    assert times.shape == (60, 6) and valid.all()
+    params, loss_before, loss_after = optimizer.fit_parameters("fsrs", times, grades, valid)
+    assert loss_after < loss_before - 0.01
+    assert not np.allclose(params, scheduler.FSRS_DEFAULT_WEIGHTS)
+    # The search starts from the defaults, so its starting loss is theirs
+    default_loss = optimizer.log_loss("fsrs", scheduler.FSRS_DEFAULT_WEIGHTS[np.newaxis], times, grades, valid)
+    assert default_loss[0] == pytest.approx(loss_before, abs=0.01)
+
+def test_fitted_parameters_round_trip_through_the_parameters_file():
+    record_synthetic_reviews(scheduler.FSRS_DEFAULT_WEIGHTS)
+    summary = optimizer.fit_learner("tester")
+    assert summary["reviews"] == 360 and set(summary["fitted"]) == {"fsrs", "sm2"}
+    stored = scheduler.read_parameters_file()
+    for algorithm, (loss_before, loss_after) in summary["fitted"].items():
+        assert stored[algorithm]["log_loss"] == loss_after <= loss_before == stored[algorithm]["default_log_loss"]
+    np.testing.assert_allclose(scheduler.load_parameters("fsrs"), stored["fsrs"]["params"])
+    assert scheduler.load_parameters("sm2") == stored["sm2"]["params"]
+    assert optimizer.fit_learner("nobody")["fitted"] == {}
+
+# Tracing
+
+@pytest.fixture
+def tracing_on(monkeypatch):
+    """Record spans into an empty event list for one test"""
+    monkeypatch.setattr(tracing, "_events", [])
+    tracing.enable()
+    yield tracing._events
+    tracing.disable()
+
+def test_spans_export_a_chrome_trace(tmp_path, tracing_on):
+    @tracing.traced()
+    def build_screen():
+        with tracing.span("widgets"):
+            time.sleep(0.002)
+
+    build_screen()
+    tracing.instant("callback")
+    path = tmp_path / "trace.json"
+    tracing.export_chrome_trace(str(path))
+    with open(path, encoding="utf-8") as trace_file:
+        trace = json.load(trace_file)
+    events = {event["name"]: event for event in trace["traceEvents"]}
+    assert set(events) == {"build_screen", "widgets", "callback"}
+    outer, inner = events["build_screen"], events["widgets"]
+    assert outer["ph"] == inner["ph"] == "X" and events["callback"]["ph"] == "i"
+    assert outer["ts"] <= inner["ts"] and inner["ts"] + inner["dur"] <= outer["ts"] + outer["dur"]
+    assert inner["dur"] >= 2000      # Microseconds
+    assert all(event["pid"] == os.getpid() for event in trace["traceEvents"])
+
+def test_span_summary_percentiles(tracing_on):
+    for ms in range(100, 0, -1):
+        tracing_on.append(("render", "X", 0, ms * 1_000_000, 1))
+    tracing_on.append(("load", "X", 0, 500 * 1_000_000, 1))
+    summary = tracing.summarize()
+    assert [row["name"] for row in summary] == ["render", "load"]
+    render = summary[0]
+    assert (render["count"], render["total_ms"], render["max_ms"]) == (100, 5050, 100)
+    assert (render["p50_ms"], render["p95_ms"], render["p99_ms"]) == (50, 95, 99)
+    assert summary[1]["p50_ms"] == summary[1]["p99_ms"] == 500
+    table = tracing.format_summary(summary).splitlines()
+    assert table[1].split() == ["render", "100", "5050.0", "50.00", "95.00", "99.00", "100.00"]
+
+def test_disabled_tracing_records_nothing():
+    assert tracing.span("idle") is tracing.span("other")
+    with tracing.span("idle"):
+        pass
+    assert not any(name == "idle" for name, *_ in tracing._events)
+
+# Startup
+
+def test_main_module_defers_heavy_imports():
+    pytest.importorskip("tkinter")
+    # A fresh interpreter: this test process has long since imported everything
+    script = ("import sys; sys.path.insert(0, sys.argv[1]); import main_simplified; "
+              "from startup import StartupProfile; print(','.join(StartupProfile().check_imports()))")
+    result = subprocess.run([sys.executable, "-c", script, APP_DIR], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == ""
+
+def test_startup_report_flags_early_imports():
+    profile = StartupProfile(start=time.perf_counter())
+    assert "numpy" in profile.check_imports()
+    profile.mark("first paint")
+    report = profile.format_report()
+    assert "Imported before the window: " in report and "numpy" in report and "✅ First paint" in report
+
+# Flashcard prefetching
+
+class FakeRoot:
+    """Stands in for Tk: after() callbacks run when the test calls run_pending()"""
+
+    def __init__(self):
+        self.callbacks = []
+
+    def after(self, ms, callback, *args):
+        self.callbacks.append((callback, args))
+        return len(self.callbacks)
+
+    def run_pending(self, timeout=5.0):
+        deadline = time.monotonic() + timeout
+        while self.callbacks and time.monotonic() < deadline:
+            callback, args = self.callbacks.pop(0)
+            callback(*args)
+            time.sleep(0.001)
+
+def record_thread(word, mode, content):
+    content["hanzi"] = word["hanzi"]
+    content["mode"] = mode
+    content["thread"] = threading.current_thread().name
+
+def test_prefetcher_delivers_queued_cards_through_root_after():
+    root = FakeRoot()
+    prefetcher = FlashcardPrefetcher(root, [record_thread], depth=2)
+    prefetcher.start_session(IME_DECK, "hanzi-english")
+    assert prefetcher.pending == {1, 2} and len(root.callbacks) == 1
+    root.run_pending()
+    assert set(prefetcher.ready) == {1, 2} and prefetcher.poll_id is None
+    assert prefetcher.take(0)["thread"] == threading.current_thread().name    # Not prefetched
+    card = prefetcher.take(1)
+    assert (card["hanzi"], card["mode"], card["thread"]) == ("吃饭", "hanzi-english", "flashcard-prefetch")
+    prefetcher.advance(1)
+    root.run_pending()
+    assert set(prefetcher.ready) == {2, 3}
+
+def test_prefetcher_drops_results_of_an_abandoned_session():
+    root = FakeRoot()
+    prefetcher = FlashcardPrefetcher(root, [record_thread], depth=1)
+    prefetcher.start_session(IME_DECK[:2], "pinyin-hanzi")
+    time.sleep(0.2)       # Card 1 of the first session is prepared, but never collected
+    prefetcher.start_session(IME_DECK[3:], "hanzi-english")
+    root.run_pending()
+    assert prefetcher.ready[1]["hanzi"] == IME_DECK[4]["hanzi"]
+    assert prefetcher.ready[1]["mode"] == "hanzi-english"
+
+
+# Audio packs
+
+def write_wav(path, frames, sample_rate=8000):
+    with wave.open(str(path), "wb") as wav_file:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(sample_rate)
+        wav_file.writeframes(frames)
+
+@pytest.fixture
+def syllable_pack(tmp_path):
+    clips = {"ni3": b"\x01\x00" * 100, "hao3": b"\x02\x00" * 150, "ma5": b"\x03\x00" * 50}
+    for name, frames in clips.items():
+        write_wav(tmp_path / f"{name}.wav", frames)
+    path = str(tmp_path / "syllables.pack")
+    assert build_audio_pack(str(tmp_path), path, kind="syllable") == 3
+    return path, clips
+
+def test_audio_pack_reads_clips_through_the_memory_map(syllable_pack):
+    path, clips = syllable_pack
+    pack = AudioPack(path)
+    assert pack.kind == "syllable" and pack.format["sample_rate"] == 8000
+    assert pack.clip("ni3") == clips["ni3"] and pack.clip("zhong1") is None
+    assert pack.syllable_clip("ma", 1) == clips["ma5"]          # Falls back to the neutral tone
+    gap = b"\0" * (8000 * 40 // 1000 * 2)
+    assert pack.word_audio({"hanzi": "你好", "pinyin": "nǐ hǎo"}) == clips["ni3"] + gap + clips["hao3"]
+    assert "word:nǐ hǎo" in pack.cache
+    with wave.open(io.BytesIO(pack.to_wav(clips["hao3"]))) as wav_file:
+        assert wav_file.readframes(wav_file.getnframes()) == clips["hao3"]
+    pack.close()
+
+def test_audio_pack_cache_evicts_least_recently_used(syllable_pack):
+    path, clips = syllable_pack
+    pack = AudioPack(path, cache_bytes=500)
+    pack.clip("ni3")            # 200 bytes
+    pack.clip("hao3")           # 300 bytes
+    pack.clip("ni3")            # Now the most recent
+    pack.clip("ma5")            # 100 bytes more: hao3 goes
+    assert list(pack.cache) == ["ni3", "ma5"] and pack.cached_bytes == 300
+    assert pack.clip("hao3") == clips["hao3"]
+    assert list(pack.cache) == ["ma5", "hao3"] and pack.cached_bytes <= 500
+    pack.close()
+
+
+# Example sentences
+
+CORPUS_WORDS = ["我", "喜欢", "学", "学习", "中文"]
+
+@pytest.fixture
+def corpus_path(tmp_path):
+    lines = [
+        "1\t我学习。\t101\tI study.",
+        "2\t我喜欢学习中文。\t102\tI like studying Chinese.",
+        "3\tfra\tJ'aime le chinois.",
+        "4\t学生。\t104\tStudent.",
+        "5\t" + "我学习" * 15 + "\t105\tToo long to be a good example.",
+    ]
+    path = tmp_path / "sentences.tsv"
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    return str(path)
+
+def test_corpus_lookup_ranks_sentences_of_known_words_first(corpus_path):
+    corpus = SentenceCorpus(corpus_path, CORPUS_WORDS)
+    assert len(corpus.candidates("学习")) == 2 and corpus.candidates("你好") == []
+    known = {"我", "喜欢", "中文"}
+    assert corpus.examples("学习", known) == [("我喜欢学习中文。", "I like studying Chinese."), ("我学习。", "I study.")]
+    assert corpus.examples("学习", known, limit=1) == [("我喜欢学习中文。", "I like studying Chinese.")]
+    corpus.close()
+    reopened = SentenceCorpus(corpus_path, CORPUS_WORDS)     # Reuses the index built above
+    assert reopened.postings == corpus.postings
+    reopened.close()
+
+def test_corpus_prefers_sentences_where_the_word_stands_alone(corpus_path):
+    corpus = SentenceCorpus(corpus_path, CORPUS_WORDS)
+    corpus.use_segmenter(Segmenter(CORPUS_WORDS))
+    assert corpus.examples("学", limit=3)[0] == ("学生。", "Student.")
+    corpus.close()
+
+# Segmenter
+
+def test_segmenter_prefers_fewer_deck_words():
+    segmenter = Segmenter(["我", "喜欢", "学习", "中文", "学", "习中"])
+    assert segmenter.segment("我喜欢学习中文") == ["我", "喜欢", "学习", "中文"]
+    assert segmenter.segment("我学习 Python 很久") == ["我", "学习", "Python", "很", "久"]
+
+def test_segmenter_follows_deck_changes():
+    segmenter = Segmenter.from_vocabulary([{"hanzi": "学习"}, {"hanzi": "中文"}])
+    assert segmenter.update_vocabulary([{"hanzi": "中文"}, {"hanzi": "学习中文"}]) == (1, 1)
+    assert segmenter.segment("学习中文") == ["学习中文"]
+    assert "学习" not in segmenter
+
+# Cloze sentences
+
+CLOZE_DECK = [{"hanzi": hanzi} for hanzi in ["我", "喜欢", "学习", "中文", "他", "也"]]
+CLOZE_CORPUS = [
+    "1\t我喜欢学习中文。\t101\tI like studying Chinese.",
+    "2\tfra\tJ'aime le chinois.",
+    "3\t他也学习。\t103\tHe studies too.",
+    "4\t他学习，我也学习。\t104\tHe studies, and so do I.",
+]
+
+def test_score_sentence_prefers_readable_context():
+    deck_words = {word["hanzi"] for word in CLOZE_DECK}
+    readable = cloze.score_sentence(["我", "喜欢", "学习", "中文"], "学习", deck_words)
+    assert readable == pytest.approx(1 - 0.5 * 5 / 12)
+    assert cloze.score_sentence(["我", "喜欢", "学习", "汉语"], "学习", deck_words) < readable
+    assert cloze.score_sentence(["他", "学习", "我", "也", "学习"], "学习", deck_words) is None  # Twice
+    assert cloze.score_sentence(["学习", "吧"], "学习", deck_words) is None                      # No context
+    assert cloze.score_sentence(["学习"] + ["很"] * 29, "学习", deck_words) is None              # Too long
+
+def test_cloze_blanks_the_scored_token_not_an_earlier_match():
+    sentence, tokens = "我学习学", ["我", "学习", "学"]
+    offset = cloze.token_offset(sentence, tokens, "学")
+    assert offset == 3
+    assert cloze.make_cloze(sentence, "学", offset) == "我学习＿"
+    assert cloze.make_cloze(sentence, "学", None) == "我＿习学"       # Caches without offsets
+    assert cloze.make_cloze(sentence, "学", 0) == "我＿习学"          # Stale offset
+    assert cloze.token_offset(sentence, tokens, "中文") is None
+
+def test_merge_keeps_the_top_sentences_per_word():
+    best = {}
+    cloze._merge(best, {"学习": [(score, f"s{score}", "", 0) for score in (0.1, 0.2, 0.3, 0.4)]})
+    cloze._merge(best, {"学习": [(score, f"s{score}", "", 0) for score in (0.5, 0.05, 0.9)],
+                        "中文": [(0.7, "s0.7", "", 1)]})
+    assert len(best["学习"]) == cloze.TOP_PER_WORD
+    assert sorted(item[0] for item in best["学习"]) == [0.2, 0.3, 0.4, 0.5, 0.9]
+    assert best["中文"] == [(0.7, "s0.7", "", 1)]
+
+def test_score_chunk_after_worker_init(monkeypatch):
+    monkeypatch.setattr(cloze, "_segmenter", None)
+    cloze._init_worker({word["hanzi"] for word in CLOZE_DECK})
+    best = cloze.score_chunk(CLOZE_CORPUS)
+    assert sorted(item[1] for item in best["学习"]) == ["他也学习。", "我喜欢学习中文。"]   # Not the repeat
+    assert [item[1:] for item in best["喜欢"]] == [("我喜欢学习中文。", "I like studying Chinese.", 1)]
+
+def test_cloze_cache_round_trip(tmp_path):
+    corpus_path = tmp_path / "corpus.tsv"
+    corpus_path.write_text("\n".join(CLOZE_CORPUS) + "\n", encoding="utf-8")
+    path, count, chunks = cloze.build_cloze_cache(str(corpus_path), CLOZE_DECK, workers=1)
+    assert (count, chunks) == (6, 1)
+    with gzip.open(path, "rt", encoding="utf-8") as cache_file:
+        assert set(json.load(cache_file)) == {"deck", "items"}
+    items = cloze.load_cloze_items(CLOZE_DECK)
+    assert items["学习"][0] == ["我喜欢学习中文。", "I like studying Chinese.", 3]
+    assert len(items["学习"]) == 2
+    assert cloze.load_cloze_items(CLOZE_DECK[:3]) == {}     # Another deck has no cache yet
+
+# Edit distance
+
+@pytest.mark.parametrize("a, b, distance", [
+    ("", "", 0), ("", "abc", 3), ("kitten", "sitting", 3), ("watch", "wtch", 1),
+    ("学习", "学校", 1), ("flaw", "lawn", 2), ("a" * 70, "a" * 68 + "bc", 2),
+])
+def test_edit_distance(a, b, distance):
+    assert answers.edit_distance(a, b) == distance
+    assert answers.edit_distance(b, a) == distance
+
+# Anki packages
+
+def test_anki_export_import_round_trip(tmp_path, monkeypatch):
+    deck = [STUDY, {"hanzi": "行", "pinyin": "xíng", "english": "to walk", "spanish": "andar"},
+            {"hanzi": "行", "pinyin": "háng", "english": "row", "spanish": "fila"}]
+    start = time.time() - 10 * 86400
+    review_log.record_reviews([("学习", True, start, {}), ("学习", True, start + 86400, {}),
+                               ("行", False, start + 2 * 86400, {})])
+    path = str(tmp_path / "progress.apkg")
+    assert anki.export_apkg(deck, path) == (3, 3)
+
+    with anki.AnkiPackage(path) as package:
+        cards = package.connection.execute("SELECT nid, type, ivl, factor, reps, lapses FROM cards ORDER BY nid")
+        # Every note has a card; reviewed words carry their SM-2 progress, the repeated 行 starts new
+        assert [row[1:] for row in cards] == [(2, 6, 2500, 2, 0), (2, 1, 2300, 1, 1), (0, 0, 0, 0, 0)]
+
+    iter_reviews = anki.AnkiPackage.iter_reviews
+    def with_manual_reschedule(package):
+        rows = list(iter_reviews(package))
+        yield from rows
+        yield rows[-1][0] + 1, rows[0][1], anki.ANKI_EASE_MANUAL
+    monkeypatch.setattr(anki.AnkiPackage, "iter_reviews", with_manual_reschedule)
+    monkeypatch.setenv("CHINESE_APP_LEARNER", "imported")
+    output = str(tmp_path / "deck.json")
+    assert anki.import_apkg(path, output) == (2, 1, 3)
+    with open(output, encoding="utf-8") as deck_file:
+        assert json.load(deck_file) == [dict(STUDY, pinyin="xué xí"), deck[1]]
+    assert [(event["word"], event["correct"]) for event in review_log.read_events(event_type="review")] == \
+        [("学习", True), ("学习", True), ("行", False)]
+    # Importing again adds no reviews
+    assert anki.import_apkg(path, output)[2] == 0
+
+def test_anki_rejects_packages_only_newer_anki_reads(tmp_path):
+    path = tmp_path / "new.apkg"
+    with zipfile.ZipFile(path, "w") as package:
+        package.writestr("collection.anki2", "placeholder: please update Anki")
+        package.writestr("collection.anki21b", b"zstd")
+        package.writestr("meta", b"\x08\x03")
+    with pytest.raises(ValueError, match="Support older Anki versions"):
+        anki.AnkiPackage(str(path))
+
+def test_anki_field_mapping():
+    mapping = anki.map_fields(["Simplified", "Traditional", "Reading", "Meaning"])
+    assert mapping == {"hanzi": 0, "pinyin": 2, "english": 3, "spanish": None}
+    fields = ["<b>学习</b>", "學習", "xue2xi2", "to study<br>to learn [sound:x.mp3]"]
+    assert anki.note_to_word(fields, mapping) == {"hanzi": "学习", "pinyin": "xué xí",
+                                                  "english": "to study to learn", "spanish": ""}
+    assert anki.map_fields(["Front", "Back"], anki.parse_field_map(["hanzi=Back"]))["hanzi"] == 1
+
+def test_anki_export_gives_repeated_hanzi_their_own_guids(tmp_path):
+    deck = [{"hanzi": "行", "pinyin": "xíng", "english": "to walk", "spanish": "andar"},
+            {"hanzi": "行", "pinyin": "háng", "english": "row", "spanish": "fila"}]
+    path = str(tmp_path / "deck.apkg")
+    assert anki.export_apkg(deck, path, reviews=False) == (2, 0)
+    with anki.AnkiPackage(path) as package:
+        guids = [guid for guid, in package.connection.execute("SELECT guid FROM notes ORDER BY id")]
+    assert len(set(guids)) == 2
+    assert guids[0] == hashlib.sha1("行".encode("utf-8")).hexdigest()[:10]     # Unchanged for the first note
+    anki.export_apkg(deck, path, reviews=False)
+    with anki.AnkiPackage(path) as package:
+        assert [guid for guid, in package.connection.execute("SELECT guid FROM notes ORDER BY id")] == guids
+
+
+# Worksheets
+
+def test_worksheets_cloze_mode_with_a_deck_range(tmp_path):
+    deck = [dict(word, pinyin="", english=word["hanzi"], spanish="") for word in CLOZE_DECK]
+    deck_path = tmp_path / "deck.json"
+    deck_path.write_text(json.dumps(deck, ensure_ascii=False), encoding="utf-8")
+    corpus_path = tmp_path / "corpus.tsv"
+    corpus_path.write_text("\n".join(CLOZE_CORPUS) + "\n", encoding="utf-8")
+    cloze.build_cloze_cache(str(corpus_path), deck, workers=1)
+
+    # The cache belongs to the whole deck, so a slice still finds its sentences
+    assert [word["hanzi"] for word in worksheets.attach_cloze(deck[1:3], deck)] == ["喜欢", "学习"]
+    assert worksheets.attach_cloze(deck[1:3]) == []
+    output = tmp_path / "packs"
+    result = subprocess.run([sys.executable, os.path.join(APP_DIR, "worksheets.py"), str(output),
+                             "--deck", str(deck_path), "--mode", "cloze-hanzi", "--range", "1:3",
+                             "--workers", "1"], capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert (output / "Class" / "print.html").exists()
+
+# Validator
+
+def test_validator_flags_schema_and_pinyin_problems():
+    codes = {code for _, code, _ in validate.check_entry({"hanzi": "学习", "pinyin": "xuexq", "english": "to study"})}
+    assert codes == {"missing_field", "bad_pinyin"}
+    codes = {code for _, code, _ in validate.check_entry(dict(STUDY, pinyin="xué"))}
+    assert codes == {"syllable_count"}
+
+def test_validator_finds_duplicates_across_decks(tmp_path):
+    first, second = tmp_path / "a.jsonl", tmp_path / "b.json"
+    china = {"hanzi": "中国", "pinyin": "zhōngguó", "english": "China", "spanish": "China"}
+    first.write_text("\n".join(json.dumps(word, ensure_ascii=False) for word in [STUDY, china]), encoding="utf-8")
+    second.write_text(json.dumps([dict(STUDY, hanzi="學習"), dict(STUDY)], ensure_ascii=False), encoding="utf-8")
+    report = io.StringIO()
+    summary = validate.validate([str(first), str(second)], report)
+    assert summary["counts"] == {"near_duplicate": 1, "duplicate": 1}
+    assert (summary["entries"], summary["errors"], summary["unique_hanzi"]) == (4, 0, 3)
+    issues = json.loads(report.getvalue())["issues"]
+    duplicate = next(issue for issue in issues if issue["code"] == "duplicate")
+    assert duplicate["first"] == {"source": str(first), "index": 0}
+
+# Hot reload
+
+def test_deck_diff_reports_added_removed_and_modified():
+    old_index = {word["hanzi"]: word for word in IME_DECK}
+    deck = [dict(word) for word in IME_DECK[1:]] + [{"hanzi": "朋友", "pinyin": "péngyǒu"}]
+    deck[0]["english"] = "to eat a meal"
+    diff, index = diff_decks(old_index, deck)
+    assert ([word["hanzi"] for word in diff.added], diff.removed, [word["hanzi"] for word in diff.modified]) == \
+        (["朋友"], ["中国"], ["吃饭"])
+    assert set(index) == set(old_index) - {"中国"} | {"朋友"}
+    assert not diff_decks(index, deck)[0]
+
+def test_deck_reader_reparses_only_changed_lines(tmp_path):
+    path = tmp_path / "deck.py"
+    lines = [repr(word) + "," for word in IME_DECK]
+    path.write_text("vocabulary_data = [\n" + "\n".join(lines) + "\n]\n", encoding="utf-8")
+    reader = DeckReader(str(path))
+    assert reader.read() == IME_DECK and reader.parsed_lines == len(IME_DECK)
+    lines[2] = repr(dict(IME_DECK[2], english="time")) + ","
+    path.write_text("vocabulary_data = [\n" + "\n".join(lines) + "\n]\n", encoding="utf-8")
+    assert reader.read()[2]["english"] == "time" and reader.parsed_lines == 1
+
+def test_deck_change_reindexes_example_sentences_for_added_words(corpus_path):
+    main_simplified = pytest.importorskip("main_simplified")     # Needs tkinter
+    deck = [{"hanzi": hanzi, "pinyin": "", "english": hanzi} for hanzi in CORPUS_WORDS if hanzi != "喜欢"]
+    app = main_simplified.ChineseLearningApp.__new__(main_simplified.ChineseLearningApp)
+    app.vocabulary, app.word_index, app.cloze_items = deck, {word["hanzi"]: word for word in deck}, None
+    app.segmenter = Segmenter.from_vocabulary(deck)
+    app.prefetcher = FlashcardPrefetcher(FakeRoot(), [])
+    app.sentences_path, app.ime_dictionary_path = corpus_path, None
+    app.corpus = None
+    app.set_corpus(SentenceCorpus(corpus_path, app.word_index), ())
+    old_step = app.corpus_step
+    assert app.prefetcher.prepare({"hanzi": "喜欢"}, "hanzi-english")["examples"] == []
+
+    changed = deck + [{"hanzi": "喜欢", "pinyin": "xǐhuan", "english": "to like"}]
+    diff, _ = diff_decks(app.word_index, changed)
+    ime, corpus = app.prepare_deck_change(changed, diff)
+    assert corpus is not None
+    app.apply_deck_change(changed, diff, ime, corpus)
+    assert app.corpus is corpus and app.prefetcher.steps == [app.corpus_step] != [old_step]
+    assert app.prefetcher.prepare({"hanzi": "喜欢"}, "hanzi-english")["examples"] == \
+        [("我喜欢学习中文。", "I like studying Chinese.")]
+    # Removing words keeps the current index
+    assert app.prepare_deck_change(deck, diff_decks(app.word_index, deck)[0])[1] is None
+
+# Deck bundles
+
+def make_deck(size, english="word"):
+    return [{"hanzi": chr(0x4E00 + i) + chr(0x4E00 + i // 7), "pinyin": "yī", "english": f"{english} {i}",
+             "spanish": f"palabra {i}"} for i in range(size)]
+
+@pytest.mark.parametrize("codec", ["zlib", "lzma"])
+def test_bundle_round_trip(tmp_path, codec):
+    deck = make_deck(300)
+    path = str(tmp_path / "deck.bundle")
+    bundle.write_bundle(deck, path, codec, chunk_size=64)
+    deck_bundle = bundle.DeckBundle(path)
+    try:
+        assert len(deck_bundle) == 300 and deck_bundle.codec == codec
+        assert deck_bundle.hanzi == [word["hanzi"] for word in deck]
+        assert deck_bundle[150] == deck[150] and deck_bundle[-1] == deck[-1]
+        assert deck_bundle.inflated == 2
+        assert list(deck_bundle) == deck
+        index = deck_bundle.word_index()
+        assert index[deck[70]["hanzi"]] == deck[70] and "不在" not in index
+        assert deck_bundle.stubs()[5] == {"hanzi": deck[5]["hanzi"], "pinyin": "yī"}
+    finally:
+        deck_bundle.close()
+
+# Delta updates
+
+@pytest.fixture
+def deck_site(tmp_path):
+    """A deck update site served over HTTP on a free port"""
+    site = tmp_path / "site"
+    site.mkdir()
+    server = deck_updates.make_server(str(site), port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield site, f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+def read_bundle(path):
+    deck_bundle = bundle.DeckBundle(path)
+    try:
+        return list(deck_bundle)
+    finally:
+        deck_bundle.close()
+
+def test_delta_update_fetches_only_changed_chunks(tmp_path, deck_site):
+    site, url = deck_site
+    deck = make_deck(3000)
+    manifest, _ = deck_updates.publish(deck, str(site))
+    updater = deck_updates.DeckUpdater(url, str(tmp_path / "store"))
+    bundle_path = str(tmp_path / "deck.bundle")
+    first = updater.update(bundle_path)
+    assert (first["from_version"], first["version"], first["fetched"]) == (None, 1, len(manifest["chunks"]))
+    assert read_bundle(bundle_path) == deck
+
+    deck[1500]["english"] = "fixed gloss"
+    del deck[10]
+    deck_updates.publish(deck, str(site))
+    second = updater.update(bundle_path)
+    assert (second["from_version"], second["version"]) == (1, 2)
+    assert second["fetched"] == 2 < second["chunks"]
+    assert second["removed"] == 2
+    assert read_bundle(bundle_path) == deck
+    assert updater.update(bundle_path)["fetched"] == 0
+
+# Progress sync
+
+@pytest.fixture
+def sync_url(tmp_path):
+    """sync.py serve in its own process: the server keeps its logs in its own CHINESE_APP_HOME"""
+    env = dict(os.environ, CHINESE_APP_HOME=str(tmp_path / "server"))
+    server = subprocess.Popen([sys.executable, "-u", os.path.join(APP_DIR, "sync.py"), "serve", "--port", "0"],
+                              env=env, stdout=subprocess.PIPE, text=True, encoding="utf-8")
+    banner = server.stdout.readline()
+    yield re.search(r"http://\S+/", banner).group()
+    server.terminate()
+    server.wait()
+
+def use_device(monkeypatch, tmp_path, name):
+    """Switch this process to another installation's data directory"""
+    monkeypatch.setenv("CHINESE_APP_HOME", str(tmp_path / name))
+
+def test_sync_merges_devices_without_duplicates(tmp_path, monkeypatch, sync_url):
+    use_device(monkeypatch, tmp_path, "laptop")
+    review_log.record_review(STUDY, True)
+    review_log.record_match({"hanzi": "大"}, {"hanzi": "太"})
+    assert sync.sync(sync_url)["uploaded"] == 2
+    assert sync.sync(sync_url)["uploaded"] == 0
+
+    use_device(monkeypatch, tmp_path, "tablet")
+    review_log.record_review({"hanzi": "中国"}, False)
+    results = []
+    workers = [threading.Thread(target=lambda: results.append(sync.sync(sync_url))) for _ in range(3)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    # Concurrent syncs are serialized: the events arrive once
+    assert sorted(len(result["pulled"]) for result in results) == [0, 0, 2]
+    assert sorted(result["uploaded"] for result in results) == [0, 0, 1]
+    events = list(review_log.read_events())
+    assert [(event["type"], event["word"]) for event in events] == [("review", "中国"), ("review", "学习"),
+                                                                    ("match", "大")]
+    # Pulled mismatches reach the stored confusion matrix
+    assert ConfusionMatrix.load().top_pairs(1) == [("大", "太", 1)]
+
+    # A lost sync state pulls everything again, but nothing is appended twice
+    os.remove(sync.get_state_path())
+    assert sync.sync(sync_url)["pulled"] == []
+    assert len(list(review_log.read_events())) == 3
+
+    use_device(monkeypatch, tmp_path, "laptop")
+    pulled = sync.sync(sync_url)["pulled"]
+    assert [event["word"] for event in pulled] == ["中国"]
+
+def test_sync_batches_round_trip():
+    events = [{"seq": 3, "ts": 1700000000.123, "type": "review", "word": "学习", "correct": True},
+              {"seq": 9, "ts": 1700000005.5, "type": "match", "word": "大", "other": "太", "correct": False,
+               "source": "anki"}]
+    assert sync.decode_batch(json.loads(json.dumps(sync.encode_batch(events)))) == events